@@ -0,0 +1,40 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from api.auth import check_token
+from domain.models.user import User
+from domain.services.messages.dependencies import (
+    agent_cache_stats,
+    conversation_store_stats,
+    conversation_summary_stats,
+    embedding_cache_stats,
+    link_search_stats,
+)
+from tasks.embedding_backfill import embedding_backfill_stats
+from telegram.adapter import dispatch_queue_stats
+
+from .schemas.metrics_schema import MetricsSchema
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["/v1/metrics"],
+    redirect_slashes=False,
+)
+
+
+@router.get("", response_model=MetricsSchema)
+@router.get("/", include_in_schema=False)
+async def read_metrics(
+    user: Annotated[User, Depends(check_token)],
+) -> MetricsSchema:
+    """Счётчики процесса: кэши, очередь обработки сообщений, этапы поиска, память диалогов."""
+    return MetricsSchema(
+        agent_cache=agent_cache_stats,
+        dispatch_queue=dispatch_queue_stats,
+        embedding_cache=embedding_cache_stats,
+        embedding_backfill=embedding_backfill_stats,
+        link_search=link_search_stats,
+        conversation_store=conversation_store_stats,
+        conversation_summary=conversation_summary_stats,
+    )
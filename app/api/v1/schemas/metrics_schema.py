@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+
+from domain.models import (
+    AgentCacheStats,
+    ConversationStoreStats,
+    ConversationSummaryStats,
+    DispatchQueueStats,
+    EmbeddingBackfillStats,
+    EmbeddingCacheStats,
+    SearchStats,
+)
+
+
+class MetricsSchema(BaseModel):
+    agent_cache: AgentCacheStats
+    dispatch_queue: DispatchQueueStats
+    embedding_cache: EmbeddingCacheStats
+    embedding_backfill: EmbeddingBackfillStats
+    link_search: SearchStats
+    conversation_store: ConversationStoreStats
+    conversation_summary: ConversationSummaryStats
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 
+from .metrics_router import router as metrics_router
 from .user_router import router as user_router
 
 router = APIRouter(
@@ -7,4 +8,5 @@ router = APIRouter(
 )
 
 router.include_router(user_router)
+router.include_router(metrics_router)
 
@@ -40,9 +40,103 @@ class Settings(BaseSettings):
             # {"name":"support_bot","token":"987:BBB"},
         ]
     }
+    TELEGRAM_STREAM_EDIT_INTERVAL: float = Field(
+        0.7, description="Минимальный интервал между правками сообщения при потоковом ответе, секунд"
+    )
 
     # OpeanAI
     OPENAI_API_KEY: str = Field(..., description='OpenAI API key')
+    OPENAI_BASE_URL: str | None = Field(None, description="Base URL OpenAI-совместимого API (None — api.openai.com)")
+    OPENAI_MAX_CONNECTIONS: int = Field(100, description="Максимум соединений в пуле клиента OpenAI")
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = Field(20, description="Сколько простаивающих соединений держать открытыми")
+    OPENAI_KEEPALIVE_EXPIRY: float = Field(30.0, description="Через сколько секунд закрывать простаивающее соединение")
+    OPENAI_TIMEOUT: float = Field(60.0, description="Таймаут запроса к OpenAI, секунд")
+    OPENAI_HTTP2: bool | None = Field(None, description="HTTP/2 для OpenAI (None — если установлен пакет h2)")
+    EMBEDDING_MODEL: str = Field("text-embedding-3-small", description="Модель эмбеддингов OpenAI")
+    EMBEDDING_DIMENSIONS: int | None = Field(
+        None, description="Укорачивать эмбеддинги text-embedding-3 до этой размерности (None — 1536, родная)"
+    )
+    EMBEDDING_BATCH_MAX_SIZE: int = Field(64, description="Максимум текстов в одном батч-запросе эмбеддингов")
+    EMBEDDING_BATCH_MAX_DELAY: float = Field(
+        0.005, description="Сколько секунд копить конкурентные запросы эмбеддингов перед отправкой"
+    )
+    EMBEDDING_BATCH_MAX_CONCURRENCY: int = Field(4, description="Максимум одновременных запросов к API эмбеддингов")
+
+    # Embedding cache
+    EMBEDDING_CACHE_MAX_ENTRIES: int = Field(10_000, description="Максимум записей в in-process кэше эмбеддингов")
+    EMBEDDING_CACHE_MAX_BYTES: int = Field(
+        64 * 1024 * 1024, description="Максимальный суммарный размер векторов in-process кэша, байт"
+    )
+    EMBEDDING_CACHE_TTL: float = Field(24 * 3600, description="TTL записи in-process кэша эмбеддингов, секунд")
+    EMBEDDING_CACHE_PERSISTENT: bool = Field(True, description="Сохранять эмбеддинги в таблицу embeddings_cache")
+
+    # Embedding backfill
+    EMBEDDING_BACKFILL_WORKERS: int = Field(
+        2, description="Воркеров фонового расчёта эмбеддингов ссылок (0 — выключено)"
+    )
+    EMBEDDING_BACKFILL_BATCH_SIZE: int = Field(64, description="Строк в одной пачке фонового расчёта эмбеддингов")
+    EMBEDDING_BACKFILL_IDLE_INTERVAL: float = Field(
+        5.0, description="Пауза воркера, когда строк без эмбеддинга не осталось, секунд"
+    )
+
+    # Message dispatch
+    DISPATCH_MAX_CONCURRENCY: int = Field(16, description="Максимум одновременно обрабатываемых сообщений на процесс")
+    DISPATCH_CHAT_QUEUE_SIZE: int = Field(20, description="Максимум сообщений в очереди одного чата")
+    DISPATCH_OVERFLOW_POLICY: Literal["reject", "drop_oldest", "block"] = Field(
+        "reject", description="Что делать с сообщением, когда очередь чата заполнена"
+    )
+    DISPATCH_DRAIN_TIMEOUT: float = Field(
+        10.0, description="Сколько секунд при остановке дорабатывать уже принятые сообщения"
+    )
+
+    # Agent response cache
+    AGENT_CACHE_ENABLED: bool = Field(True, description="Кэшировать ответы агентов на повторные запросы")
+    AGENT_CACHE_TTL: float = Field(600.0, description="TTL закэшированного ответа агента, секунд")
+    AGENT_CACHE_MAX_ENTRIES_PER_USER: int = Field(100, description="Сколько ответов на пользователя держать в кэше")
+    AGENT_CACHE_MAX_USERS: int = Field(1_000, description="Для скольких пользователей держать кэш ответов (LRU)")
+    AGENT_CACHE_SIMILARITY_THRESHOLD: float | None = Field(
+        0.95, description="Порог косинусной близости запросов для попадания в кэш; None — только точное совпадение"
+    )
+
+    # Conversation memory
+    CONVERSATION_RING_SIZE: int = Field(50, description="Сколько последних реплик чата держать в памяти")
+    CONVERSATION_MAX_CHATS: int = Field(1_000, description="Сколько чатов держать в памяти (LRU)")
+    CONVERSATION_HISTORY_TOKENS: int = Field(2_000, description="Бюджет токенов истории диалога для агента")
+    CONVERSATION_FLUSH_BATCH: int = Field(32, description="Сколько реплик копить перед записью в БД")
+    CONVERSATION_FLUSH_INTERVAL: float = Field(
+        5.0, description="Сколько секунд реплика может ждать записи в БД, прежде чем её допишут со следующей"
+    )
+    CONVERSATION_SUMMARY_TOKENS: int = Field(
+        400, description="Запас бюджета истории под сводку старой части диалога, токенов"
+    )
+    CONVERSATION_SUMMARY_KEEP_TOKENS: int = Field(
+        800, description="Сколько токенов свежих реплик оставлять дословно при пересчёте сводки"
+    )
+
+    # Vector search (pgvector)
+    VECTOR_EF_SEARCH: int | None = Field(
+        None, description="hnsw.ef_search для запросов (None — значение сервера, по умолчанию 40)"
+    )
+    VECTOR_IVFFLAT_PROBES: int | None = Field(None, description="ivfflat.probes для IVFFlat-индексов")
+    VECTOR_ITERATIVE_SCAN: Literal["off", "strict_order", "relaxed_order"] | None = Field(
+        "strict_order",
+        description="hnsw.iterative_scan: добирать кандидатов, если фильтр (user_id) отсёк часть выдачи",
+    )
+    VECTOR_INDEX_BACKEND: Literal["auto", "pgvector", "numpy"] = Field(
+        "auto",
+        description="Где искать по эмбеддингам: pgvector или in-process NumPy-индекс (auto — numpy для не-PostgreSQL)",
+    )
+    VECTOR_INDEX_NLIST: int = Field(0, description="Число IVF-кластеров NumPy-индекса (0 — только brute-force)")
+    VECTOR_INDEX_NPROBE: int = Field(8, description="Сколько IVF-кластеров просматривать при поиске")
+
+    # Hybrid search
+    SEARCH_EMBED_TIMEOUT: float = Field(
+        1.5, description="Сколько секунд ждать эмбеддинг запроса, прежде чем ответить только лексическим поиском"
+    )
+    SEARCH_CANDIDATE_DEPTH: int = Field(100, description="Сколько ANN-кандидатов переранжировать точным косинусом")
+    SEARCH_PULL_COUNT_WEIGHT: float = Field(0.05, description="Вес буста за pull_count при переранжировании")
+    SEARCH_RECENCY_WEIGHT: float = Field(0.05, description="Вес буста за свежесть при переранжировании")
+    SEARCH_RECENCY_HALF_LIFE_DAYS: float = Field(90.0, description="Период полураспада буста свежести, дней")
 
     @field_validator("TZ", mode="before")
     @classmethod
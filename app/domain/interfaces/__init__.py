@@ -1,6 +1,31 @@
-from .embedding_ifaces import IEmbeddingClient, IEmbeddingService  # noqa: F401, I001
+from .embedding_ifaces import (  # noqa: F401, I001
+    IBatchEmbeddingClient,
+    IEmbeddingCache,
+    IEmbeddingCacheRepoProtocol,
+    IEmbeddingClient,
+    IEmbeddingService,
+)
 from .link_ifaces import ILinkRepoProtocol, ILinkService  # noqa: F401
 from .message_router_iface import IMessageRouter  # noqa: F401
-from .mixins_repo_iface import ICount,ICreate, IDelete, IExists, IList, IRead, IUpdate, IVectorSearch  # noqa: F401
+from .mixins_repo_iface import (  # noqa: F401
+    ICount,
+    ICreate,
+    ICreateMany,
+    IDelete,
+    IExists,
+    ILexicalSearch,
+    IList,
+    IRead,
+    IUpdate,
+    IVectorBackfill,
+    IVectorSearch,
+)
 from .user_ifaces import IUserService, IUserRepoProtocol  # noqa: F401
-from .agent_ifaces import IAgent  # noqa: F401
+from .agent_ifaces import IAgent, IAgentRegistry  # noqa: F401
+from .vector_index_ifaces import IVectorIndex  # noqa: F401
+from .conversation_ifaces import (  # noqa: F401
+    IConversationRepoProtocol,
+    IConversationStore,
+    IConversationSummarizer,
+    IHistoryCompactor,
+)
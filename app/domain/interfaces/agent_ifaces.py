@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Callable
+from typing import AsyncIterator, Callable
 
 from domain.models.message import Message
 
@@ -30,3 +30,25 @@ class IAgent(ABC):
     async def invoke(self, msg: Message) -> Message:
         """Вызвает агента и передает ему сообщение. Агент должен ответить сообжением."""
         ...
+
+    @abstractmethod
+    def stream(self, msg: Message) -> AsyncIterator[str]:
+        """Как invoke, но отдаёт текст ответа кусками по мере генерации (токены модели)."""
+        ...
+
+
+class IAgentRegistry(ABC):
+    @abstractmethod
+    def register(self, name: str, factory: Callable[[], IAgent]) -> None:
+        """Регистрирует фабрику агента. Сам агент (и его граф) строится при warm_up() или первом get()."""
+        ...
+
+    @abstractmethod
+    def get(self, name: str) -> IAgent:
+        """Возвращает общий экземпляр агента, построенный один раз на процесс."""
+        ...
+
+    @abstractmethod
+    def warm_up(self) -> dict[str, float]:
+        """Строит всех ещё не построенных агентов. Возвращает время построения каждого, мс."""
+        ...
@@ -0,0 +1,58 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Protocol
+
+from domain.models import CompactedHistory, Context, ConversationEntryDict, ConversationEntryFields
+from domain.models.base_domain_model import TDomain
+
+from .mixins_repo_iface import ICreateMany
+
+
+class IConversationRepoProtocol(ICreateMany[TDomain, ConversationEntryDict, ConversationEntryFields], Protocol):
+    async def recent(self, chat_id: int, limit: int) -> list[TDomain]:
+        """Последние limit реплик чата в хронологическом порядке — один запрос по индексу (chat_id, id)."""
+        ...
+
+
+class IConversationStore(ABC):
+    @abstractmethod
+    async def append(self, chat_id: int, entry: Context) -> None:
+        """Добавляет реплику в историю чата."""
+        ...
+
+    @abstractmethod
+    async def history(self, chat_id: int, max_tokens: Optional[int] = None) -> list[Context]:
+        """
+        История чата в хронологическом порядке.
+        max_tokens — бюджет токенов: берутся самые свежие реплики, которые в него помещаются.
+        """
+        ...
+
+    @abstractmethod
+    async def flush(self) -> None:
+        """Записывает в БД реплики, ещё не сохранённые."""
+        ...
+
+
+class IConversationSummarizer(ABC):
+    @abstractmethod
+    async def summarize(self, summary: str, entries: list[Context], max_tokens: int) -> str:
+        """
+        Дополняет сводку summary (пустая строка — сводки ещё нет) репликами entries.
+        Возвращает новую сводку не длиннее ~max_tokens токенов.
+        """
+        ...
+
+
+class IHistoryCompactor(ABC):
+    @abstractmethod
+    def compact(self, chat_id: int, entries: list[Context]) -> CompactedHistory:
+        """
+        Сжимает историю чата под бюджет токенов: закэшированная сводка + свежие реплики.
+        Не ждёт LLM: если несвёрнутых реплик накопилось больше порога, сводка пересчитывается в фоне.
+        """
+        ...
+
+    @abstractmethod
+    async def aclose(self) -> None:
+        """Отменяет фоновые пересчёты сводок."""
+        ...
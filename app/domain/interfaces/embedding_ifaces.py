@@ -1,15 +1,57 @@
 from abc import ABC, abstractmethod
-from typing import Protocol
+from typing import Optional, Protocol, Sequence
+
+from ..interfaces.mixins_repo_iface import ICreateMany, IRead
+from ..models.base_domain_model import TDomain
+from ..models.embedding import EmbeddingCacheDict, EmbeddingCacheFields
+from ..models.vector import Float32Array, VectorLike
 
 
 class IEmbeddingClient(Protocol):
-    async def embed(self, text: str) -> list[float]:
+    @property
+    def model(self) -> str:
+        """Имя модели эмбеддингов (входит в ключ кэша)."""
+        ...
+
+    @property
+    def dimensions(self) -> Optional[int]:
+        """Размерность, до которой модель укорачивает эмбеддинг (None — родная размерность модели)."""
+        ...
+
+    async def embed(self, text: str) -> Float32Array:
         """Получить эмбеддинг для переданного текста."""
         ...
 
 
+class IBatchEmbeddingClient(IEmbeddingClient, Protocol):
+    async def embed_many(self, texts: Sequence[str]) -> list[Float32Array]:
+        """Эмбеддинги для нескольких текстов одним запросом, в порядке texts."""
+        ...
+
+
+class IEmbeddingCache(ABC):
+    """In-process кэш эмбеддингов по ключу embedding_cache_key."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Float32Array]:
+        """Эмбеддинг по ключу или None, если его нет или истёк TTL."""
+        ...
+
+    @abstractmethod
+    def set(self, key: str, embedding: VectorLike) -> None:
+        """Положить эмбеддинг, вытеснив самые старые записи сверх лимитов."""
+        ...
+
+
+class IEmbeddingCacheRepoProtocol(
+    ICreateMany[TDomain, EmbeddingCacheDict, EmbeddingCacheFields],
+    IRead[TDomain, EmbeddingCacheDict],
+    Protocol,
+): ...
+
+
 class IEmbeddingService(ABC):
     @abstractmethod
-    async def embed(self, text: str) -> list[float]:
+    async def embed(self, text: str) -> Float32Array:
         """Получить эмбеддинг для переданного текста."""
         ...
@@ -1,28 +1,38 @@
 from abc import ABC, abstractmethod
-from typing import Protocol
+from typing import Optional, Protocol
 
 from ..interfaces.mixins_repo_iface import (
+    ICount,
     ICreate,
+    ICreateMany,
     IDelete,
     IExists,
+    ILexicalSearch,
     IList,
     IRead,
     IUpdate,
+    IVectorBackfill,
     IVectorSearch,
 )
 from ..models.base_domain_model import TDomain
-from ..models.link import Link, LinkDict, LinkFields
+from ..models.bulk import BulkCreateResult, OnConflict
+from ..models.link import Link, LinkDict, LinkFields, SearchMode
+from ..models.search import RerankWeights
 from ..models.user import User
 
 
 class ILinkRepoProtocol(
     ICreate[TDomain, LinkDict],
+    ICreateMany[TDomain, LinkDict, LinkFields],
     IRead[TDomain, LinkDict],
     IUpdate[TDomain, LinkDict],
     IList[TDomain, LinkDict, LinkFields],
     IExists[LinkDict],
+    ICount[LinkDict],
     IDelete[LinkDict],
     IVectorSearch[TDomain, LinkDict],
+    ILexicalSearch[TDomain, LinkDict],
+    IVectorBackfill[TDomain],
     Protocol,
 ): ...
 
@@ -32,7 +42,18 @@ class ILinkService(ABC):
     async def append(self, data: LinkDict) -> Link: ...
 
     @abstractmethod
-    async def find(self, user: User, request: str) -> list[Link]: ...
+    async def append_many(self, data: list[LinkDict], on_conflict: OnConflict = "skip") -> BulkCreateResult[Link]: ...
+
+    @abstractmethod
+    async def find(
+        self,
+        user: User,
+        request: str,
+        mode: SearchMode = "hybrid",
+        limit: int = 10,
+        depth: Optional[int] = None,
+        weights: Optional[RerankWeights] = None,
+    ) -> list[Link]: ...
 
     @abstractmethod
     async def update(self, user: User, id: int, data: LinkDict) -> Link: ...
@@ -41,7 +62,7 @@ class ILinkService(ABC):
     async def remove(self, user: User, id: int) -> bool: ...
 
     @abstractmethod
-    async def read(self, filters: LinkDict) -> Link: ...
+    async def read(self, filters: LinkDict, fields: Optional[list[LinkFields]] = None) -> Link: ...
 
 
 class ILinkFilterAgent(Protocol):
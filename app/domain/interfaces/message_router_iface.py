@@ -19,6 +19,11 @@ class IMessageRouter(ABC):
     @abstractmethod
     def include_middleware(self, router: 'IMessageRouter') -> None: ...
 
+    @abstractmethod
+    def compile(self) -> None:
+        """Собрать таблицу маршрутов заранее (иначе она соберётся при первом dispatch)."""
+        ...
+
     @abstractmethod
     async def dispatch(self, dm: Message) -> None:
         """
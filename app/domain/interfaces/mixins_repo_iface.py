@@ -1,26 +1,56 @@
-from typing import Generic, Optional, Protocol
+from typing import Any, AsyncIterator, Generic, Mapping, Optional, Protocol, Sequence
 
 from ..models.base_domain_model import TCovDomain, TDictFields, TDomain, TTypedDict
+from ..models.bulk import BulkCreateResult, OnConflict
+from ..models.vector import VectorLike
 
 
 class ICreate(Protocol, Generic[TCovDomain, TTypedDict]):
     async def create(self, data: TTypedDict) -> TCovDomain: ...
 
 
+class ICreateMany(Protocol, Generic[TDomain, TTypedDict, TDictFields]):
+    async def create_many(
+        self,
+        items: Sequence[TTypedDict],
+        on_conflict: OnConflict = "skip",
+        conflict_columns: Optional[list[TDictFields]] = None,
+        chunk_size: int = 500,
+    ) -> BulkCreateResult[TDomain]: ...
+
+
 class IRead(Protocol, Generic[TCovDomain, TTypedDict]):
-    async def read(self, filters: Optional[TTypedDict] = None) -> TCovDomain: ...
+    async def read(
+        self, filters: Optional[TTypedDict] = None, fields: Optional[Sequence[str]] = None
+    ) -> TCovDomain: ...
 
 
 class IList(Protocol, Generic[TDomain, TTypedDict, TDictFields]):
+    def iter_list(
+        self,
+        filters: Optional[TTypedDict] = None,
+        order_columns: Optional[Sequence[TDictFields]] = None,
+        chunk_size: int = 500,
+        fields: Optional[Sequence[str]] = None,
+    ) -> AsyncIterator[TDomain]: ...
+
     async def list(
         self,
         filters: Optional[TTypedDict] = None,
         order_columns: Optional[list[TDictFields]] = None,
+        after: Optional[tuple[Any, ...]] = None,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
     ) -> list[TDomain]: ...
 
 
 class IUpdate(Protocol, Generic[TDomain, TTypedDict]):
-    async def update(self, data: TTypedDict, filters: Optional[TTypedDict] = None) -> list[TDomain]: ...
+    async def update(
+        self,
+        data: TTypedDict,
+        filters: Optional[TTypedDict] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> list[TDomain]: ...
 
 
 class IDelete(Protocol, Generic[TTypedDict]):
@@ -38,7 +68,39 @@ class IExists(Protocol, Generic[TTypedDict]):
 class IVectorSearch(Protocol, Generic[TDomain, TTypedDict]):
     async def list_by_embedding(
         self,
-        embedding: list[float],
+        embedding: VectorLike,
+        limit: int,
+        filters: Optional[TTypedDict] = None,
+        fields: Optional[Sequence[str]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ) -> list[TDomain]: ...
+
+
+class ILexicalSearch(Protocol, Generic[TDomain, TTypedDict]):
+    async def list_by_fulltext(
+        self,
+        query: str,
+        limit: int,
+        filters: Optional[TTypedDict] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> list[TDomain]: ...
+
+    async def list_by_trigram(
+        self,
+        query: str,
         limit: int,
         filters: Optional[TTypedDict] = None,
+        fields: Optional[Sequence[str]] = None,
     ) -> list[TDomain]: ...
+
+
+class IVectorBackfill(Protocol, Generic[TDomain]):
+    async def claim_missing_vectors(
+        self,
+        limit: int,
+        exclude_ids: Sequence[Any] = (),
+        fields: Optional[Sequence[str]] = None,
+    ) -> list[TDomain]: ...
+
+    async def update_vectors(self, vectors: Mapping[Any, VectorLike]) -> int: ...
@@ -0,0 +1,45 @@
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+
+from ..models.vector import VectorLike
+
+VectorLoader = Callable[[], Awaitable[Iterable[tuple[int, VectorLike]]]]
+
+
+class IVectorIndex(ABC):
+    """
+    In-process индекс векторов, разбитый на партиции (например, по user_id).
+    Партиция загружается лениво через loader и дальше поддерживается инкрементально.
+    """
+
+    @abstractmethod
+    async def ensure_loaded(self, partition: Hashable, loader: VectorLoader) -> None:
+        """Загрузить партицию, если она ещё не в памяти."""
+        ...
+
+    @abstractmethod
+    def upsert(self, partition: Hashable, id: int, vector: VectorLike) -> None:
+        """Добавить или заменить вектор. Для незагруженной партиции ничего не делает."""
+        ...
+
+    @abstractmethod
+    def remove(self, ids: Iterable[Any]) -> None:
+        """Удалить векторы по id из всех партиций."""
+        ...
+
+    @abstractmethod
+    def invalidate(self, partition: Optional[Hashable] = None) -> None:
+        """Сбросить партицию (или все), чтобы она перечиталась при следующем поиске."""
+        ...
+
+    @abstractmethod
+    def search(
+        self,
+        partition: Hashable,
+        embedding: VectorLike,
+        k: int,
+        allowed_ids: Optional[Iterable[int]] = None,
+        nprobe: Optional[int] = None,
+    ) -> list[tuple[int, float]]:
+        """Top-k ближайших по косинусному расстоянию: список (id, distance) по возрастанию distance."""
+        ...
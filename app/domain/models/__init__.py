@@ -1,4 +1,24 @@
 from .base_domain_model import BaseDomainModel, TCovDomain, TDictFields, TDomain, TTypedDict  # noqa: F401, I001
-from .link import Link, LinkFields, LinkDict, LinkCreate  # noqa: F401
+from .link import Link, LinkFields, LinkDict, LinkCreate, SearchMode  # noqa: F401
 from .message import Message, Context  # noqa: F401
 from .user import User, UserFields, UserDict  # noqa: F401
+from .bulk import BulkCreateResult, OnConflict  # noqa: F401
+from .embedding import (  # noqa: F401
+    EmbeddingBackfillStats,
+    EmbeddingCacheDict,
+    EmbeddingCacheEntry,
+    EmbeddingCacheFields,
+    EmbeddingCacheStats,
+)
+from .vector import EmbeddingVector, Float32Array, VectorLike, as_float32  # noqa: F401
+from .search import RerankWeights, SearchStats, StageLatency  # noqa: F401
+from .dispatch import DispatchQueueStats, OverflowPolicy  # noqa: F401
+from .conversation import (  # noqa: F401
+    CompactedHistory,
+    ConversationEntry,
+    ConversationEntryDict,
+    ConversationEntryFields,
+    ConversationStoreStats,
+    ConversationSummaryStats,
+)
+from .agent_cache import AgentCacheStats  # noqa: F401
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field, computed_field
+
+from .search import StageLatency
+
+
+class AgentCacheStats(BaseModel):
+    """Метрики кэша ответов агентов (общие на процесс)."""
+    exact_hits: int = Field(0, description='Попадания по нормализованному тексту запроса')
+    semantic_hits: int = Field(0, description='Попадания по близости эмбеддингов')
+    misses: int = Field(0, description='Запросы, ушедшие к LLM')
+    skipped: int = Field(0, description='Ответы не закэшированы: агент вызвал инструмент, меняющий данные')
+    expired: int = Field(0, description='Записи, выкинутые по TTL')
+    saved_ms: float = Field(0.0, description='Сэкономленное время: латентность исходных ответов минус поиск в кэше')
+    lookup: StageLatency = Field(default_factory=StageLatency, description='Латентность поиска в кэше')
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def hits(self) -> int:
+        return self.exact_hits + self.semantic_hits
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,20 @@
+from typing import Any, Generic, Literal
+
+from pydantic import BaseModel, Field
+
+from .base_domain_model import TDomain
+
+OnConflict = Literal["skip", "update"]
+
+
+class BulkCreateResult(BaseModel, Generic[TDomain]):
+    """Результат пакетной вставки (create_many)."""
+    created: list[TDomain] = Field(default_factory=list, description="Вставленные строки")
+    updated: list[TDomain] = Field(
+        default_factory=list,
+        description='Существующие строки, обновлённые при on_conflict="update"',
+    )
+    skipped: list[dict[str, Any]] = Field(
+        default_factory=list,
+        description="Входные записи, которые не были записаны из-за конфликта уникальности",
+    )
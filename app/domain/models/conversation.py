@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from .base_domain_model import BaseCreateDict
+from .message import Context
+from .search import StageLatency
+
+
+class ConversationEntry(Context):
+    """Реплика диалога, сохранённая в таблице conversation_messages."""
+    id: int | None = Field(None, description='ID записи')
+    chat_id: int = Field(..., description='ID чата')
+
+
+class ConversationEntryDict(BaseCreateDict, total=False):
+    id: int
+    chat_id: int
+    date: datetime
+    username: str
+    user_text: str
+    jarvis_text: str
+
+
+ConversationEntryFields = Literal["id", "chat_id", "date", "username", "user_text", "jarvis_text"]
+
+
+class ConversationStoreStats(BaseModel):
+    """Метрики хранилища диалогов (общие на процесс)."""
+    memory_hits: int = Field(0, description='История чата нашлась в памяти')
+    loads: int = Field(0, description='История чата загружена из БД')
+    evictions: int = Field(0, description='Чатов вытеснено из памяти (LRU)')
+    flushed: int = Field(0, description='Реплик записано в БД')
+    dropped: int = Field(0, description='Реплик не записано: буфер записи переполнился, пока БД была недоступна')
+
+
+class CompactedHistory(BaseModel):
+    """История для промпта: сводка старой части разговора и свежие реплики дословно."""
+    summary: str | None = Field(None, description='Сводка реплик, не вошедших в recent')
+    recent: list[Context] = Field(default_factory=list, description='Свежие реплики в хронологическом порядке')
+
+
+class ConversationSummaryStats(BaseModel):
+    """Метрики сжатия истории диалогов (общие на процесс)."""
+    scheduled: int = Field(0, description='Запущено фоновых пересчётов сводки')
+    completed: int = Field(0, description='Сводок пересчитано')
+    failed: int = Field(0, description='Пересчётов сводки упало')
+    folded: int = Field(0, description='Реплик свёрнуто в сводки')
+    summarize: StageLatency = Field(default_factory=StageLatency, description='Латентность вызова LLM для сводки')
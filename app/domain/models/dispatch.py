@@ -0,0 +1,25 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from .search import StageLatency
+
+# Что делать с новым сообщением, когда очередь чата заполнена:
+# reject — отклонить новое, drop_oldest — выкинуть самое старое из очереди, block — ждать места
+OverflowPolicy = Literal['reject', 'drop_oldest', 'block']
+
+
+class DispatchQueueStats(BaseModel):
+    """Метрики планировщика обработки сообщений (общие на процесс)."""
+    submitted: int = Field(0, description='Принято в очереди')
+    dispatched: int = Field(0, description='Обработано (включая завершившиеся ошибкой)')
+    failed: int = Field(0, description='Обработка завершилась исключением')
+    rejected: int = Field(0, description='Отклонено: очередь чата заполнена (reject)')
+    dropped: int = Field(0, description='Выкинуто из очереди более новыми сообщениями (drop_oldest)')
+    depth: int = Field(0, description='Сейчас ждут в очередях всех чатов')
+    max_depth: int = Field(0, description='Максимальная суммарная глубина очередей')
+    active_chats: int = Field(0, description='Чатов с непустой очередью или сообщением в обработке')
+    in_flight: int = Field(0, description='Сообщений в обработке прямо сейчас')
+    wait: StageLatency = Field(
+        default_factory=StageLatency, description='Ожидание от постановки в очередь до обработки'
+    )
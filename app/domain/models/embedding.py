@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+from typing import Literal
+
+from pydantic import BaseModel, Field, computed_field
+
+from .base_domain_model import BaseCreateDict, BaseDomainModel
+from .vector import EmbeddingVector, VectorLike
+
+
+class EmbeddingCacheEntry(BaseDomainModel):
+    """Сохранённый эмбеддинг (таблица embeddings_cache)."""
+    key: str = Field(..., description='sha256(model, нормализованный текст)')
+    model: str = Field(..., description='Модель, посчитавшая эмбеддинг')
+    vector: EmbeddingVector = Field(..., description='Эмбеддинг (float32)')
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description='Дата создания')
+
+
+class EmbeddingCacheDict(BaseCreateDict, total=False):
+    key: str
+    model: str
+    vector: VectorLike
+    created_at: datetime
+
+
+EmbeddingCacheFields = Literal["key", "model", "vector", "created_at"]
+
+
+class EmbeddingCacheStats(BaseModel):
+    """Счётчики кэша эмбеддингов (общие на процесс)."""
+    memory_hits: int = Field(0, description='Попадания в in-process LRU')
+    persistent_hits: int = Field(0, description='Попадания в таблицу embeddings_cache')
+    misses: int = Field(0, description='Запросы, ушедшие к провайдеру эмбеддингов')
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.persistent_hits
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EmbeddingBackfillStats(BaseModel):
+    """Метрики фонового расчёта эмбеддингов ссылок."""
+    backlog: int | None = Field(None, description='Строк без вектора при последнем подсчёте')
+    embedded: int = Field(0, description='Записано векторов')
+    failed: int = Field(0, description='Неудачных попыток по отдельным строкам')
+    failed_batches: int = Field(0, description='Пачек, откатившихся из-за ошибки')
+    busy_seconds: float = Field(0.0, description='Время, потраченное на обработку пачек')
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def throughput(self) -> float:
+        """Строк в секунду рабочего времени."""
+        return self.embedded / self.busy_seconds if self.busy_seconds else 0.0
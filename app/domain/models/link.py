@@ -4,6 +4,7 @@ from typing import Literal
 from pydantic import Field
 
 from .base_domain_model import BaseCreateDict, BaseDomainModel
+from .vector import EmbeddingVector, VectorLike
 
 
 class LinkCreate(BaseDomainModel):
@@ -18,7 +19,7 @@ class Link(LinkCreate):
     id: int = Field(..., description='ID в БД')
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description='Дата создания')
     pull_count: int = Field(0, description='Количество запросов ссылки')
-    vector: list[float] | None = Field(None, description='Векторное представление ссылки')
+    vector: EmbeddingVector | None = Field(None, description='Векторное представление ссылки (float32)')
 
 
 class LinkDict(BaseCreateDict, total=False):
@@ -29,7 +30,10 @@ class LinkDict(BaseCreateDict, total=False):
     title: str | None
     created_at: datetime
     pull_count: int
-    vector: list[float] | None
+    vector: VectorLike | None
 
 
+# hybrid — лексический + семантический поиск со слиянием RRF, semantic — только эмбеддинги, lexical — без эмбеддингов
+SearchMode = Literal["hybrid", "semantic", "lexical"]
+
 LinkFields = Literal["id", "user_id", "link", "description", "title", "created_at", "pull_count", "vector"]
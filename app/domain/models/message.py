@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Awaitable, Callable
+from typing import AsyncIterator, Awaitable, Callable
 
 from pydantic import ConfigDict, Field, field_serializer
 
@@ -8,6 +8,8 @@ from config import settings
 from .base_domain_model import BaseDomainModel
 
 AnswerType = Callable[["Message"], Awaitable[None]]
+# Принимает поток кусков текста ответа, показывает его пользователю по мере поступления, возвращает полный текст
+StreamAnswerType = Callable[[AsyncIterator[str]], Awaitable[str]]
 
 
 async def _default_answer(*_) -> None:
@@ -34,7 +36,19 @@ class Message(BaseDomainModel):
     chat_id: int | None = None
     username: str | None = None
     answer: AnswerType = Field(default=_default_answer, description="Метод для ответа на сообщение")
+    stream_answer: StreamAnswerType | None = Field(
+        default=None, description="Метод для ответа потоком (None — ответ целиком через answer)"
+    )
     data: dict = Field(
         default_factory=dict, description="Словарь с дополнительными данными, которые могут прикреплять middleware."
     )
     context: list[Context] = Field(default_factory=list, description='Контекст диалога')
+    summary: str | None = Field(default=None, description='Сводка более ранней части диалога, не вошедшей в context')
+
+    async def answer_stream(self, chunks: AsyncIterator[str]) -> str:
+        """Отвечает потоком кусков текста, если транспорт это умеет, иначе одним сообщением. Возвращает весь текст."""
+        if self.stream_answer is not None:
+            return await self.stream_answer(chunks)
+        text = ''.join([chunk async for chunk in chunks])
+        await self.answer(Message(text=text))
+        return text
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field, computed_field
+
+
+class RerankWeights(BaseModel):
+    """Веса второго этапа поиска: score = cosine similarity + бусты популярности и свежести."""
+    pull_count_weight: float = Field(0.05, description='Вес log(1 + pull_count), нормированного по кандидатам')
+    recency_weight: float = Field(0.05, description='Вес свежести: 0.5 ** (возраст / recency_half_life_days)')
+    recency_half_life_days: float = Field(90.0, description='За сколько дней буст свежести убывает вдвое')
+
+
+class StageLatency(BaseModel):
+    """Накопленная латентность одного этапа поиска."""
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def observe(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+
+class SearchStats(BaseModel):
+    """Латентность этапов поиска ссылок (общая на процесс): lexical, embed, ann, rerank."""
+    stages: dict[str, StageLatency] = Field(default_factory=dict)
+
+    def observe(self, stage: str, ms: float) -> None:
+        self.stages.setdefault(stage, StageLatency()).observe(ms)
@@ -0,0 +1,27 @@
+from typing import Annotated, Any, Sequence, Union
+
+import numpy as np
+import numpy.typing as npt
+from pydantic import PlainSerializer, PlainValidator, WithJsonSchema
+
+# Эмбеддинг в памяти процесса: плотный float32-буфер (1536 измерений — 6 КБ против ~50 КБ у list[float])
+Float32Array = npt.NDArray[np.float32]
+
+# Всё, что принимается как вектор на входе: numpy-массив или последовательность float
+VectorLike = Union[Float32Array, Sequence[float]]
+
+
+def as_float32(value: Any) -> Float32Array:
+    """Привести вектор (list, ndarray, pgvector Vector/HalfVector) к непрерывному float32-массиву без лишних копий."""
+    if hasattr(value, "to_numpy"):
+        value = value.to_numpy()
+    return np.ascontiguousarray(value, dtype=np.float32)
+
+
+# Поле pydantic-модели: хранится как float32-массив, в JSON/model_dump — список чисел
+EmbeddingVector = Annotated[
+    Float32Array,
+    PlainValidator(as_float32),
+    PlainSerializer(lambda vector: vector.tolist(), return_type=list[float]),
+    WithJsonSchema({"type": "array", "items": {"type": "number"}}),
+]
@@ -1,3 +1,6 @@
 from .embedding_service import EmbeddingService  # noqa: F401, I001
+from .embedding_backfill import EmbeddingBackfill  # noqa: F401
 from .link_service import LinkService  # noqa: F401
 from .user_service import UserService  # noqa: F401
+from .conversation_store import ConversationStore, select_history  # noqa: F401
+from .history_compactor import HistoryCompactor  # noqa: F401
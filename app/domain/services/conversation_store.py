@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import AbstractAsyncContextManager
+from datetime import timezone
+from typing import Callable, Optional, Sequence
+
+from ..interfaces import IConversationRepoProtocol, IConversationStore
+from ..models import Context, ConversationEntry, ConversationEntryDict, ConversationStoreStats
+
+logger = logging.getLogger(__name__)
+
+# Фабрика репозитория на собственной сессии: хранилище общее на процесс и живёт дольше любого dispatch
+ConversationRepoScope = Callable[[], AbstractAsyncContextManager[IConversationRepoProtocol[ConversationEntry]]]
+
+
+def approx_tokens(text: str) -> int:
+    """Грубая оценка числа токенов (~4 символа на токен) — без токенизатора на горячем пути."""
+    return len(text) // 4 + 1
+
+
+def context_tokens(entry: Context, count_tokens: Callable[[str], int] = approx_tokens) -> int:
+    return count_tokens(entry.user_text) + count_tokens(entry.jarvis_text)
+
+
+def select_history(
+    entries: Sequence[Context],
+    max_tokens: int,
+    count_tokens: Callable[[str], int] = approx_tokens,
+) -> list[Context]:
+    """Самые свежие реплики, суммарно укладывающиеся в max_tokens, в хронологическом порядке."""
+    selected: list[Context] = []
+    budget = max_tokens
+    for entry in reversed(entries):
+        budget -= context_tokens(entry, count_tokens)
+        if budget < 0:
+            break
+        selected.append(entry)
+    selected.reverse()
+    return selected
+
+
+class ConversationStore(IConversationStore):
+    """
+    История диалогов по чатам.
+
+    В памяти — кольцевой буфер последних ring_size реплик на чат (deque с maxlen: добавление O(1)),
+    чаты в LRU не больше max_chats. Всё пишется в таблицу conversation_messages пачками (write-behind):
+    при накоплении flush_batch реплик, если старейшая несохранённая ждёт дольше flush_interval, и в flush()
+    при остановке. Чат, вытесненный из памяти, при следующем сообщении загружается одним запросом
+    по индексу (chat_id, id).
+
+    Сообщения одного чата обрабатываются последовательно (ChatDispatchScheduler), поэтому загрузка
+    истории чата не гоняется сама с собой.
+    """
+
+    def __init__(
+        self,
+        repo_scope: ConversationRepoScope,
+        ring_size: int = 50,
+        max_chats: int = 1_000,
+        flush_batch: int = 32,
+        flush_interval: float = 5.0,
+        max_pending: int = 10_000,
+        count_tokens: Callable[[str], int] = approx_tokens,
+        stats: Optional[ConversationStoreStats] = None,
+    ) -> None:
+        self.repo_scope = repo_scope
+        self.ring_size = ring_size
+        self.max_chats = max_chats
+        self.flush_batch = flush_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.count_tokens = count_tokens
+        self.stats = stats if stats is not None else ConversationStoreStats()
+        self._chats: OrderedDict[int, deque[Context]] = OrderedDict()
+        # (chat_id, реплика) — ещё не записано в БД
+        self._pending: deque[tuple[int, Context]] = deque()
+        self._oldest_pending_at = 0.0
+        self._flush_lock = asyncio.Lock()
+
+    async def _ring(self, chat_id: int) -> deque[Context]:
+        ring = self._chats.get(chat_id)
+        if ring is not None:
+            self._chats.move_to_end(chat_id)
+            self.stats.memory_hits += 1
+            return ring
+
+        # в БД должны оказаться и несохранённые реплики этого чата, иначе загрузка их потеряет
+        if any(pending_chat == chat_id for pending_chat, _ in self._pending):
+            await self.flush()
+        async with self.repo_scope() as repository:
+            rows = await repository.recent(chat_id, self.ring_size)
+        self.stats.loads += 1
+        ring = deque(
+            (Context.model_validate(row, from_attributes=True) for row in rows), maxlen=self.ring_size
+        )
+        self._chats[chat_id] = ring
+        while len(self._chats) > self.max_chats:
+            self._chats.popitem(last=False)
+            self.stats.evictions += 1
+        return ring
+
+    async def append(self, chat_id: int, entry: Context) -> None:
+        ring = await self._ring(chat_id)
+        ring.append(entry)
+        if not self._pending:
+            self._oldest_pending_at = time.monotonic()
+        self._pending.append((chat_id, entry))
+        if len(self._pending) > self.max_pending and not self._flush_lock.locked():
+            self._pending.popleft()
+            self.stats.dropped += 1
+        if (
+            len(self._pending) >= self.flush_batch
+            or time.monotonic() - self._oldest_pending_at >= self.flush_interval
+        ):
+            try:
+                await self.flush()
+            except Exception as ex:
+                # реплика уже в памяти и в буфере записи; попробуем записать со следующей
+                logger.warning(f'Conversation flush failed, {len(self._pending)} entries pending: {ex!r}')
+
+    async def history(self, chat_id: int, max_tokens: Optional[int] = None) -> list[Context]:
+        entries = list(await self._ring(chat_id))
+        if max_tokens is None:
+            return entries
+        return select_history(entries, max_tokens, self.count_tokens)
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch = list(self._pending)
+            items: list[ConversationEntryDict] = [
+                {
+                    'chat_id': chat_id,
+                    # в UTC: sqlite хранит дату без зоны, и после загрузки она читается как UTC
+                    'date': entry.date.astimezone(timezone.utc),
+                    'username': entry.username,
+                    'user_text': entry.user_text,
+                    'jarvis_text': entry.jarvis_text,
+                }
+                for chat_id, entry in batch
+            ]
+            async with self.repo_scope() as repository:
+                await repository.create_many(items)
+            # пока писали, могли добавиться новые реплики — снимаем только записанные
+            for _ in batch:
+                self._pending.popleft()
+            self._oldest_pending_at = time.monotonic()
+            self.stats.flushed += len(batch)
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+from contextlib import AbstractAsyncContextManager
+from typing import Any, Callable, Optional
+
+from ..interfaces import IEmbeddingClient, ILinkRepoProtocol
+from ..models import EmbeddingBackfillStats, Float32Array, Link
+
+logger = logging.getLogger(__name__)
+
+# Фабрика репозитория на собственной сессии: транзакция (и блокировки SKIP LOCKED) живёт до выхода из контекста
+BackfillRepoScope = Callable[[], AbstractAsyncContextManager[ILinkRepoProtocol[Link]]]
+
+# Лимит входа модели эмбеддингов — 8191 токен; с запасом режем по символам
+MAX_EMBEDDING_TEXT = 8_000
+
+
+def link_embedding_text(link: Link) -> str:
+    return "\n".join(part for part in (link.title, link.description, link.link) if part)[:MAX_EMBEDDING_TEXT]
+
+
+class EmbeddingBackfill:
+    """
+    Фоновое заполнение links.vector для ссылок, сохранённых без эмбеддинга.
+
+    Несколько воркеров по очереди захватывают пачки строк (FOR UPDATE SKIP LOCKED), считают эмбеддинги
+    через общий (батчащий) клиент и пишут их одним bulk UPDATE. Строка, на которой провайдер упал,
+    откладывается с экспоненциальной задержкой и не блокирует остальные; ошибка всей пачки
+    (БД, сеть) откатывает транзакцию, а воркер уходит в backoff.
+    """
+
+    def __init__(
+        self,
+        repo_scope: BackfillRepoScope,
+        client: IEmbeddingClient,
+        batch_size: int = 64,
+        workers: int = 2,
+        idle_interval: float = 5.0,
+        retry_base: float = 1.0,
+        max_backoff: float = 300.0,
+        report_interval: float = 60.0,
+        stats: Optional[EmbeddingBackfillStats] = None,
+    ) -> None:
+        self.repo_scope = repo_scope
+        self.client = client
+        self.batch_size = batch_size
+        self.workers = workers
+        self.idle_interval = idle_interval
+        self.retry_base = retry_base
+        self.max_backoff = max_backoff
+        self.report_interval = report_interval
+        self.stats = stats if stats is not None else EmbeddingBackfillStats()
+        # id -> (число неудач, monotonic-время, раньше которого строку не брать)
+        self._deferred: dict[Any, tuple[int, float]] = {}
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self.retry_base * 2 ** (attempt - 1), self.max_backoff)
+
+    def _defer(self, id: Any, ex: BaseException) -> None:
+        attempt = self._deferred.get(id, (0, 0.0))[0] + 1
+        self._deferred[id] = (attempt, time.monotonic() + self._backoff(attempt))
+        self.stats.failed += 1
+        logger.warning(f"Embedding for link {id} failed (attempt {attempt}): {ex!r}")
+
+    async def run_batch(self) -> int:
+        """Захватить, посчитать и записать одну пачку. Возвращает число захваченных строк."""
+        now = time.monotonic()
+        exclude_ids = [id for id, (_, retry_at) in self._deferred.items() if retry_at > now]
+        started = time.perf_counter()
+        async with self.repo_scope() as repository:
+            links = await repository.claim_missing_vectors(
+                self.batch_size, exclude_ids=exclude_ids, fields=['id', 'link', 'title', 'description']
+            )
+            if not links:
+                return 0
+            results = await asyncio.gather(
+                *(self.client.embed(link_embedding_text(link)) for link in links), return_exceptions=True
+            )
+            vectors: dict[Any, Float32Array] = {}
+            for link, result in zip(links, results):
+                if isinstance(result, BaseException):
+                    self._defer(link.id, result)
+                else:
+                    vectors[link.id] = result
+            await repository.update_vectors(vectors)
+
+        for id in vectors:
+            self._deferred.pop(id, None)
+        self.stats.embedded += len(vectors)
+        self.stats.busy_seconds += time.perf_counter() - started
+        return len(links)
+
+    async def refresh_backlog(self) -> int:
+        async with self.repo_scope() as repository:
+            self.stats.backlog = await repository.count(filters={'vector': None})
+        return self.stats.backlog
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        tasks = [asyncio.create_task(self._worker(stop_event)) for _ in range(self.workers)]
+        tasks.append(asyncio.create_task(self._reporter(stop_event)))
+        try:
+            await stop_event.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _worker(self, stop_event: asyncio.Event) -> None:
+        failures = 0
+        while not stop_event.is_set():
+            try:
+                claimed = await self.run_batch()
+            except Exception as ex:
+                failures += 1
+                self.stats.failed_batches += 1
+                delay = self._backoff(failures)
+                logger.error(f"Embedding backfill batch failed, retry in {delay:.0f}s: {ex!r}")
+                await self._sleep(stop_event, delay)
+                continue
+            failures = 0
+            if claimed < self.batch_size:
+                await self._sleep(stop_event, self.idle_interval)
+
+    async def _reporter(self, stop_event: asyncio.Event) -> None:
+        while not stop_event.is_set():
+            try:
+                await self.refresh_backlog()
+            except Exception as ex:
+                logger.warning(f"Embedding backfill backlog count failed: {ex!r}")
+            else:
+                if self.stats.backlog or self.stats.embedded:
+                    logger.info(
+                        f"Embedding backfill: backlog={self.stats.backlog}, embedded={self.stats.embedded}, "
+                        f"failed={self.stats.failed}, {self.stats.throughput:.1f} links/s"
+                    )
+            await self._sleep(stop_event, self.report_interval)
+
+    @staticmethod
+    async def _sleep(stop_event: asyncio.Event, delay: float) -> None:
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
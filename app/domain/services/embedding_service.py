@@ -1,10 +1,83 @@
-from ..interfaces.embedding_ifaces import IEmbeddingClient, IEmbeddingService
+import hashlib
+import unicodedata
+from contextlib import AbstractAsyncContextManager
+from typing import Callable, Optional
+
+from ..exceptions import NotFoundError
+from ..interfaces.embedding_ifaces import (
+    IEmbeddingCache,
+    IEmbeddingCacheRepoProtocol,
+    IEmbeddingClient,
+    IEmbeddingService,
+)
+from ..models.embedding import EmbeddingCacheEntry, EmbeddingCacheStats
+from ..models.vector import Float32Array
+
+# Фабрика репозитория на собственной короткой сессии: сервис общий на процесс и не держит соединение,
+# пока ждёт провайдера эмбеддингов
+EmbeddingCacheRepoScope = Callable[[], AbstractAsyncContextManager[IEmbeddingCacheRepoProtocol[EmbeddingCacheEntry]]]
+
+
+def normalize_text(text: str) -> str:
+    """Нормализация перед хешированием: NFKC и схлопывание пробелов. Регистр не меняем — он влияет на эмбеддинг."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def embedding_cache_key(model: str, text: str, dimensions: Optional[int] = None) -> str:
+    namespace = model if dimensions is None else f"{model}@{dimensions}"
+    return hashlib.sha256(f"{namespace}\x00{normalize_text(text)}".encode()).hexdigest()
 
 
 class EmbeddingService(IEmbeddingService):
-    def __init__(self, client: IEmbeddingClient) -> None:
+    """
+    Эмбеддинги с двухуровневым кэшем: in-process LRU (memory_cache) и таблица embeddings_cache (repo_scope).
+    Оба уровня необязательны; stats передаётся снаружи, чтобы счётчики были общими на процесс.
+    """
+
+    def __init__(
+        self,
+        client: IEmbeddingClient,
+        memory_cache: Optional[IEmbeddingCache] = None,
+        repo_scope: Optional[EmbeddingCacheRepoScope] = None,
+        stats: Optional[EmbeddingCacheStats] = None,
+    ) -> None:
         self.client = client
+        self.memory_cache = memory_cache
+        self.repo_scope = repo_scope
+        self.stats = stats if stats is not None else EmbeddingCacheStats()
 
-    async def embed(self, text: str) -> list[float]:
+    async def embed(self, text: str) -> Float32Array:
         """Получить эмбеддинг для переданного текста."""
-        return await self.client.embed(text)
+        key = embedding_cache_key(self.client.model, text, self.client.dimensions)
+
+        if self.memory_cache is not None:
+            embedding = self.memory_cache.get(key)
+            if embedding is not None:
+                self.stats.memory_hits += 1
+                return embedding
+
+        if self.repo_scope is not None:
+            try:
+                async with self.repo_scope() as repository:
+                    entry = await repository.read(filters={'key': key})
+            except NotFoundError:
+                pass
+            else:
+                self.stats.persistent_hits += 1
+                if self.memory_cache is not None:
+                    self.memory_cache.set(key, entry.vector)
+                return entry.vector
+
+        self.stats.misses += 1
+        embedding = await self.client.embed(text)
+        if self.memory_cache is not None:
+            self.memory_cache.set(key, embedding)
+        if self.repo_scope is not None:
+            # параллельный запрос мог уже записать тот же ключ — конфликт просто пропускаем
+            async with self.repo_scope() as repository:
+                await repository.create_many(
+                    [{'key': key, 'model': self.client.model, 'vector': embedding}],
+                    on_conflict="skip",
+                    conflict_columns=['key'],
+                )
+        return embedding
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple, Optional
+
+from ..interfaces import IConversationSummarizer, IHistoryCompactor
+from ..models import CompactedHistory, Context, ConversationSummaryStats
+from .conversation_store import approx_tokens, context_tokens, select_history
+
+logger = logging.getLogger(__name__)
+
+
+def _instant(dt: datetime) -> datetime:
+    # дата без зоны (sqlite) записана в UTC, см. ConversationStore.flush
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+class _ChatSummary(NamedTuple):
+    text: str
+    # дата последней реплики, вошедшей в сводку
+    covered_until: datetime
+    tokens: int
+
+
+class HistoryCompactor(IHistoryCompactor):
+    """
+    Скользящая сводка длинных диалогов.
+
+    В промпт идёт сводка старой части разговора и свежие реплики дословно, всего не больше max_tokens.
+    Когда несвёрнутые реплики перестают помещаться рядом со сводкой (с запасом summary_tokens под неё),
+    в фоне запускается пересчёт: всё, кроме последних keep_recent_tokens, сворачивается в сводку
+    инкрементально — LLM получает прошлую сводку и только новые реплики. Пока пересчёт идёт, ответ не ждёт:
+    берётся прежняя сводка, а самые старые несвёрнутые реплики временно не попадают в промпт.
+
+    Сводки кэшируются в памяти по chat_id (LRU не больше max_chats); на чат — не больше одного пересчёта.
+    """
+
+    def __init__(
+        self,
+        summarizer: IConversationSummarizer,
+        max_tokens: int = 2_000,
+        summary_tokens: int = 400,
+        keep_recent_tokens: int = 800,
+        max_chats: int = 1_000,
+        count_tokens: Callable[[str], int] = approx_tokens,
+        stats: Optional[ConversationSummaryStats] = None,
+    ) -> None:
+        if keep_recent_tokens + summary_tokens > max_tokens:
+            raise ValueError('keep_recent_tokens + summary_tokens должно помещаться в max_tokens')
+        self.summarizer = summarizer
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.keep_recent_tokens = keep_recent_tokens
+        self.max_chats = max_chats
+        self.count_tokens = count_tokens
+        self.stats = stats if stats is not None else ConversationSummaryStats()
+        self._summaries: OrderedDict[int, _ChatSummary] = OrderedDict()
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def compact(self, chat_id: int, entries: list[Context]) -> CompactedHistory:
+        summary = self._summaries.get(chat_id)
+        if summary is not None:
+            self._summaries.move_to_end(chat_id)
+            entries = [entry for entry in entries if _instant(entry.date) > summary.covered_until]
+
+        uncovered_tokens = sum(context_tokens(entry, self.count_tokens) for entry in entries)
+        if uncovered_tokens > self.max_tokens - self.summary_tokens and chat_id not in self._tasks:
+            self._schedule(chat_id, summary, entries)
+
+        budget = self.max_tokens - (summary.tokens if summary is not None else 0)
+        return CompactedHistory(
+            summary=summary.text if summary is not None else None,
+            recent=select_history(entries, budget, self.count_tokens),
+        )
+
+    def _schedule(self, chat_id: int, summary: Optional[_ChatSummary], entries: list[Context]) -> None:
+        keep = select_history(entries, self.keep_recent_tokens, self.count_tokens)
+        fold = entries[:len(entries) - len(keep)]
+        if not fold:
+            return
+        self.stats.scheduled += 1
+        task = asyncio.create_task(self._fold(chat_id, summary, fold))
+        self._tasks[chat_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(chat_id, None))
+
+    async def _fold(self, chat_id: int, summary: Optional[_ChatSummary], fold: list[Context]) -> None:
+        started = time.monotonic()
+        try:
+            text = await self.summarizer.summarize(
+                summary.text if summary is not None else '', fold, self.summary_tokens
+            )
+        except Exception as ex:
+            # сводка останется прежней, пересчёт повторится со следующим сообщением
+            self.stats.failed += 1
+            logger.warning(f'Conversation summary for chat {chat_id} failed: {ex!r}')
+            return
+        finally:
+            self.stats.summarize.observe((time.monotonic() - started) * 1000)
+
+        self._summaries[chat_id] = _ChatSummary(text, _instant(fold[-1].date), self.count_tokens(text))
+        self._summaries.move_to_end(chat_id)
+        while len(self._summaries) > self.max_chats:
+            self._summaries.popitem(last=False)
+        self.stats.completed += 1
+        self.stats.folded += len(fold)
+
+    async def join(self) -> None:
+        """Ждёт завершения фоновых пересчётов (для тестов и корректного останова)."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def aclose(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,38 +1,162 @@
+import asyncio
 import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, get_args
 
 from ..exceptions import NotFoundError
 from ..interfaces import IEmbeddingService, ILinkRepoProtocol, ILinkService
-from ..models import Link, LinkDict, User
+from ..models import (
+    BulkCreateResult,
+    Link,
+    LinkDict,
+    LinkFields,
+    OnConflict,
+    RerankWeights,
+    SearchMode,
+    SearchStats,
+    User,
+    VectorLike,
+)
+from .ranking import reciprocal_rank_fusion, rerank_by_similarity
 
 logger = logging.getLogger(__name__)
 
+# Для rerank нужны все колонки, включая vector (по умолчанию репозиторий его не загружает)
+_RERANK_FIELDS: list[str] = list(get_args(LinkFields))
+
 
 class LinkService(ILinkService):
     repository: ILinkRepoProtocol
     embed_service: IEmbeddingService
 
-    def __init__(self, repository: ILinkRepoProtocol, embed_service: IEmbeddingService) -> None:
+    def __init__(
+        self,
+        repository: ILinkRepoProtocol,
+        embed_service: IEmbeddingService,
+        embed_timeout: float = 1.5,
+        lexical_only_max_words: int = 1,
+        candidate_depth: int = 100,
+        rerank_weights: Optional[RerankWeights] = None,
+        search_stats: Optional[SearchStats] = None,
+    ) -> None:
         self.repository = repository
         self.embed_service = embed_service
+        self.embed_timeout = embed_timeout
+        self.lexical_only_max_words = lexical_only_max_words
+        self.candidate_depth = candidate_depth
+        self.rerank_weights = rerank_weights or RerankWeights()
+        self.search_stats = search_stats if search_stats is not None else SearchStats()
 
     async def append(self, data: LinkDict) -> Link:
         return await self.repository.create(data)
 
-    async def find(self, user: User, request: str) -> list[Link]:
-        request_embed = await self.embed_service.embed(request)
-        db_links = await self.repository.list_by_embedding(request_embed, limit=10, filters={'user_id': user.id})
-        if len(db_links) == 0:
-            raise NotFoundError('Не найдено ссылок по вашему запросу.')
+    async def append_many(self, data: list[LinkDict], on_conflict: OnConflict = "skip") -> BulkCreateResult[Link]:
+        """Пакетное добавление ссылок (например, импорт закладок): дубликаты не прерывают импорт."""
+        result = await self.repository.create_many(data, on_conflict=on_conflict, conflict_columns=["link"])
+        logger.info(
+            f"Imported links: {len(result.created)} created, {len(result.updated)} updated, "
+            f"{len(result.skipped)} skipped."
+        )
+        return result
+
+    async def find(
+        self,
+        user: User,
+        request: str,
+        mode: SearchMode = "hybrid",
+        limit: int = 10,
+        depth: Optional[int] = None,
+        weights: Optional[RerankWeights] = None,
+    ) -> list[Link]:
+        filters: LinkDict = {'user_id': user.id}
+        depth = max(depth or self.candidate_depth, limit)
+        weights = weights or self.rerank_weights
+        if mode == "semantic":
+            with self._stage("embed"):
+                request_embed = await self.embed_service.embed(request)
+            links = await self._semantic_find(request_embed, limit, depth, weights, filters)
+        else:
+            links = await self._hybrid_find(request, mode, limit, depth, weights, filters)
 
-        links = db_links
         if len(links) == 0:
             raise NotFoundError('Не найдено ссылок по вашему запросу.')
 
         return links
 
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.search_stats.observe(name, (time.perf_counter() - started) * 1000)
+
+    async def _semantic_find(
+        self,
+        embedding: VectorLike,
+        limit: int,
+        depth: int,
+        weights: RerankWeights,
+        filters: LinkDict,
+    ) -> list[Link]:
+        """
+        Двухэтапный семантический поиск: дешёвые ANN-кандидаты с большим k (HNSW по float16-копии вектора
+        либо in-process индекс), затем точный rerank по полным float32 векторам в NumPy с бустами.
+        """
+        with self._stage("ann"):
+            candidates = await self.repository.list_by_embedding(
+                embedding, limit=depth, filters=filters, fields=_RERANK_FIELDS
+            )
+        with self._stage("rerank"):
+            return rerank_by_similarity(embedding, candidates, limit, weights)
+
+    async def _hybrid_find(
+        self,
+        request: str,
+        mode: SearchMode,
+        limit: int,
+        depth: int,
+        weights: RerankWeights,
+        filters: LinkDict,
+    ) -> list[Link]:
+        """
+        Полнотекстовый + триграммный + векторный поиск, слитые через RRF.
+        Эмбеддинг считается параллельно с лексическими запросами; если провайдер не ответил за embed_timeout
+        или упал — отвечаем только лексическими результатами. Короткие запросы (домен, одно слово)
+        с лексическими совпадениями вообще не ждут эмбеддинг.
+        """
+        fusion_depth = max(limit * 3, 20)
+        started = time.perf_counter()
+        embed_task = asyncio.create_task(self.embed_service.embed(request)) if mode == "hybrid" else None
+        try:
+            with self._stage("lexical"):
+                rankings = [
+                    await self.repository.list_by_fulltext(request, limit=fusion_depth, filters=filters),
+                    await self.repository.list_by_trigram(request, limit=fusion_depth, filters=filters),
+                ]
+            is_short = len(request.split()) <= self.lexical_only_max_words
+            if embed_task is not None and not (is_short and any(rankings)):
+                try:
+                    timeout = max(self.embed_timeout - (time.perf_counter() - started), 0)
+                    with self._stage("embed"):
+                        request_embed = await asyncio.wait_for(embed_task, timeout=timeout)
+                except Exception as ex:
+                    logger.warning(f"Embedding is unavailable, falling back to lexical search: {ex!r}")
+                else:
+                    semantic = await self._semantic_find(
+                        request_embed, fusion_depth, max(depth, fusion_depth), weights, filters
+                    )
+                    rankings.append(semantic)
+        finally:
+            if embed_task is not None and not embed_task.done():
+                embed_task.cancel()
+
+        return reciprocal_rank_fusion(rankings, key=lambda link: link.id)[:limit]
+
     async def update(self, user: User, id: int, data: LinkDict) -> Link:
         updated_recors = await self.repository.update(data=data, filters={"id": id, "user_id": user.id})
-        if updated_recors == 0:
+        if not updated_recors:
             raise NotFoundError
         return updated_recors[0]
 
@@ -40,5 +164,5 @@ class LinkService(ILinkService):
         deleted_count = await self.repository.delete(filters={'user_id': user.id, 'id': id})
         return bool(deleted_count)
 
-    async def read(self, filters: LinkDict) -> Link:
-        return await self.repository.read(filters=filters)
+    async def read(self, filters: LinkDict, fields: Optional[list[LinkFields]] = None) -> Link:
+        return await self.repository.read(filters=filters, fields=fields)
@@ -1,27 +1,58 @@
-from typing import Annotated
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncIterator
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
 from domain.interfaces import (
+    IAgent,
+    IAgentRegistry,
+    IConversationRepoProtocol,
+    IConversationStore,
+    IEmbeddingCache,
+    IEmbeddingCacheRepoProtocol,
     IEmbeddingClient,
     IEmbeddingService,
+    IHistoryCompactor,
     ILinkRepoProtocol,
     ILinkService,
     IUserRepoProtocol,
     IUserService,
+    IVectorIndex,
 )
-from domain.models import Link, User
-from domain.services import EmbeddingService, LinkService, UserService
-from infrastructure.clients import OpenAIEmbeddingClient
-from infrastructure.db.db import get_db
-from infrastructure.db.models import LinkORM, UserORM
-from infrastructure.repositories import LinkRepo, UserRepo
+from domain.models import (
+    AgentCacheStats,
+    ConversationEntry,
+    ConversationStoreStats,
+    ConversationSummaryStats,
+    EmbeddingCacheEntry,
+    EmbeddingCacheStats,
+    Link,
+    RerankWeights,
+    SearchStats,
+    User,
+)
+from domain.services import ConversationStore, EmbeddingService, HistoryCompactor, LinkService, UserService
+from infrastructure.agents import (
+    MUTATING_TOOLS,
+    AgentRegistry,
+    CachedAgent,
+    LLMConversationSummarizer,
+    ToolsCallingModel,
+    add_link_agent_factory,
+)
+from infrastructure.clients import MicroBatchingEmbeddingClient, OpenAIClientRegistry
+from infrastructure.db.db import get_db, sessionmanager
+from infrastructure.db.models import ConversationMessageORM, EmbeddingCacheORM, LinkORM, UserORM
+from infrastructure.embedding_cache import LRUEmbeddingCache
+from infrastructure.repositories import ConversationRepo, EmbeddingCacheRepo, LinkRepo, UserRepo
+from infrastructure.vector_index import NumpyVectorIndex
 from utils.crypto_hash import AbstractCrypto, Argon2Crypto
 
 from .injector import Depends
 
 
+# Argon2Crypto без состояния запроса: создаётся один раз на процесс (Depends(..., scope='app'))
 def crypto_hash_factory() -> AbstractCrypto:
     return Argon2Crypto()
 
@@ -33,24 +64,213 @@ def user_repo_factory(
     return UserRepo(db, domain_model=User, orm_class=UserORM)
 
 
-def get_user_service(repo: Annotated[IUserRepoProtocol, Depends(user_repo_factory)]) -> IUserService:
-    return UserService(repository=repo, crypto_hash=crypto_hash_factory())
+def get_user_service(
+    repo: Annotated[IUserRepoProtocol, Depends(user_repo_factory)],
+    crypto_hash: Annotated[AbstractCrypto, Depends(crypto_hash_factory, scope='app')],
+) -> IUserService:
+    return UserService(repository=repo, crypto_hash=crypto_hash)
 
 
 # ****** Link dependencies ******
+def _use_numpy_vector_index() -> bool:
+    if settings.VECTOR_INDEX_BACKEND == "auto":
+        return not settings.DATABASE_URL.startswith("postgresql")
+    return settings.VECTOR_INDEX_BACKEND == "numpy"
+
+
+# In-process индекс векторов общий на весь процесс; None — поиск через pgvector
+link_vector_index: IVectorIndex | None = (
+    NumpyVectorIndex(
+        dim=LinkORM.__table__.c.vector.type.dim,
+        nlist=settings.VECTOR_INDEX_NLIST,
+        nprobe=settings.VECTOR_INDEX_NPROBE,
+    )
+    if _use_numpy_vector_index()
+    else None
+)
+
+
 def link_repo_factory(
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> ILinkRepoProtocol:
-    return LinkRepo(db, domain_model=Link, orm_class=LinkORM)
+    return LinkRepo(db, domain_model=Link, orm_class=LinkORM, vector_index=link_vector_index)
+
+
+# ****** OpenAI dependencies ******
+# Клиенты OpenAI и их пул соединений живут всё время работы приложения, закрываются app_scope.aclose()
+# после всех app-зависимостей, которые ими пользуются
+async def openai_registry_factory() -> AsyncIterator[OpenAIClientRegistry]:
+    registry = OpenAIClientRegistry(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_BASE_URL,
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+        timeout=settings.OPENAI_TIMEOUT,
+        http2=settings.OPENAI_HTTP2,
+    )
+    try:
+        yield registry
+    finally:
+        await registry.aclose()
+
+
+OpenAIRegistry = Annotated[OpenAIClientRegistry, Depends(openai_registry_factory, scope='app')]
+
+
+# ****** Embedding dependencies ******
+# Первый уровень кэша и счётчики попаданий общие на процесс
+embedding_memory_cache: IEmbeddingCache = LRUEmbeddingCache(
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES,
+    ttl=settings.EMBEDDING_CACHE_TTL,
+)
+embedding_cache_stats = EmbeddingCacheStats()
+
+
+# Один клиент на процесс: конкурентные embed() от всех ботов склеиваются в батч-запросы.
+# При остановке накопленные тексты дописываются до закрытия клиента OpenAI
+async def embedding_client_factory(openai_registry: OpenAIRegistry) -> AsyncIterator[IEmbeddingClient]:
+    client = MicroBatchingEmbeddingClient(
+        openai_registry.embedding_client(settings.EMBEDDING_MODEL, dimensions=settings.EMBEDDING_DIMENSIONS),
+        max_batch=settings.EMBEDDING_BATCH_MAX_SIZE,
+        max_delay=settings.EMBEDDING_BATCH_MAX_DELAY,
+        max_concurrency=settings.EMBEDDING_BATCH_MAX_CONCURRENCY,
+    )
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
+
+# ****** Agents ******
+# Попадания, промахи и сэкономленное время кэша ответов агентов, общие на процесс
+agent_cache_stats = AgentCacheStats()
+
 
+def cached_agent(agent: IAgent, embedding_client: IEmbeddingClient) -> IAgent:
+    """Кэш ответов перед агентом (AGENT_CACHE_*)."""
+    if not settings.AGENT_CACHE_ENABLED:
+        return agent
+    return CachedAgent(
+        agent,
+        embedding_client=embedding_client if settings.AGENT_CACHE_SIMILARITY_THRESHOLD is not None else None,
+        similarity_threshold=settings.AGENT_CACHE_SIMILARITY_THRESHOLD or 1.0,
+        ttl=settings.AGENT_CACHE_TTL,
+        max_entries_per_user=settings.AGENT_CACHE_MAX_ENTRIES_PER_USER,
+        max_users=settings.AGENT_CACHE_MAX_USERS,
+        mutating_tools=MUTATING_TOOLS,
+        stats=agent_cache_stats,
+    )
 
-def embedding_client_factory() -> IEmbeddingClient:
-    return OpenAIEmbeddingClient(api_key=settings.OPENAI_API_KEY)
+
+# Графы LangGraph компилируются один раз на процесс: при старте (warm_up в main) или при первом сообщении
+def agent_registry_factory(
+    openai_registry: OpenAIRegistry,
+    embedding_client: Annotated[IEmbeddingClient, Depends(embedding_client_factory, scope='app')],
+) -> IAgentRegistry:
+    registry = AgentRegistry()
+    registry.register(
+        'add_link',
+        lambda: cached_agent(
+            add_link_agent_factory(llm=openai_registry.chat_model(ToolsCallingModel.GPT4oMini.value)),
+            embedding_client,
+        ),
+    )
+    return registry
+
+
+def get_add_link_agent(
+    registry: Annotated[IAgentRegistry, Depends(agent_registry_factory, scope='app')],
+) -> IAgent:
+    return registry.get('add_link')
+
+
+# Своя короткая сессия на каждое обращение к кэшу, вне сессии сообщения: LinkService эмбеддит запрос
+# параллельно с лексическим поиском (одну AsyncSession нельзя использовать из двух корутин), а после
+# попадания в LRU к таблице вообще не нужно идти — соединение из пула берётся только на промахе
+@asynccontextmanager
+async def embedding_cache_repo_scope() -> AsyncIterator[IEmbeddingCacheRepoProtocol[EmbeddingCacheEntry]]:
+    async with sessionmanager.session() as session:
+        yield EmbeddingCacheRepo(session, domain_model=EmbeddingCacheEntry, orm_class=EmbeddingCacheORM)
+
+
+# Сервис без состояния запроса: создаётся один раз на процесс (Depends(..., scope='app'))
+def get_embedding_service(
+    embedding_client: Annotated[IEmbeddingClient, Depends(embedding_client_factory, scope='app')],
+) -> IEmbeddingService:
+    return EmbeddingService(
+        client=embedding_client,
+        memory_cache=embedding_memory_cache,
+        repo_scope=embedding_cache_repo_scope if settings.EMBEDDING_CACHE_PERSISTENT else None,
+        stats=embedding_cache_stats,
+    )
+
+
+# Латентность этапов поиска ссылок (lexical / embed / ann / rerank), общая на процесс
+link_search_stats = SearchStats()
 
 
 def get_link_service(
     repo: Annotated[ILinkRepoProtocol, Depends(link_repo_factory)],
-    embedding_client: Annotated[IEmbeddingService, Depends(embedding_client_factory)],
+    embed_service: Annotated[IEmbeddingService, Depends(get_embedding_service, scope='app')],
 ) -> ILinkService:
-    return LinkService(repository=repo, embed_service=EmbeddingService(client=embedding_client))
+    return LinkService(
+        repository=repo,
+        embed_service=embed_service,
+        embed_timeout=settings.SEARCH_EMBED_TIMEOUT,
+        candidate_depth=settings.SEARCH_CANDIDATE_DEPTH,
+        rerank_weights=RerankWeights(
+            pull_count_weight=settings.SEARCH_PULL_COUNT_WEIGHT,
+            recency_weight=settings.SEARCH_RECENCY_WEIGHT,
+            recency_half_life_days=settings.SEARCH_RECENCY_HALF_LIFE_DAYS,
+        ),
+        search_stats=link_search_stats,
+    )
+
+
+# ****** Conversation memory ******
+@asynccontextmanager
+async def conversation_repo_scope() -> AsyncIterator[IConversationRepoProtocol[ConversationEntry]]:
+    # своя сессия: хранилище пишет пачками вне dispatch конкретного сообщения
+    async with sessionmanager.session() as session:
+        yield ConversationRepo(session, domain_model=ConversationEntry, orm_class=ConversationMessageORM)
+
+
+# История диалогов общая на процесс; несохранённые реплики дописываются при app_scope.aclose()
+conversation_store_stats = ConversationStoreStats()
+
+
+async def get_conversation_store() -> AsyncIterator[IConversationStore]:
+    store = ConversationStore(
+        conversation_repo_scope,
+        ring_size=settings.CONVERSATION_RING_SIZE,
+        max_chats=settings.CONVERSATION_MAX_CHATS,
+        flush_batch=settings.CONVERSATION_FLUSH_BATCH,
+        flush_interval=settings.CONVERSATION_FLUSH_INTERVAL,
+        stats=conversation_store_stats,
+    )
+    try:
+        yield store
+    finally:
+        await store.flush()
+
+
+# Сводки длинных диалогов пересчитываются в фоне; фоновые задачи отменяются при app_scope.aclose()
+# до закрытия клиентов OpenAI, которыми они пользуются
+conversation_summary_stats = ConversationSummaryStats()
+
 
+async def get_history_compactor(openai_registry: OpenAIRegistry) -> AsyncIterator[IHistoryCompactor]:
+    compactor = HistoryCompactor(
+        LLMConversationSummarizer(openai_registry.chat_model(ToolsCallingModel.GPT4oMini.value)),
+        max_tokens=settings.CONVERSATION_HISTORY_TOKENS,
+        summary_tokens=settings.CONVERSATION_SUMMARY_TOKENS,
+        keep_recent_tokens=settings.CONVERSATION_SUMMARY_KEEP_TOKENS,
+        max_chats=settings.CONVERSATION_MAX_CHATS,
+        stats=conversation_summary_stats,
+    )
+    try:
+        yield compactor
+    finally:
+        await compactor.aclose()
@@ -1,79 +1,171 @@
 import logging
-from typing import List, Tuple
+from dataclasses import dataclass
+from typing import Hashable, List, Optional, Tuple
 
 from domain.exceptions import MessageRouterException
 from domain.interfaces.message_router_iface import FilterFn, Handler, IMessageRouter
 from domain.models.message import Message
 
-from .injector import service_injector
+from .filters import Command, MessageFilter, normalize_command
+from .injector import dispatch_scope, service_injector
 
 logger = logging.getLogger(__name__)
 
 
+def _always(_: Message) -> bool:
+    return True
+
+
+@dataclass(frozen=True, slots=True)
+class _CompiledRoute:
+    filter_fn: Optional[FilterFn]  # None — фильтр уже выполнен (catch-all или совпадение по индексу команд)
+    key: Hashable
+    handler: Handler
+
+    def matches(self, dm: Message, memo: dict[Hashable, bool]) -> bool:
+        if self.filter_fn is None:
+            return True
+        result = memo.get(self.key)
+        if result is None:
+            result = memo[self.key] = bool(self.filter_fn(dm))
+        return result
+
+
+@dataclass(frozen=True, slots=True)
+class _DispatchTable:
+    generation: int
+    middlewares: tuple[_CompiledRoute, ...]
+    # маршруты, которые нужно проверять для любого текста, в порядке регистрации
+    routes: tuple[_CompiledRoute, ...]
+    # нормализованный текст команды -> routes + маршруты этой команды, в порядке регистрации
+    by_command: dict[str, tuple[_CompiledRoute, ...]]
+
+    def candidates(self, dm: Message) -> tuple[_CompiledRoute, ...]:
+        if not self.by_command:
+            return self.routes
+        return self.by_command.get(normalize_command(dm.text), self.routes)
+
+
 class DomainMessageRouter(IMessageRouter):
+    # растёт при любой регистрации маршрута в любом роутере: скомпилированные таблицы сверяются с ним
+    _generation = 0
+
     def __init__(self) -> None:
         self._routes: List[Tuple[FilterFn, Handler]] = []
         self._routers: List['IMessageRouter'] = []
         self._middlewares: List['IMessageRouter'] = []
+        self._table: Optional[_DispatchTable] = None
         logger.debug('Init domain message router.')
 
+    @classmethod
+    def _changed(cls) -> None:
+        DomainMessageRouter._generation += 1
+
     def include_router(self, router: 'IMessageRouter') -> None:
         self._routers.append(router)
+        self._changed()
 
     def include_middleware(self, router: 'IMessageRouter') -> None:
         self._middlewares.append(router)
+        self._changed()
 
-    def message(self, filter_fn: FilterFn = lambda _: True):
+    def message(self, filter_fn: FilterFn = _always):
         """
         Декоратор: @domain_router.message(lambda m: m.text == "/start")
+        Для частых фильтров лучше Command("/start") и Regex(...) из filters — их роутер индексирует и кэширует.
         """
         def decorator(fn: Handler) -> Handler:
             wrapped = service_injector(fn)
             self._routes.append((filter_fn, wrapped))
+            self._changed()
             return wrapped
         return decorator
 
+    def _flatten(self) -> List[Tuple[FilterFn, Handler]]:
+        """Собственные маршруты, затем маршруты вложенных роутеров (рекурсивно) — порядок обхода dispatch."""
+        routes = list(self._routes)
+        for router in self._routers:
+            if isinstance(router, DomainMessageRouter):
+                routes.extend(router._flatten())
+            else:
+                routes.extend(router._routes)
+        return routes
+
+    @staticmethod
+    def _compile_route(filter_fn: FilterFn, handler: Handler) -> _CompiledRoute:
+        if filter_fn is _always:
+            return _CompiledRoute(None, None, handler)
+        key = filter_fn.key if isinstance(filter_fn, MessageFilter) else filter_fn
+        return _CompiledRoute(filter_fn, key, handler)
+
+    def compile(self) -> None:
+        """
+        Сплющивает дерево роутеров в одну упорядоченную таблицу.
+        Маршруты с Command раскладываются по индексу точных совпадений: для текста-команды
+        остальные Command-маршруты не проверяются вовсе, а для прочего текста — не проверяются никакие.
+        """
+        middlewares = tuple(
+            self._compile_route(filter_fn, handler)
+            for router in self._middlewares
+            for filter_fn, handler in router._routes
+        )
+
+        routes: list[_CompiledRoute] = []
+        commands: dict[str, list[tuple[int, _CompiledRoute]]] = {}
+        generic: list[tuple[int, _CompiledRoute]] = []
+        for position, (filter_fn, handler) in enumerate(self._flatten()):
+            if isinstance(filter_fn, Command):
+                for command in filter_fn.commands:
+                    commands.setdefault(command, []).append((position, _CompiledRoute(None, None, handler)))
+            else:
+                route = self._compile_route(filter_fn, handler)
+                generic.append((position, route))
+                routes.append(route)
+
+        by_command = {
+            command: tuple(route for _, route in sorted(command_routes + generic, key=lambda item: item[0]))
+            for command, command_routes in commands.items()
+        }
+        self._table = _DispatchTable(self._generation, middlewares, tuple(routes), by_command)
+        logger.debug(f'Compiled dispatch table: {len(middlewares)} middlewares, {len(routes)} routes, '
+                     f'{len(by_command)} commands.')
+
     async def dispatch(self, dm: Message) -> None:
         """
-        Пробегаемся по всем зарегистрированным маршрутам
-        и вызываем те, чей фильтр вернул True.
+        Пробегаемся по скомпилированной таблице маршрутов: middlewares вызываются все, чей фильтр вернул True;
+        из остальных маршрутов — первый подходящий (MessageRouterException передаёт сообщение следующему).
+        Результат каждого фильтра считается не больше одного раза на сообщение,
+        каждая кэшируемая зависимость (Depends) разрешается не больше одного раза на сообщение.
         """
-        try:
-            # handle middlewares
-            for router in self._middlewares:
-                for filter_fn, handler in router._routes:
-                    if filter_fn(dm):
-                        logger.debug(f'Handle message: {dm}')
-                        await handler(dm)
-
-            # handle self routes
-            for filter_fn, handler in self._routes:
-                if filter_fn(dm):
-                    try:
-                        logger.debug(f'Handle message: {dm}')
-                        await handler(dm)
-                        return
-                    except MessageRouterException as ex:
-                        logger.info(ex)
-                        pass
-
-            # handle include routers
-            for router in self._routers:
-                for filter_fn, handler in router._routes:
-                    if filter_fn(dm):
+        if self._table is None or self._table.generation != self._generation:
+            self.compile()
+        table = self._table
+        assert table is not None
+        memo: dict[Hashable, bool] = {}
+        # одна область зависимостей на сообщение: middlewares и хендлеры делят сессию БД и сервисы
+        async with dispatch_scope():
+            try:
+                # handle middlewares
+                for route in table.middlewares:
+                    if route.matches(dm, memo):
+                        logger.debug('Handle message: %s', dm)
+                        await route.handler(dm)
+
+                # handle routes
+                for route in table.candidates(dm):
+                    if route.matches(dm, memo):
                         try:
-                            logger.debug(f'Handle message: {dm}')
-                            await handler(dm)
+                            logger.debug('Handle message: %s', dm)
+                            await route.handler(dm)
                             return
                         except MessageRouterException as ex:
                             logger.info(ex)
                             pass
 
-        except MessageRouterException as ex:
-            logger.warning(ex)
-            pass
-        except Exception as ex:
-            logger.error(ex)
-            await dm.answer(Message(text='Непредвиденная ошибка'))
-            raise
-
+            except MessageRouterException as ex:
+                logger.warning(ex)
+                pass
+            except Exception as ex:
+                logger.error(ex)
+                await dm.answer(Message(text='Непредвиденная ошибка'))
+                raise
@@ -0,0 +1,53 @@
+import re
+from abc import ABC, abstractmethod
+from functools import cache
+from typing import Hashable
+
+from domain.models.message import Message
+
+
+@cache
+def _compile(pattern: str, flags: int) -> re.Pattern[str]:
+    return re.compile(pattern, flags)
+
+
+def normalize_command(text: str) -> str:
+    return text.strip().lower()
+
+
+class MessageFilter(ABC):
+    """
+    Декларативный фильтр маршрута. В отличие от произвольной лямбды, роутер знает его ключ:
+    одинаковые фильтры считаются один раз на сообщение, а Command попадают в индекс точных совпадений.
+    Объект вызываемый, поэтому подходит везде, где ожидается FilterFn.
+    """
+    key: Hashable
+
+    @abstractmethod
+    def check(self, msg: Message) -> bool:
+        ...
+
+    def __call__(self, msg: Message) -> bool:
+        return self.check(msg)
+
+
+class Regex(MessageFilter):
+    """re.search по тексту сообщения; паттерн компилируется один раз на процесс."""
+
+    def __init__(self, pattern: str, flags: int = 0) -> None:
+        self.regex = _compile(pattern, flags)
+        self.key = ("regex", pattern, flags)
+
+    def check(self, msg: Message) -> bool:
+        return self.regex.search(msg.text) is not None
+
+
+class Command(MessageFilter):
+    """Точное совпадение текста (без учёта регистра и крайних пробелов) с одной из команд."""
+
+    def __init__(self, *commands: str) -> None:
+        self.commands = frozenset(normalize_command(command) for command in commands)
+        self.key = ("command", self.commands)
+
+    def check(self, msg: Message) -> bool:
+        return normalize_command(msg.text) in self.commands
@@ -2,38 +2,256 @@
 import asyncio
 import inspect
 import logging
-from contextlib import contextmanager
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import Enum
 from functools import wraps
-from typing import Annotated, get_args, get_origin
+from typing import Annotated, Any, AsyncIterator, Callable, Literal, NamedTuple, Optional, get_args, get_origin
 
 logger = logging.getLogger(__name__)
 
+# app — один экземпляр на процесс, финализируется в main.lifespan;
+# dispatch — один экземпляр на обработку сообщения;
+# transient — новый экземпляр при каждом упоминании
+DependencyScopeName = Literal['app', 'dispatch', 'transient']
+
+
 class Depends:
-    def __init__(self, dependency):
+    def __init__(self, dependency, use_cache: bool = True, scope: DependencyScopeName = 'dispatch'):
         self.dependency = dependency
+        # use_cache=False — синоним scope='transient', как в FastAPI
+        self.scope: DependencyScopeName = scope if use_cache else 'transient'
+
+    @property
+    def use_cache(self) -> bool:
+        return self.scope != 'transient'
+
+
+class ProviderKind(Enum):
+    SYNC_GEN = 'sync_gen'
+    ASYNC_GEN = 'async_gen'
+    COROUTINE = 'coroutine'
+    PLAIN = 'plain'
+
+
+class _Step(NamedTuple):
+    provider: Callable[..., Any]
+    kind: ProviderKind
+    # имя параметра провайдера -> индекс шага, чьё значение в него подставляется
+    args: tuple[tuple[str, int], ...]
+    scope: DependencyScopeName
+    # для генераторов — provider, обёрнутый в (async)contextmanager заранее, при построении плана
+    context: Optional[Callable[..., Any]]
 
 
-def generator_context(func):
+class _Target(NamedTuple):
+    name: str
+    step: int
+
+
+class InjectionPlan(NamedTuple):
+    """Плоский топологически упорядоченный план разрешения зависимостей хендлера."""
+    steps: tuple[_Step, ...]
+    targets: tuple[_Target, ...]
+    positional: tuple[str, ...]
+    signature: inspect.Signature
+
+
+class DependencyScope:
     """
-    Преобразует синхронный generator-функцию в contextmanager,
-    чтобы поддерживать зависимость через yield.
+    Значения зависимостей, разрешённых в области (процесс или один dispatch),
+    и контексты генераторов, которые нужно закрыть в её конце.
+    Middlewares и хендлеры одного сообщения получают одну и ту же сессию БД, сервисы и т.д.
     """
-    @contextmanager
-    def wrapper(*args, **kwargs):
-        gen = func(*args, **kwargs)
-        try:
-            value = next(gen)
-        except StopIteration:
-            raise RuntimeError("Генератор ничего не yield'ит")
-        try:
-            yield value
-        finally:
-            try:
-                next(gen)
-            except StopIteration:
-                pass
 
-    return wrapper
+    def __init__(self) -> None:
+        self.values: dict[Callable[..., Any], Any] = {}
+        self._stack = AsyncExitStack()
+        self._locks: dict[Callable[..., Any], asyncio.Lock] = {}
+
+    async def enter_async_context(self, cm) -> Any:
+        return await self._stack.enter_async_context(cm)
+
+    def enter_context(self, cm) -> Any:
+        return self._stack.enter_context(cm)
+
+    def lock(self, provider: Callable[..., Any]) -> asyncio.Lock:
+        """Не даёт конкурентным сообщениям создать app-зависимость дважды."""
+        lock = self._locks.get(provider)
+        if lock is None:
+            lock = self._locks[provider] = asyncio.Lock()
+        return lock
+
+    async def aclose(self, exc: Optional[BaseException] = None) -> None:
+        """
+        Закрывает контексты в обратном порядке, даже если какой-то из них упал при закрытии.
+        Ошибка обработки (в том числе CancelledError) пробрасывается в генераторы через athrow/throw:
+        get_db делает rollback и возвращает соединение в пул. Подавить её генератор не может.
+        """
+        stack, self._stack = self._stack, AsyncExitStack()
+        self.values.clear()
+        self._locks.clear()
+        if exc is None:
+            await stack.aclose()
+            return
+        teardown = stack.__aexit__(type(exc), exc, exc.__traceback__)
+        if isinstance(exc, asyncio.CancelledError):
+            # задачу уже отменяют: повторная отмена не должна оборвать закрытие сессий на полпути
+            await asyncio.shield(teardown)
+        else:
+            await teardown
+
+
+# Зависимости со scope='app'; закрывается вызовом app_scope.aclose() при остановке приложения
+app_scope = DependencyScope()
+
+_current_scope: ContextVar[Optional[DependencyScope]] = ContextVar('dispatch_scope', default=None)
+
+
+@asynccontextmanager
+async def dispatch_scope() -> AsyncIterator[DependencyScope]:
+    """Кэш зависимостей на время обработки одного сообщения (аналог use_cache в FastAPI)."""
+    scope = DependencyScope()
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    except BaseException as ex:
+        await scope.aclose(ex)
+        raise
+    else:
+        await scope.aclose()
+    finally:
+        _current_scope.reset(token)
+
+
+def _dependency_marker(param: inspect.Parameter) -> Optional[Depends]:
+    """Ищет Depends в default или в метаданных Annotated."""
+    if isinstance(param.default, Depends):
+        return param.default
+    if get_origin(param.annotation) is Annotated:
+        for meta in get_args(param.annotation)[1:]:
+            if isinstance(meta, Depends):
+                return meta
+    return None
+
+
+def _provider_kind(dep_func) -> ProviderKind:
+    if inspect.isgeneratorfunction(dep_func):
+        return ProviderKind.SYNC_GEN
+    if inspect.isasyncgenfunction(dep_func):
+        return ProviderKind.ASYNC_GEN
+    if inspect.iscoroutinefunction(dep_func):
+        return ProviderKind.COROUTINE
+    return ProviderKind.PLAIN
+
+
+_CONTEXT_WRAPPERS: dict[ProviderKind, Callable[..., Any]] = {
+    ProviderKind.SYNC_GEN: contextmanager,
+    ProviderKind.ASYNC_GEN: asynccontextmanager,
+}
+
+
+def _plan_dependency(
+    dep: Depends,
+    steps: list[_Step],
+    cached: dict[Callable[..., Any], int],
+    resolving: tuple = (),
+) -> int:
+    """
+    Добавляет в steps вложенные зависимости, затем саму зависимость; возвращает индекс её шага.
+    Кэшируемая зависимость, уже встречавшаяся в графе хендлера, получает тот же шаг.
+    """
+    dep_func = dep.dependency
+    if dep_func in resolving:
+        raise RuntimeError(f'Циклическая зависимость: {dep_func!r}')
+    if dep.use_cache and dep_func in cached:
+        step = steps[cached[dep_func]]
+        if step.scope != dep.scope:
+            raise RuntimeError(f'Зависимость {dep_func!r} объявлена со scope {step.scope!r} и {dep.scope!r}')
+        return cached[dep_func]
+    args = []
+    for pname, pparam in inspect.signature(dep_func).parameters.items():
+        dep_marker = _dependency_marker(pparam)
+        if dep_marker is None:
+            continue
+        arg = _plan_dependency(dep_marker, steps, cached, resolving + (dep_func,))
+        if dep.scope == 'app' and steps[arg].scope != 'app':
+            # иначе app-зависимость навсегда захватит, например, сессию первого сообщения
+            raise RuntimeError(
+                f'App-зависимость {dep_func!r} не может зависеть от {steps[arg].scope}-зависимости '
+                f'{steps[arg].provider!r}'
+            )
+        args.append((pname, arg))
+    kind = _provider_kind(dep_func)
+    context = _CONTEXT_WRAPPERS.get(kind)
+    steps.append(_Step(dep_func, kind, tuple(args), dep.scope, context(dep_func) if context else None))
+    index = len(steps) - 1
+    if dep.use_cache:
+        cached[dep_func] = index
+    return index
+
+
+def build_injection_plan(func) -> InjectionPlan:
+    """
+    Разбирает сигнатуры хендлера и всех вложенных зависимостей один раз — при декорировании.
+    Кэшируемая зависимость разрешается в плане один раз, сколько бы раз она ни встречалась в графе.
+    """
+    sig = inspect.signature(func)
+    steps: list[_Step] = []
+    cached: dict[Callable[..., Any], int] = {}
+    targets = []
+    for name, param in sig.parameters.items():
+        dep_marker = _dependency_marker(param)
+        if dep_marker is None:
+            continue
+        targets.append(_Target(name, _plan_dependency(dep_marker, steps, cached)))
+    positional = tuple(
+        name for name, param in sig.parameters.items()
+        if param.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+    )
+    return InjectionPlan(tuple(steps), tuple(targets), positional, sig)
+
+
+def _store(step: _Step, scope: DependencyScope) -> Optional[DependencyScope]:
+    """Область, в которой кэшируется значение шага; None — transient."""
+    if step.scope == 'app':
+        return app_scope
+    if step.scope == 'dispatch':
+        return scope
+    return None
+
+
+async def _run_step(step: _Step, values: list[Any], scope: DependencyScope) -> Any:
+    store = _store(step, scope)
+    if store is None:
+        # генераторы transient-зависимостей закрываются вместе с dispatch
+        return await _create(step, values, scope)
+    if step.provider in store.values:
+        return store.values[step.provider]
+    if store is app_scope:
+        async with app_scope.lock(step.provider):
+            if step.provider not in app_scope.values:
+                app_scope.values[step.provider] = await _create(step, values, app_scope)
+            return app_scope.values[step.provider]
+    value = store.values[step.provider] = await _create(step, values, store)
+    return value
+
+
+async def _create(step: _Step, values: list[Any], scope: DependencyScope) -> Any:
+    dep_kwargs = {pname: values[arg] for pname, arg in step.args}
+    if step.kind is ProviderKind.SYNC_GEN:
+        assert step.context is not None
+        value = scope.enter_context(step.context(**dep_kwargs))
+    elif step.kind is ProviderKind.ASYNC_GEN:
+        assert step.context is not None
+        value = await scope.enter_async_context(step.context(**dep_kwargs))
+    elif step.kind is ProviderKind.COROUTINE:
+        value = await step.provider(**dep_kwargs)
+    else:
+        value = step.provider(**dep_kwargs)
+        if asyncio.iscoroutine(value):
+            value = await value
+    return value
 
 
 def service_injector(func):
@@ -42,88 +260,73 @@ def service_injector(func):
     - Рекурсивно разрешает и впрыскивает зависимости из sync- и async-генераторов,
       а также обычных функций и корутин с аннотациями Depends.
     - Автоматически вызывает __enter__/__exit__, __anext__ для контекстов.
+    Граф зависимостей разбирается один раз (build_injection_plan), на сообщение только исполняется план.
+    Внутри dispatch_scope() значения зависимостей общие для всех хендлеров сообщения,
+    а генераторы закрываются в конце dispatch; вне его — в конце вызова хендлера.
+    Зависимости со scope='app' создаются один раз на процесс и закрываются через app_scope.aclose().
     """
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        sync_ctxs = []       # для sync context managers
-        async_gens = []      # для async generators
-
-        async def resolve_dep(dep_func):
-            # 1) Синхронный generator -> contextmanager
-            if inspect.isgeneratorfunction(dep_func):
-                cm = generator_context(dep_func)()
-                val = cm.__enter__()
-                sync_ctxs.append(cm)
-                return val
-
-            # 2) Асинхронный generator
-            if inspect.isasyncgenfunction(dep_func):
-                agen = dep_func()
-                val = await agen.__anext__()
-                async_gens.append(agen)
-                return val
-
-            # 3) Обычная функция или coroutine, возможно с вложенными Depends
-            sig_dep = inspect.signature(dep_func)
-            bound_dep = sig_dep.bind_partial()
-            kwargs_dep = {}
-            for pname, pparam in sig_dep.parameters.items():
-                # ищем Depends в default или Annotated
-                dep_marker = pparam.default if isinstance(pparam.default, Depends) else None
-                if dep_marker is None:
-                    pann = pparam.annotation
-                    if get_origin(pann) is Annotated:
-                        for meta in get_args(pann)[1:]:
-                            if isinstance(meta, Depends):
-                                dep_marker = meta
-                                break
-                if dep_marker is None:
-                    continue
-                # рекурсивно резолвим вложенную зависимость
-                kwargs_dep[pname] = await resolve_dep(dep_marker.dependency)
-
-            result = dep_func(**kwargs_dep)
-            if asyncio.iscoroutine(result):
-                result = await result
-            return result
-
-        # Основное разрешение параметров целевой функции
-        sig = inspect.signature(func)
-        bound = sig.bind_partial(*args, **kwargs)
-        injections = dict(bound.arguments)
-
-        for name, param in sig.parameters.items():
-            if name in injections:
+    plan = build_injection_plan(func)
+    has_var_positional = any(
+        param.kind is inspect.Parameter.VAR_POSITIONAL for param in plan.signature.parameters.values()
+    )
+
+    def bind(args, kwargs) -> dict:
+        if len(args) <= len(plan.positional) and not has_var_positional:
+            injections = dict(zip(plan.positional, args))
+            injections.update(kwargs)
+            return injections
+        return dict(plan.signature.bind_partial(*args, **kwargs).arguments)
+
+    def required_steps(targets: list[_Target], scope: DependencyScope) -> list[int]:
+        """
+        Шаги, которые действительно нужно выполнить: обратный проход по плану от параметров хендлера.
+        Зависимости шага, чьё значение уже есть в кэше dispatch, не выполняются.
+        """
+        required = {target.step for target in targets}
+        for index in range(len(plan.steps) - 1, -1, -1):
+            if index not in required:
                 continue
-            # ищем Depends-маркеры
-            dep_marker = param.default if isinstance(param.default, Depends) else None
-            if dep_marker is None:
-                ann = param.annotation
-                if get_origin(ann) is Annotated:
-                    for meta in get_args(ann)[1:]:
-                        if isinstance(meta, Depends):
-                            dep_marker = meta
-                            break
-            if dep_marker is None:
+            step = plan.steps[index]
+            store = _store(step, scope)
+            if store is not None and step.provider in store.values:
                 continue
-            # разрешаем зависимость
-            injections[name] = await resolve_dep(dep_marker.dependency)
+            required.update(arg for _, arg in step.args)
+        return sorted(required)
+
+    async def call(scope: DependencyScope, injections: dict) -> Any:
+        targets = [target for target in plan.targets if target.name not in injections]
+        values: list[Any] = [None] * len(plan.steps)
+        for index in required_steps(targets, scope):
+            values[index] = await _run_step(plan.steps[index], values, scope)
+        for target in targets:
+            injections[target.name] = values[target.step]
 
         # Вызываем оригинальную функцию с готовыми аргументами
         result = func(**injections)
         if asyncio.iscoroutine(result):
             result = await result
-
-        # Завершаем async-генераторы (до StopAsyncIteration)
-        for agen in reversed(async_gens):
-            try:
-                await agen.__anext__()
-            except StopAsyncIteration:
-                pass
-        # Завершаем sync-контексты
-        for cm in reversed(sync_ctxs):
-            cm.__exit__(None, None, None)
-
         return result
 
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        injections = bind(args, kwargs)
+        scope = _current_scope.get()
+        if scope is not None:
+            return await call(scope, injections)
+        async with dispatch_scope() as scope:
+            return await call(scope, injections)
+
+    wrapper.injection_plan = plan  # type: ignore[attr-defined]
     return wrapper
+
+
+async def resolve_app_dependency(provider: Callable[..., Any]) -> Any:
+    """
+    Значение app-зависимости вне хендлеров (старт приложения, фоновые задачи): тот же экземпляр,
+    что получают хендлеры через Depends(provider, scope='app'), закрывается тем же app_scope.aclose().
+    """
+    @service_injector
+    async def resolve(value: Annotated[Any, Depends(provider, scope='app')]) -> Any:
+        return value
+
+    return await resolve()
@@ -1,10 +1,11 @@
 from typing import Annotated
 
 from domain.exceptions import NotFoundError
+from domain.interfaces import IConversationStore, IHistoryCompactor
 from domain.interfaces.user_ifaces import IUserService
 from domain.models import Message
 
-from .dependencies import get_user_service
+from .dependencies import get_conversation_store, get_history_compactor, get_user_service
 from .domain_router import DomainMessageRouter
 from .injector import Depends
 
@@ -22,3 +23,16 @@ async def auth_middleware(
     except NotFoundError:
         await msg.answer(Message(text='Я тебя не знаю'))
         raise NotFoundError(f'Пользователь с телеграм id {msg.user_id} не найден в базе.')
+
+
+@middleware.message()
+async def conversation_middleware(
+    msg: Message,
+    conversation: Annotated[IConversationStore, Depends(get_conversation_store, scope='app')],
+    compactor: Annotated[IHistoryCompactor, Depends(get_history_compactor, scope='app')],
+):
+    # сводка старой части диалога + свежие реплики в пределах бюджета токенов: их видят хендлеры и агенты
+    if msg.chat_id is not None:
+        history = compactor.compact(msg.chat_id, await conversation.history(msg.chat_id))
+        msg.context = history.recent
+        msg.summary = history.summary
@@ -1,50 +1,59 @@
-import json
-import re
 from typing import Annotated
 
 from domain.exceptions import DoubleFoundError, MessageRouterException
-from domain.interfaces import IAgent, ILinkService
+from domain.interfaces import IAgent, IConversationStore, ILinkService
 from domain.models import Context, Message
 
-from .dependencies import get_add_link_agent, get_link_service
+from .dependencies import get_add_link_agent, get_conversation_store, get_link_service
 from .domain_router import DomainMessageRouter
+from .filters import Command, Regex
 from .injector import Depends
 
 router = DomainMessageRouter()
 
+URL = Regex(r'https?://\S+')
 
-@router.message(lambda m: m.text.lower() in ['status', 'state', 'статус'])
-async def status_router(msg: Message):
+Conversation = Annotated[IConversationStore, Depends(get_conversation_store, scope='app')]
+
+
+async def remember(msg: Message, conversation: IConversationStore, answer: str) -> None:
+    """Добавляет реплику в контекст сообщения и в историю чата."""
+    entry = Context(username=msg.data['user'].username, user_text=msg.text, jarvis_text=answer)
+    msg.context.append(entry)
+    if msg.chat_id is not None:
+        await conversation.append(msg.chat_id, entry)
+
+
+@router.message(Command('status', 'state', 'статус'))
+async def status_router(msg: Message, conversation: Conversation):
     answer = 'Заглушка для статуса'
     await msg.answer(Message(text=answer))
-    msg.context.append(
-        Context(username=msg.data['user'].username, user_text=msg.text, jarvis_text=answer)
-    )
+    await remember(msg, conversation, answer)
 
     raise MessageRouterException
 
 
-@router.message(lambda m: bool(re.compile(r'https?://\S+').search(m.text)))
+@router.message(URL)
 async def add_link_by_agent(
     msg: Message,
-    agent: Annotated[IAgent, Depends(get_add_link_agent)]
+    agent: Annotated[IAgent, Depends(get_add_link_agent, scope='app')],
+    conversation: Conversation,
 ):
     print('add link by agent')
-    response: Message = await agent.invoke(msg)
-    await msg.answer(response)
-    msg.context.append(
-        Context(username=msg.data['user'].username, user_text=msg.text, jarvis_text=response.text)
-    )
+    # ответ показывается по мере генерации, а не после завершения всего графа агента
+    response_text = await msg.answer_stream(agent.stream(msg))
+    await remember(msg, conversation, response_text)
     # raise MessageRouterException
 
 
-@router.message(lambda m: bool(re.compile(r'https?://\S+').search(m.text)))
+@router.message(URL)
 async def add_link_by_algorithm(
     msg: Message,
-    link_service: Annotated[ILinkService, Depends(get_link_service)]
+    link_service: Annotated[ILinkService, Depends(get_link_service)],
+    conversation: Conversation,
 ):
     # Если агент недоступен - добавляем ссылку алгоритмически
-    link_str = re.compile(r'https?://\S+').search(msg.text).group(0)  # type: ignore
+    link_str = URL.regex.search(msg.text).group(0)  # type: ignore
     try:
         await link_service.append({
             'user_id': msg.data['user'].id,
@@ -53,19 +62,14 @@ async def add_link_by_algorithm(
         })
         response = Message(text='Добавил ссылку в базу данных.')
         await msg.answer(response)
-        msg.context.append(
-            Context(username=msg.data['user'].username, user_text=msg.text, jarvis_text=response.text)
-        )
+        await remember(msg, conversation, response.text)
     except DoubleFoundError:
-        link = await link_service.read(filters={'link': link_str})
+        link = await link_service.read(filters={'link': link_str}, fields=['description'])
         answer = f'В БД уже есть такая ссылка. Вот ее описание: {link.description}'
         await msg.answer(Message(text=answer))
-        msg.context.append(
-            Context(username=msg.data['user'].username, user_text=msg.text, jarvis_text=answer)
-        )
+        await remember(msg, conversation, answer)
 
 
 @router.message()
 async def last_router(msg: Message):
     await msg.answer(Message(text='Не нашел, что тебе ответить'))
-    await msg.answer(Message(text=json.dumps([u.model_dump() for u in msg.context], ensure_ascii=False)))
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Hashable, Optional
+
+from domain.models import DispatchQueueStats, Message, OverflowPolicy
+
+logger = logging.getLogger(__name__)
+
+DispatchFn = Callable[[Message], Awaitable[None]]
+
+
+class _ChatQueue:
+    __slots__ = ('items', 'worker', 'space')
+
+    def __init__(self) -> None:
+        # (сообщение, monotonic-время постановки в очередь)
+        self.items: deque[tuple[Message, float]] = deque()
+        self.worker: Optional[asyncio.Task] = None
+        # выставляется воркером, когда в очереди освободилось место (для политики block)
+        self.space = asyncio.Event()
+
+
+class ChatDispatchScheduler:
+    """
+    Планировщик обработки сообщений: своя FIFO-очередь на каждый chat_id.
+
+    Сообщения одного чата обрабатываются строго по очереди, разные чаты — параллельно, но не больше
+    max_concurrency одновременно на процесс. Воркер чата живёт, пока в его очереди есть сообщения,
+    поэтому молчащие чаты ничего не стоят. Очередь чата ограничена max_queue_size, при переполнении
+    действует overflow: reject, drop_oldest или block (обратное давление на приём апдейтов).
+    """
+
+    def __init__(
+        self,
+        dispatch: DispatchFn,
+        max_concurrency: int = 16,
+        max_queue_size: int = 20,
+        overflow: OverflowPolicy = 'reject',
+        stats: Optional[DispatchQueueStats] = None,
+    ) -> None:
+        self.dispatch = dispatch
+        self.max_queue_size = max_queue_size
+        self.overflow = overflow
+        self.stats = stats if stats is not None else DispatchQueueStats()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._chats: dict[Hashable, _ChatQueue] = {}
+        self._closed = False
+
+    @staticmethod
+    def chat_key(dm: Message) -> Hashable:
+        return dm.chat_id if dm.chat_id is not None else ('user', dm.user_id)
+
+    def _queue(self, key: Hashable) -> _ChatQueue:
+        queue = self._chats.get(key)
+        if queue is None:
+            queue = self._chats[key] = _ChatQueue()
+            self.stats.active_chats = len(self._chats)
+        return queue
+
+    async def submit(self, dm: Message) -> bool:
+        """
+        Ставит сообщение в очередь его чата. Возвращает False, если сообщение отклонено (reject
+        или планировщик уже останавливается). С политикой block ждёт, пока в очереди чата освободится место.
+        """
+        key = self.chat_key(dm)
+        if self._closed:
+            self.stats.rejected += 1
+            logger.warning(f'Dispatch scheduler is closed, message of chat {key} rejected')
+            return False
+        queue = self._queue(key)
+        if len(queue.items) >= self.max_queue_size:
+            if self.overflow == 'reject':
+                self.stats.rejected += 1
+                logger.warning(f'Dispatch queue of chat {key} is full, message rejected')
+                return False
+            if self.overflow == 'drop_oldest':
+                queue.items.popleft()
+                self.stats.dropped += 1
+                self.stats.depth -= 1
+                logger.warning(f'Dispatch queue of chat {key} is full, oldest message dropped')
+            else:
+                while len(queue.items) >= self.max_queue_size:
+                    queue.space.clear()
+                    await queue.space.wait()
+                    if self._closed:
+                        self.stats.rejected += 1
+                        logger.warning(f'Dispatch scheduler closed while waiting, message of chat {key} rejected')
+                        return False
+                    # пока ждали, воркер мог опустошить очередь и удалить её
+                    queue = self._queue(key)
+
+        queue.items.append((dm, time.monotonic()))
+        self.stats.submitted += 1
+        self.stats.depth += 1
+        self.stats.max_depth = max(self.stats.max_depth, self.stats.depth)
+        if queue.worker is None:
+            queue.worker = asyncio.create_task(self._worker(key, queue))
+        return True
+
+    async def _worker(self, key: Hashable, queue: _ChatQueue) -> None:
+        try:
+            while queue.items:
+                dm, enqueued_at = queue.items.popleft()
+                self.stats.depth -= 1
+                queue.space.set()
+                async with self._slots:
+                    self.stats.wait.observe((time.monotonic() - enqueued_at) * 1000)
+                    self.stats.in_flight += 1
+                    try:
+                        await self.dispatch(dm)
+                    except Exception as ex:
+                        self.stats.failed += 1
+                        logger.error(f'Dispatch failed for chat {key}: {ex!r}')
+                    finally:
+                        self.stats.in_flight -= 1
+                        self.stats.dispatched += 1
+        finally:
+            # между проверкой пустой очереди и удалением нет await: новое сообщение получит новый воркер
+            queue.worker = None
+            if self._chats.get(key) is queue and not queue.items:
+                del self._chats[key]
+                self.stats.active_chats = len(self._chats)
+
+    async def join(self) -> None:
+        """Ждёт, пока все очереди опустеют (для тестов и корректного останова)."""
+        while self._chats:
+            workers = [queue.worker for queue in self._chats.values() if queue.worker is not None]
+            if not workers:
+                return
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def aclose(self, drain_timeout: float = 0.0) -> None:
+        """
+        Останавливает планировщик: новые сообщения отклоняются, принятые дорабатываются не дольше drain_timeout
+        секунд. Что не успело, отменяется: сообщения в очередях выкидываются, текущие хендлеры получают
+        CancelledError. Submit, ждущие места в очереди (политика block), сразу возвращают False.
+        """
+        self._closed = True
+        for queue in self._chats.values():
+            queue.space.set()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + drain_timeout
+        while self._chats and loop.time() < deadline:
+            workers = [queue.worker for queue in self._chats.values() if queue.worker is not None]
+            if not workers:
+                break
+            await asyncio.wait(workers, timeout=deadline - loop.time())
+        if self._chats:
+            logger.warning(f'Dispatch scheduler closed with {self.stats.depth + self.stats.in_flight} messages pending')
+
+        workers = [queue.worker for queue in self._chats.values() if queue.worker is not None]
+        for queue in self._chats.values():
+            self.stats.depth -= len(queue.items)
+            queue.items.clear()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._chats.clear()
+        self.stats.active_chats = 0
@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from typing import Callable, Hashable, Iterable, Optional, Sequence, TypeVar, cast
+
+import numpy as np
+
+from ..models import Float32Array, Link, RerankWeights, VectorLike, as_float32
+
+T = TypeVar("T")
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[T]],
+    key: Callable[[T], Hashable],
+    k: int = 60,
+) -> list[T]:
+    """
+    Reciprocal Rank Fusion: score(d) = Σ 1 / (k + rank_i(d)) по всем спискам, где встречается d.
+    Не требует сопоставимых оценок из разных источников (ts_rank, similarity, cosine distance).
+    """
+    scores: dict[Hashable, float] = {}
+    items: dict[Hashable, T] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            item_key = key(item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1.0 / (k + rank)
+            items.setdefault(item_key, item)
+    return [items[item_key] for item_key in sorted(scores, key=lambda item_key: scores[item_key], reverse=True)]
+
+
+def rerank_by_similarity(
+    query: VectorLike,
+    candidates: Sequence[Link],
+    limit: int,
+    weights: RerankWeights,
+    now: Optional[datetime] = None,
+) -> list[Link]:
+    """
+    Точное переранжирование кандидатов ANN: косинусная близость по полным векторам (NumPy, float32)
+    плюс бусты за pull_count и свежесть. Кандидаты без вектора отбрасываются.
+    """
+    candidates = [link for link in candidates if link.vector is not None]
+    if not candidates:
+        return []
+
+    matrix = np.stack([cast(Float32Array, link.vector) for link in candidates])
+    query_vector = as_float32(query)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector)
+    scores = (matrix @ query_vector) / np.maximum(norms, np.finfo(np.float32).tiny)
+
+    if weights.pull_count_weight:
+        pulls = np.log1p(np.array([link.pull_count for link in candidates], dtype=np.float32))
+        scores += weights.pull_count_weight * pulls / max(float(pulls.max()), 1.0)
+    if weights.recency_weight:
+        now = now or datetime.now(timezone.utc)
+        age_days = np.array(
+            [(now - _aware(link.created_at)).total_seconds() / 86400 for link in candidates], dtype=np.float32
+        )
+        scores += weights.recency_weight * 0.5 ** (np.maximum(age_days, 0) / weights.recency_half_life_days)
+
+    order = np.argsort(-scores, kind="stable")[:limit]
+    return [candidates[i] for i in order]
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite отдаёт datetime без tzinfo; в БД всё пишется в UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
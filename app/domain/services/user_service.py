@@ -76,7 +76,7 @@ class UserService(IUserService):
             raise PermissionException("You do not have permission to update this user.")
 
         updated_recors = await self.repository.update(data=data, filters={"id": id})
-        if updated_recors == 0:
+        if not updated_recors:
             raise NotFoundError
         return updated_recors[0]
 
@@ -1 +1,7 @@
-from .main_agent import Agent
+from .agent_factory import add_link_agent_factory  # noqa: F401
+from .cached_agent import CachedAgent, dialogue_state, normalize_query  # noqa: F401
+from .llm_models import ToolsCallingModel  # noqa: F401
+from .main_agent import Agent  # noqa: F401
+from .registry import AgentRegistry  # noqa: F401
+from .summarizer import LLMConversationSummarizer  # noqa: F401
+from .tools import MUTATING_TOOLS  # noqa: F401
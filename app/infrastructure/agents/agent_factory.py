@@ -1,3 +1,7 @@
+from typing import Optional
+
+from langchain_core.language_models import BaseChatModel
+
 from domain.interfaces import IAgent
 
 from .main_agent import Agent
@@ -5,7 +9,7 @@ from .tools import add_link_tool
 
 
 # ****** Add link agent ******
-def add_link_agent_factory() -> IAgent:
+def add_link_agent_factory(llm: Optional[BaseChatModel] = None) -> IAgent:
     return Agent(
         system_message="""Тебя зовут Jarvis. Ты агент по добавлению ссылок в БД. Если пользователь хочет добавить
         ссылку, то ты должен вызвать инструмент добавления ссылок. Если пользователь не предоставил все необходимые
@@ -13,5 +17,6 @@ def add_link_agent_factory() -> IAgent:
         Если пользователь не хочет добавлять ссылку, ты не должен вызывать методы, и не должен общаться с пользователем,
         а должен ответить, что ты не можешь помочь.
         """.replace('\n', ' '),
-        tools = [add_link_tool]
+        tools = [add_link_tool],
+        llm=llm,
     )
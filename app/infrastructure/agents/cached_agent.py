@@ -0,0 +1,206 @@
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Hashable, NamedTuple, Optional
+
+import numpy as np
+
+from domain.interfaces import IAgent, IEmbeddingClient
+from domain.models import AgentCacheStats, Float32Array, Message, as_float32
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_PUNCTUATION = re.compile(r'[\s.!?…]+$')
+_URL = re.compile(r'(?:https?://|www\.)\S+', re.IGNORECASE)
+
+
+def normalize_query(text: str) -> str:
+    """
+    Ключ точного совпадения: регистр, пробелы и финальная пунктуация не различаются.
+    Ссылки остаются как есть — путь и параметры URL чувствительны к регистру.
+    """
+    words = [word if _URL.match(word) else word.casefold() for word in text.split()]
+    return _TRAILING_PUNCTUATION.sub('', ' '.join(words))
+
+
+def dialogue_state(msg: Message) -> str:
+    """
+    Отпечаток контекста, в котором задан запрос: сводка и реплики диалога.
+    Ответ на «да» или «а второй?» зависит от того, что было сказано до него. Пустая строка — контекста нет.
+    """
+    if not msg.summary and not msg.context:
+        return ''
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update((msg.summary or '').encode())
+    for entry in msg.context:
+        digest.update(b'\x00' + entry.user_text.encode() + b'\x00' + entry.jarvis_text.encode())
+    return digest.hexdigest()
+
+
+class _CacheKey(NamedTuple):
+    # dialogue_state: один и тот же текст в разных контекстах — разные запросы
+    state: str
+    query: str
+
+
+class _CachedAnswer(NamedTuple):
+    text: str
+    # нормированный эмбеддинг запроса; None — запись доступна только по точному ключу
+    vector: Optional[Float32Array]
+    expires_at: float
+    # сколько занял исходный ответ агента, мс
+    latency_ms: float
+
+
+class CachedAgent(IAgent):
+    """
+    Кэш ответов перед агентом: повторный или почти такой же запрос того же пользователя
+    отвечается без похода в LLM.
+
+    Поиск: сначала точный ключ по нормализованному тексту, затем (если передан embedding_client)
+    ближайший по косинусу из записей пользователя — не ниже similarity_threshold. Записи живут ttl секунд,
+    на пользователя не больше max_entries_per_user (LRU), пользователей не больше max_users.
+
+    Ключ включает отпечаток контекста диалога (dialogue_state): короткие реплики вроде «да» без него
+    получали бы ответ из чужого разговора. Запросы со ссылками ищутся только по точному ключу —
+    у соседних URL почти одинаковые эмбеддинги, но это разные ссылки.
+
+    Ответ не кэшируется, если агент вызвал инструмент из mutating_tools: такой запрос меняет данные,
+    и повторить его надо честно. Заодно сбрасывается кэш пользователя — прежние ответы могли устареть.
+    """
+
+    def __init__(
+        self,
+        agent: IAgent,
+        embedding_client: Optional[IEmbeddingClient] = None,
+        similarity_threshold: float = 0.95,
+        ttl: float = 600.0,
+        max_entries_per_user: int = 100,
+        max_users: int = 1_000,
+        mutating_tools: frozenset[str] = frozenset(),
+        stats: Optional[AgentCacheStats] = None,
+    ) -> None:
+        self.agent = agent
+        self.embedding_client = embedding_client
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries_per_user = max_entries_per_user
+        self.max_users = max_users
+        self.mutating_tools = mutating_tools
+        self.stats = stats if stats is not None else AgentCacheStats()
+        self._users: OrderedDict[Hashable, OrderedDict[_CacheKey, _CachedAnswer]] = OrderedDict()
+
+    @staticmethod
+    def _user_key(msg: Message) -> Hashable:
+        return msg.user_id if msg.user_id is not None else ('chat', msg.chat_id)
+
+    def _entries(self, user: Hashable, now: float) -> Optional[OrderedDict[_CacheKey, _CachedAnswer]]:
+        entries = self._users.get(user)
+        if entries is None:
+            return None
+        self._users.move_to_end(user)
+        expired = [key for key, answer in entries.items() if answer.expires_at <= now]
+        for key in expired:
+            del entries[key]
+        self.stats.expired += len(expired)
+        return entries
+
+    async def _embed(self, text: str) -> Optional[Float32Array]:
+        if self.embedding_client is None or _URL.search(text):
+            return None
+        vector = as_float32(await self.embedding_client.embed(text))
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    async def _lookup(self, msg: Message, key: _CacheKey) -> tuple[Optional[_CachedAnswer], Optional[Float32Array]]:
+        """Ответ из кэша и эмбеддинг запроса, если его пришлось посчитать (пригодится для записи)."""
+        entries = self._entries(self._user_key(msg), time.monotonic())
+        if not entries:
+            return None, None
+        answer = entries.get(key)
+        if answer is not None:
+            entries.move_to_end(key)
+            self.stats.exact_hits += 1
+            return answer, None
+
+        candidates = [(k, a) for k, a in entries.items() if a.vector is not None and k.state == key.state]
+        if not candidates:
+            return None, None
+        vector = await self._embed(key.query)
+        if vector is None:
+            return None, None
+        similarities = np.stack([a.vector for _, a in candidates]) @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None, vector
+        best_key, answer = candidates[best]
+        entries.move_to_end(best_key)
+        self.stats.semantic_hits += 1
+        return answer, vector
+
+    async def _store(
+        self, msg: Message, key: _CacheKey, text: str, vector: Optional[Float32Array], latency_ms: float
+    ) -> None:
+        user = self._user_key(msg)
+        if self.mutating_tools.intersection(msg.data.get('tool_calls', ())):
+            self.stats.skipped += 1
+            self._users.pop(user, None)
+            return
+        if not text.strip():
+            return
+        if vector is None:
+            try:
+                vector = await self._embed(key.query)
+            except Exception as ex:
+                # без эмбеддинга запись доступна только по точному ключу
+                logger.warning(f'Agent cache embedding failed: {ex!r}')
+        entries = self._users.setdefault(user, OrderedDict())
+        self._users.move_to_end(user)
+        entries[key] = _CachedAnswer(text, vector, time.monotonic() + self.ttl, latency_ms)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries_per_user:
+            entries.popitem(last=False)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+    async def _cached(self, msg: Message, key: _CacheKey) -> tuple[Optional[_CachedAnswer], Optional[Float32Array]]:
+        started = time.monotonic()
+        try:
+            answer, vector = await self._lookup(msg, key)
+        except Exception as ex:
+            # кэш не должен ронять ответ: идём в LLM
+            logger.warning(f'Agent cache lookup failed: {ex!r}')
+            answer, vector = None, None
+        lookup_ms = (time.monotonic() - started) * 1000
+        self.stats.lookup.observe(lookup_ms)
+        if answer is None:
+            self.stats.misses += 1
+        else:
+            self.stats.saved_ms += max(answer.latency_ms - lookup_ms, 0.0)
+        return answer, vector
+
+    async def invoke(self, msg: Message) -> Message:
+        key = _CacheKey(dialogue_state(msg), normalize_query(msg.text))
+        answer, vector = await self._cached(msg, key)
+        if answer is not None:
+            return Message(text=answer.text)
+        started = time.monotonic()
+        response = await self.agent.invoke(msg)
+        await self._store(msg, key, response.text, vector, (time.monotonic() - started) * 1000)
+        return response
+
+    async def stream(self, msg: Message) -> AsyncIterator[str]:
+        key = _CacheKey(dialogue_state(msg), normalize_query(msg.text))
+        answer, vector = await self._cached(msg, key)
+        if answer is not None:
+            yield answer.text
+            return
+        started = time.monotonic()
+        parts: list[str] = []
+        async for chunk in self.agent.stream(msg):
+            parts.append(chunk)
+            yield chunk
+        # до сюда доходим, только если поток дочитан до конца — оборванный ответ не кэшируется
+        await self._store(msg, key, ''.join(parts), vector, (time.monotonic() - started) * 1000)
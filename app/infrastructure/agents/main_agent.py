@@ -1,5 +1,6 @@
-from typing import Callable
+from typing import AsyncIterator, Callable, Optional
 
+from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import create_react_agent
@@ -18,18 +19,50 @@ class Agent(IAgent):
         self,
         system_message: str = '',
         tools: list[Callable] = [],
+        llm: Optional[BaseChatModel] = None,
     ) -> None:
-        llm = ChatOpenAI(model=self.llm_model, temperature=0)
+        # llm передаётся из OpenAIClientRegistry, чтобы не создавать пул соединений на каждого агента
+        if llm is None:
+            llm = ChatOpenAI(model=self.llm_model, temperature=0)
         self.agent = create_react_agent(
             model=llm,
             tools=tools,
             prompt=system_message
         )
 
+    @staticmethod
+    def _input(msg: Message) -> dict:
+        # сводка старой части диалога, история (уже урезанная по бюджету токенов) + текущий запрос
+        messages: list[tuple[str, str]] = []
+        if msg.summary:
+            messages.append(("system", f"Краткое содержание предыдущего разговора: {msg.summary}"))
+        for entry in msg.context:
+            messages.append(("human", entry.user_text))
+            messages.append(("ai", entry.jarvis_text))
+        messages.append(("human", msg.text))
+        return {"messages": messages}
+
+    @staticmethod
+    def _record_tool_call(msg: Message, name: str) -> None:
+        # по ним CachedAgent решает, можно ли кэшировать ответ
+        msg.data.setdefault('tool_calls', []).append(name)
+
     async def invoke(self, msg: Message) -> Message:
-        query = msg.text
-        state = await self.agent.ainvoke({"messages": [("human", query)]})
+        state = await self.agent.ainvoke(self._input(msg))
+        for message in state["messages"]:
+            for tool_call in getattr(message, "tool_calls", None) or []:
+                self._record_tool_call(msg, tool_call["name"])
 
         final_answer = state["messages"][-1].content
         return Message(text=final_answer)
 
+    async def stream(self, msg: Message) -> AsyncIterator[str]:
+        # токены модели из astream_events; куски с вызовами инструментов приходят без текста и пропускаются
+        async for event in self.agent.astream_events(self._input(msg), version="v2"):
+            if event["event"] == "on_tool_start":
+                self._record_tool_call(msg, event["name"])
+            if event["event"] != "on_chat_model_stream":
+                continue
+            content = event["data"]["chunk"].content
+            if isinstance(content, str) and content:
+                yield content
@@ -0,0 +1,50 @@
+import logging
+import time
+from typing import Callable
+
+from domain.interfaces import IAgent, IAgentRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class AgentRegistry(IAgentRegistry):
+    """
+    Реестр агентов процесса: граф LangGraph (create_react_agent) компилируется один раз на агента,
+    а не на каждое сообщение. Скомпилированный граф не хранит состояния между ainvoke —
+    состояние каждого вызова передаётся во входе, поэтому один агент безопасно обслуживает
+    конкурентные сообщения.
+    """
+
+    def __init__(self) -> None:
+        self._factories: dict[str, Callable[[], IAgent]] = {}
+        self._agents: dict[str, IAgent] = {}
+        # время построения агента (ChatOpenAI + компиляция графа), мс
+        self.build_ms: dict[str, float] = {}
+
+    def register(self, name: str, factory: Callable[[], IAgent]) -> None:
+        if name in self._factories:
+            raise ValueError(f'Агент {name!r} уже зарегистрирован')
+        self._factories[name] = factory
+
+    def _build(self, name: str) -> IAgent:
+        started = time.perf_counter()
+        agent = self._factories[name]()
+        self.build_ms[name] = (time.perf_counter() - started) * 1000
+        self._agents[name] = agent
+        logger.info(f'Agent {name!r} built in {self.build_ms[name]:.1f} ms')
+        return agent
+
+    def get(self, name: str) -> IAgent:
+        # построение синхронное: между проверкой и записью нет await, второй копии не будет
+        agent = self._agents.get(name)
+        if agent is None:
+            if name not in self._factories:
+                raise KeyError(f'Агент {name!r} не зарегистрирован')
+            agent = self._build(name)
+        return agent
+
+    def warm_up(self) -> dict[str, float]:
+        for name in self._factories:
+            if name not in self._agents:
+                self._build(name)
+        return dict(self.build_ms)
@@ -0,0 +1,28 @@
+from langchain_core.language_models import BaseChatModel
+
+from domain.interfaces import IConversationSummarizer
+from domain.models import Context
+
+SUMMARY_PROMPT = """Ты ведёшь краткую сводку разговора пользователя с ассистентом Jarvis. Тебе дают прежнюю сводку
+(может быть пустой) и новые реплики. Верни обновлённую сводку: факты о пользователе, его просьбы, договорённости,
+ссылки и незакрытые вопросы. Без приветствий и пересказа формулировок, на языке разговора, не длиннее {max_words}
+слов. Верни только текст сводки.""".replace('\n', ' ')
+
+
+class LLMConversationSummarizer(IConversationSummarizer):
+    """Инкрементальная сводка диалога: LLM получает прошлую сводку и только новые реплики."""
+
+    def __init__(self, llm: BaseChatModel) -> None:
+        self.llm = llm
+
+    @staticmethod
+    def _dialog(entries: list[Context]) -> str:
+        return '\n'.join(f'{entry.username}: {entry.user_text}\nJarvis: {entry.jarvis_text}' for entry in entries)
+
+    async def summarize(self, summary: str, entries: list[Context], max_tokens: int) -> str:
+        result = await self.llm.ainvoke([
+            # ~0.75 слова на токен
+            ("system", SUMMARY_PROMPT.format(max_words=max(max_tokens * 3 // 4, 1))),
+            ("human", f"Прежняя сводка:\n{summary or '(нет)'}\n\nНовые реплики:\n{self._dialog(entries)}"),
+        ])
+        return str(result.content).strip()
@@ -9,3 +9,7 @@ async def add_link_tool(link: str) -> str:
     print('вызвано добавление ссылки')
     await asyncio.sleep(0.1)
     return "Ссылка добавлена"
+
+
+# Инструменты, меняющие данные: ответы агента, который их вызвал, не кэшируются (CachedAgent)
+MUTATING_TOOLS = frozenset({add_link_tool.name})
@@ -1 +1,3 @@
+from .micro_batching_client import MicroBatchingEmbeddingClient  # noqa: F401
 from .openai_embed_client import OpenAIEmbeddingClient  # noqa: F401
+from .openai_registry import OpenAIClientRegistry  # noqa: F401
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from typing import Optional, Sequence
+
+from domain.interfaces.embedding_ifaces import IBatchEmbeddingClient
+from domain.models.vector import Float32Array
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatchingEmbeddingClient:
+    """
+    Обёртка над IBatchEmbeddingClient, склеивающая конкурентные embed() в один запрос embed_many().
+
+    Вызовы копятся до max_batch штук или max_delay секунд с первого вызова в пачке, затем уходят одним
+    запросом; одновременно в полёте не больше max_concurrency запросов. Если пачка целиком упала
+    (например, один текст превысил лимит токенов), тексты переотправляются по одному — ошибка достаётся
+    только своему вызывающему.
+    """
+
+    def __init__(
+        self,
+        client: IBatchEmbeddingClient,
+        max_batch: int = 64,
+        max_delay: float = 0.005,
+        max_concurrency: int = 4,
+    ) -> None:
+        self.client = client
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending: list[tuple[str, asyncio.Future[Float32Array]]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    @property
+    def model(self) -> str:
+        return self.client.model
+
+    @property
+    def dimensions(self) -> Optional[int]:
+        return self.client.dimensions
+
+    async def embed(self, text: str) -> Float32Array:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Float32Array] = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    async def embed_many(self, texts: Sequence[str]) -> list[Float32Array]:
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[: self.max_batch], self._pending[self.max_batch :]
+            task = asyncio.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list[tuple[str, asyncio.Future[Float32Array]]]) -> None:
+        async with self._semaphore:
+            # вызывающий мог уже отменить ожидание (таймаут поиска) — такие тексты не отправляем
+            waiters: dict[str, list[asyncio.Future[Float32Array]]] = {}
+            for text, future in batch:
+                if not future.done():
+                    waiters.setdefault(text, []).append(future)
+            if not waiters:
+                return
+            texts = list(waiters)
+            self.batches += 1
+            self.items += len(texts)
+            try:
+                embeddings = await self.client.embed_many(texts)
+            except Exception as ex:
+                if len(texts) == 1:
+                    self._resolve(waiters[texts[0]], exception=ex)
+                    return
+                logger.warning(f"Batch of {len(texts)} embeddings failed, retrying one by one: {ex!r}")
+                await asyncio.gather(*(self._send_one(text, waiters[text]) for text in texts))
+                return
+            for text, embedding in zip(texts, embeddings):
+                self._resolve(waiters[text], result=embedding)
+
+    async def aclose(self) -> None:
+        """Отправляет накопленные тексты и дожидается запросов в полёте: после него клиент OpenAI можно закрывать."""
+        self._flush()
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _send_one(self, text: str, futures: list[asyncio.Future[Float32Array]]) -> None:
+        try:
+            embedding = await self.client.embed(text)
+        except Exception as ex:
+            self._resolve(futures, exception=ex)
+        else:
+            self._resolve(futures, result=embedding)
+
+    @staticmethod
+    def _resolve(
+        futures: list[asyncio.Future[Float32Array]],
+        result: Optional[Float32Array] = None,
+        exception: Optional[BaseException] = None,
+    ) -> None:
+        for future in futures:
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)  # type: ignore[arg-type]
@@ -1,13 +1,33 @@
-from openai import AsyncOpenAI
+import base64
+from typing import Optional, Sequence, cast
+
+import numpy as np
+from openai import NOT_GIVEN, AsyncOpenAI
+
+from domain.models.vector import Float32Array
+
+
+def _decode(embedding: object) -> Float32Array:
+    # encoding_format="base64": сырые little-endian float32 — без промежуточного списка из 1536 Python float
+    return np.frombuffer(base64.b64decode(cast(str, embedding)), dtype=np.float32)
 
 
 class OpenAIEmbeddingClient:
-    def __init__(self, api_key: str):
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(self, client: AsyncOpenAI, model: str = "text-embedding-3-small", dimensions: Optional[int] = None):
+        # client общий на приложение (OpenAIClientRegistry): пул соединений не создаётся на каждый вызов
+        self.client = client
+        self.model = model
+        # text-embedding-3-* умеют отдавать укороченный эмбеддинг (например, 512 вместо 1536)
+        self.dimensions = dimensions
+
+    async def embed(self, text: str) -> Float32Array:
+        return (await self.embed_many([text]))[0]
 
-    async def embed(self, text: str) -> list[float]:
+    async def embed_many(self, texts: Sequence[str]) -> list[Float32Array]:
         resp = await self.client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text,
+            model=self.model,
+            input=list(texts),
+            dimensions=self.dimensions if self.dimensions is not None else NOT_GIVEN,
+            encoding_format="base64",
         )
-        return resp.data[0].embedding
+        return [_decode(item.embedding) for item in sorted(resp.data, key=lambda item: item.index)]
@@ -0,0 +1,89 @@
+import importlib.util
+import logging
+from typing import Optional
+
+import httpx
+from langchain_openai import ChatOpenAI
+from openai import AsyncOpenAI
+
+from .openai_embed_client import OpenAIEmbeddingClient
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAIClientRegistry:
+    """
+    Клиенты OpenAI уровня приложения поверх одного httpx-пула.
+
+    Все клиенты (эмбеддинги, ChatOpenAI) создаются лениво, кэшируются и переиспользуют keep-alive соединения,
+    поэтому TCP+TLS рукопожатие оплачивается один раз на соединение, а не на каждое сообщение.
+    HTTP/2 включается, если установлен пакет h2 (http2=None), или явно. aclose() вызывает app_scope.aclose().
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 60.0,
+        http2: Optional[bool] = None,
+    ) -> None:
+        self.api_key = api_key
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self.http2 = http2 if http2 is not None else importlib.util.find_spec("h2") is not None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._openai: Optional[AsyncOpenAI] = None
+        self._embedding_clients: dict[tuple[str, Optional[int]], OpenAIEmbeddingClient] = {}
+        self._chat_models: dict[tuple[str, float], ChatOpenAI] = {}
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+            )
+        return self._http_client
+
+    @property
+    def openai(self) -> AsyncOpenAI:
+        if self._openai is None:
+            self._openai = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=self.http_client)
+        return self._openai
+
+    def embedding_client(self, model: str, dimensions: Optional[int] = None) -> OpenAIEmbeddingClient:
+        key = (model, dimensions)
+        if key not in self._embedding_clients:
+            self._embedding_clients[key] = OpenAIEmbeddingClient(self.openai, model=model, dimensions=dimensions)
+        return self._embedding_clients[key]
+
+    def chat_model(self, model: str, temperature: float = 0) -> ChatOpenAI:
+        key = (model, temperature)
+        if key not in self._chat_models:
+            self._chat_models[key] = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                api_key=self.api_key,  # type: ignore[arg-type]
+                base_url=self.base_url,
+                http_async_client=self.http_client,
+            )
+        return self._chat_models[key]
+
+    async def aclose(self) -> None:
+        """Закрыть пул соединений. После закрытия клиенты пересоздаются при следующем обращении."""
+        self._embedding_clients.clear()
+        self._chat_models.clear()
+        self._openai = None
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+            logger.info("OpenAI http pool closed")
@@ -0,0 +1,84 @@
+"""
+Смена размерности links.vector на PostgreSQL.
+
+Это явная операция администратора, а не миграция: схема одной и той же ревизии не должна зависеть
+от переменных окружения машины, на которой её накатывают, а укорачивание векторов необратимо.
+
+    python -m infrastructure.db.links_vector_storage --dimensions 512 --yes
+
+После конвертации выставьте приложению тот же EMBEDDING_DIMENSIONS. Колонка всегда хранит float32,
+ANN-индекс ix_links_vector_halfvec_hnsw строится по её float16-копии и пересоздаётся под новую размерность.
+Существующие эмбеддинги конвертируются на месте; при уменьшении размерности берётся префикс вектора
+(так устроено укорачивание у text-embedding-3, косинусное расстояние к норме вектора безразлично).
+Увеличить размерность нельзя — только пересчитать эмбеддинги.
+"""
+import argparse
+import asyncio
+import logging
+import re
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from config.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def current_dimensions(conn: Connection) -> int:
+    column_type = conn.execute(sa.text(
+        "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+        "WHERE attrelid = 'links'::regclass AND attname = 'vector'"
+    )).scalar_one()
+    match = re.fullmatch(r"vector\((\d+)\)", column_type)
+    if match is None:
+        raise RuntimeError(f"Unexpected links.vector type: {column_type}")
+    return int(match.group(1))
+
+
+def convert(conn: Connection, dimensions: int) -> bool:
+    """Приводит links.vector к vector(dimensions) и пересоздаёт ANN-индекс. False — уже приведено."""
+    current = current_dimensions(conn)
+    if current == dimensions:
+        return False
+    if dimensions > current:
+        raise RuntimeError(f"Cannot grow links.vector from {current} to {dimensions} dimensions: re-embed instead")
+
+    conn.execute(sa.text("DROP INDEX IF EXISTS ix_links_vector_halfvec_hnsw"))
+    conn.execute(sa.text(
+        f"ALTER TABLE links ALTER COLUMN vector TYPE vector({dimensions}) "
+        f"USING subvector(vector, 1, {dimensions})"
+    ))
+    conn.execute(sa.text(
+        f"CREATE INDEX ix_links_vector_halfvec_hnsw ON links "
+        f"USING hnsw ((vector::halfvec({dimensions})) halfvec_cosine_ops) WITH (m = 16, ef_construction = 64)"
+    ))
+    return True
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Change links.vector dimensions (PostgreSQL only)")
+    parser.add_argument("--dimensions", type=int, required=True)
+    parser.add_argument("--yes", action="store_true", help="выполнить конвертацию, а не только показать план")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    engine = create_async_engine(settings.DATABASE_URL)
+    try:
+        async with engine.begin() as conn:
+            if conn.dialect.name != "postgresql":
+                raise SystemExit("links.vector dimensions are configurable on PostgreSQL only")
+            dimensions = await conn.run_sync(current_dimensions)
+            logger.info("links.vector: vector(%d) -> vector(%d)", dimensions, args.dimensions)
+            if not args.yes:
+                logger.info("Dry run, pass --yes to convert")
+                return
+            changed = await conn.run_sync(convert, args.dimensions)
+            logger.info("Converted" if changed else "Nothing to do")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,36 @@
+"""conversation messages
+
+Revision ID: 2a6e8c4d1f03
+Revises: 4f0b7d2e6c91
+Create Date: 2026-10-18 22:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a6e8c4d1f03'
+down_revision: Union[str, None] = '4f0b7d2e6c91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('conversation_messages',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('chat_id', sa.BigInteger(), nullable=False),
+    sa.Column('date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('user_text', sa.Text(), nullable=False),
+    sa.Column('jarvis_text', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_conversation_messages_chat_id_id', 'conversation_messages', ['chat_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversation_messages_chat_id_id', table_name='conversation_messages')
+    op.drop_table('conversation_messages')
@@ -0,0 +1,45 @@
+"""links vector hnsw index
+
+HNSW-индекс по float16-копии links.vector вместо индекса по самой колонке: граф вдвое меньше,
+а колонка остаётся float32 для точного rerank. Размерность берётся из фактического типа колонки,
+а не из настроек окружения, на котором накатывается миграция.
+
+Revision ID: 3b9d2f6a1c47
+Revises: 821803c5f569
+Create Date: 2026-10-18 16:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d2f6a1c47'
+down_revision: Union[str, None] = '821803c5f569'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # HNSW-индекс есть только в pgvector
+        return
+
+    dimensions = bind.execute(sa.text(
+        "SELECT atttypmod FROM pg_attribute WHERE attrelid = 'links'::regclass AND attname = 'vector'"
+    )).scalar_one()
+    op.execute(
+        f"CREATE INDEX ix_links_vector_halfvec_hnsw ON links "
+        f"USING hnsw ((vector::halfvec({dimensions})) halfvec_cosine_ops) WITH (m = 16, ef_construction = 64)"
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    op.drop_index('ix_links_vector_halfvec_hnsw', table_name='links')
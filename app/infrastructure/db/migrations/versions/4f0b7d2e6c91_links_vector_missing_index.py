@@ -0,0 +1,41 @@
+"""links vector missing index
+
+Revision ID: 4f0b7d2e6c91
+Revises: c58a1f3e9b20
+Create Date: 2026-10-18 19:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f0b7d2e6c91'
+down_revision: Union[str, None] = 'c58a1f3e9b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # частичный индекс нужен только очереди FOR UPDATE SKIP LOCKED на PostgreSQL
+        return
+
+    op.create_index(
+        'ix_links_vector_missing',
+        'links',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text('vector IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    op.drop_index('ix_links_vector_missing', table_name='links')
@@ -0,0 +1,54 @@
+"""links lexical search indexes
+
+Revision ID: 7e41c0d9a2b5
+Revises: 3b9d2f6a1c47
+Create Date: 2026-10-18 17:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e41c0d9a2b5'
+down_revision: Union[str, None] = '3b9d2f6a1c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Выражение должно совпадать с LexicalSearchMixin._fulltext_document, иначе планировщик не возьмёт индекс
+FULLTEXT_DOCUMENT = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # GIN-индексы tsvector и pg_trgm есть только в PostgreSQL
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'ix_links_fulltext',
+        'links',
+        [sa.text(FULLTEXT_DOCUMENT)],
+        unique=False,
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_links_link_trgm',
+        'links',
+        ['link'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'link': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    op.drop_index('ix_links_link_trgm', table_name='links')
+    op.drop_index('ix_links_fulltext', table_name='links')
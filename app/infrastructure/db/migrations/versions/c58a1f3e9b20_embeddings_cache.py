@@ -0,0 +1,35 @@
+"""embeddings cache
+
+Revision ID: c58a1f3e9b20
+Revises: 7e41c0d9a2b5
+Create Date: 2026-10-18 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+from pgvector.sqlalchemy import Vector
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c58a1f3e9b20'
+down_revision: Union[str, None] = '7e41c0d9a2b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('embeddings_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('vector', Vector(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_embeddings_cache_created_at'), 'embeddings_cache', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_embeddings_cache_created_at'), table_name='embeddings_cache')
+    op.drop_table('embeddings_cache')
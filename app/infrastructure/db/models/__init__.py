@@ -1,3 +1,5 @@
 from .base_model_orm import BaseORMModel  # noqa: F401
+from .conversation_orm import ConversationMessageORM  # noqa: F401
+from .embedding_cache_orm import EmbeddingCacheORM  # noqa: F401
 from .link_orm import LinkORM  # noqa: F401
 from .user_orm import UserORM  # noqa: F401
@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, DateTime, Index, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base_model_orm import BaseORMModel
+
+
+class ConversationMessageORM(BaseORMModel):
+    """ORM-таблица истории диалогов: всё, что вытесняется из кольцевого буфера ConversationStore в памяти."""
+
+    __tablename__ = "conversation_messages"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    date: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    username: Mapped[str] = mapped_column(String, nullable=False)
+    user_text: Mapped[str] = mapped_column(Text, nullable=False)
+    jarvis_text: Mapped[str] = mapped_column(Text, nullable=False)
+
+    __table_args__ = (
+        # последние N реплик чата — обратный проход по индексу, без сортировки и скана
+        Index("ix_conversation_messages_chat_id_id", "chat_id", "id"),
+    )
@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base_model_orm import BaseORMModel
+
+
+class EmbeddingCacheORM(BaseORMModel):
+    """ORM-таблица сохранённых эмбеддингов (второй уровень кэша EmbeddingService)."""
+
+    __tablename__ = "embeddings_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True) # sha256(model, нормализованный текст)
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    # размерность не фиксируется: у разных моделей она разная
+    vector: Mapped[list[float]] = mapped_column(Vector(), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        index=True,
+    )
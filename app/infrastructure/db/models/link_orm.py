@@ -1,16 +1,49 @@
 from datetime import datetime, timezone
 
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 
+from config import settings
+
 from .base_model_orm import BaseORMModel
 
+# Размерность эмбеддингов задаётся настройками; колонку к ней приводит python -m infrastructure.db.links_vector_storage
+VECTOR_DIMENSIONS = settings.EMBEDDING_DIMENSIONS or 1536
+
 
 class LinkORM(BaseORMModel):
     """ORM-таблица ссылок."""
 
     __tablename__ = "links"
+    __table_args__ = (
+        # ANN-индекс по float16-копии вектора (вдвое меньше полноточного HNSW), только для PostgreSQL.
+        # Сама колонка остаётся float32: по ней идёт точный rerank кандидатов (VectorSearchMixin.ann_halfvec)
+        Index(
+            "ix_links_vector_halfvec_hnsw",
+            text(f"(vector::halfvec({VECTOR_DIMENSIONS})) halfvec_cosine_ops"),
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+        ).ddl_if(dialect="postgresql"),
+        # Лексический поиск (LexicalSearchMixin): полнотекстовый по title/description и pg_trgm по link
+        Index(
+            "ix_links_fulltext",
+            text("to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_links_link_trgm",
+            "link",
+            postgresql_using="gin",
+            postgresql_ops={"link": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # Очередь фонового расчёта эмбеддингов: частичный индекс только по строкам без вектора
+        Index(
+            "ix_links_vector_missing",
+            "id",
+            postgresql_where=text("vector IS NULL"),
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(
@@ -26,4 +59,5 @@ class LinkORM(BaseORMModel):
         index=True,
     )
     pull_count: Mapped[int] = mapped_column(Integer, nullable=False, index=True, default=0)
-    vector: Mapped[list[float]] = mapped_column(Vector(1536), nullable=True) # Векторное представление ссылки
+    # Векторное представление ссылки (полная точность float32)
+    vector: Mapped[list[float]] = mapped_column(Vector(VECTOR_DIMENSIONS), nullable=True)
@@ -0,0 +1,62 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from domain.interfaces.embedding_ifaces import IEmbeddingCache
+from domain.models.vector import Float32Array, VectorLike
+
+
+class LRUEmbeddingCache(IEmbeddingCache):
+    """
+    In-process LRU-кэш эмбеддингов с TTL.
+
+    Векторы хранятся как read-only float32-массивы (1536 измерений — ~6 КБ против ~50 КБ у list[float]),
+    память ограничена и числом записей, и суммарным размером векторов в байтах.
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024, ttl: float = 24 * 3600) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[Float32Array, float]] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Float32Array]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        vector, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._pop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def set(self, key: str, embedding: VectorLike) -> None:
+        if key in self._entries:
+            self._pop(key)
+        # отдаём один и тот же буфер всем читателям — запрещаем запись, чтобы его нельзя было испортить
+        vector = np.array(embedding, dtype=np.float32)
+        vector.setflags(write=False)
+        if vector.nbytes > self.max_bytes:
+            return
+        self._entries[key] = (vector, time.monotonic() + self.ttl)
+        self.nbytes += vector.nbytes
+        while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _pop(self, key: str) -> None:
+        vector, _ = self._entries.pop(key)
+        self.nbytes -= vector.nbytes
@@ -1,2 +1,4 @@
+from .conversation_repo import ConversationRepo  # noqa: F401
+from .embedding_cache_repo import EmbeddingCacheRepo  # noqa: F401
 from .link_repo import LinkRepo  # noqa: F401
 from .user_repo import UserRepo  # noqa: F401
@@ -0,0 +1,22 @@
+from typing import Generic
+
+from domain.models.base_domain_model import TDomain, TTypedDict
+from domain.models.conversation import ConversationEntryDict, ConversationEntryFields
+
+from ..db.models.base_model_orm import TOrm
+from .sqlalchemy_mixins import CreateMixin, ListMixin
+
+
+class ConversationRepo(
+    CreateMixin[TDomain, TOrm, ConversationEntryDict],
+    ListMixin[TDomain, TOrm, ConversationEntryDict, ConversationEntryFields],
+    Generic[TDomain, TOrm, TTypedDict],
+):
+    async def recent(self, chat_id: int, limit: int) -> list[TDomain]:
+        rows = await self.list(
+            filters={'chat_id': chat_id},
+            order_columns=[self.orm_class.id.desc()],  # type: ignore[attr-defined]
+            limit=limit,
+        )
+        rows.reverse()
+        return rows
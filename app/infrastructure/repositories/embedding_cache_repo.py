@@ -0,0 +1,14 @@
+from typing import Generic
+
+from domain.models.base_domain_model import TDomain, TTypedDict
+from domain.models.embedding import EmbeddingCacheDict
+
+from ..db.models.base_model_orm import TOrm
+from .sqlalchemy_mixins import CreateMixin, ReadMixin
+
+
+class EmbeddingCacheRepo(
+    CreateMixin[TDomain, TOrm, EmbeddingCacheDict],
+    ReadMixin[TDomain, TOrm, EmbeddingCacheDict],
+    Generic[TDomain, TOrm, TTypedDict],
+): ...
@@ -1,27 +1,54 @@
 from typing import Generic
 
+from config import settings
 from domain.models.base_domain_model import TDomain, TTypedDict
 from domain.models.link import LinkDict, LinkFields
 
 from ..db.models.base_model_orm import TOrm
 from .sqlalchemy_mixins import (
+    CountMixin,
     CreateMixin,
     DeleteMixin,
     ExistsMixin,
+    LexicalSearchMixin,
     ListMixin,
     ReadMixin,
     UpdateMixin,
+    VectorBackfillMixin,
+    VectorIndexMixin,
     VectorSearchMixin,
 )
 
 
 class LinkRepo(
+    VectorIndexMixin[TDomain, TOrm, LinkDict],
     CreateMixin[TDomain, TOrm, LinkDict],
     ReadMixin[TDomain, TOrm, LinkDict],
     UpdateMixin[TDomain, TOrm, LinkDict],
     ListMixin[TDomain, TOrm, LinkDict, LinkFields],
     ExistsMixin[TDomain, TOrm, LinkDict],
+    CountMixin[TDomain, TOrm, LinkDict],
     DeleteMixin[TDomain, TOrm, LinkDict],
     VectorSearchMixin[TDomain, TOrm, LinkDict],
+    LexicalSearchMixin[TDomain, TOrm, LinkDict],
+    VectorBackfillMixin[TDomain, TOrm, LinkDict],
     Generic[TDomain, TOrm, TTypedDict],
-): ...
+):
+    keyset_columns = ("created_at", "id")
+    # 1536 float'ов на строку поднимаются только по явному запросу: fields=[..., "vector"]
+    deferred_fields = ("vector",)
+    # ANN по float16-индексу ix_links_vector_halfvec_hnsw, rerank — по полным float32 векторам
+    ann_halfvec = True
+    # links.link уникальна глобально: импорт закладок не перезаписывает ссылки других пользователей
+    owner_columns = ("user_id",)
+
+    ef_search = settings.VECTOR_EF_SEARCH
+    probes = settings.VECTOR_IVFFLAT_PROBES
+    iterative_scan = settings.VECTOR_ITERATIVE_SCAN
+
+    # in-process индекс (если передан в конструктор) разбит по пользователям
+    vector_partition_field = "user_id"
+
+    # лексический поиск: GIN-индексы ix_links_fulltext и ix_links_link_trgm
+    fulltext_fields = ("title", "description")
+    trigram_field = "link"
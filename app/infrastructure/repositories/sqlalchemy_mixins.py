@@ -1,16 +1,81 @@
-from typing import Generic, Optional, Type, cast
-
-from sqlalchemy import insert, or_, select
+from functools import cache
+from typing import Any, AsyncIterator, Callable, Generic, Mapping, Optional, Sequence, Type, cast
+
+from pgvector.sqlalchemy import HALFVEC
+from pydantic import create_model
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Row,
+    and_,
+    delete,
+    event,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy import cast as sa_cast
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
 
 from domain.exceptions import DoubleFoundError, NotFoundError, RepositoryException
-from domain.models.base_domain_model import TDictFields, TDomain, TTypedDict
+from domain.interfaces.vector_index_ifaces import IVectorIndex, VectorLoader
+from domain.models.base_domain_model import BaseDomainModel, TDictFields, TDomain, TTypedDict
+from domain.models.bulk import BulkCreateResult, OnConflict
+from domain.models.vector import VectorLike, as_float32
 
 from ..db.models.base_model_orm import TOrm
 
+# Лимит bind-параметров на один запрос (PostgreSQL — 32767, SQLite >= 3.32 — 32766)
+_MAX_BIND_PARAMS = 30_000
+# Служебная колонка RETURNING в create_many: строка вставлена, а не обновлена
+_INSERTED = "_inserted"
+# Ключ Session.info: изменения in-process векторного индекса, ждущие commit транзакции
+_PENDING_INDEX_CHANGES = "pending_vector_index_changes"
+
+
+@cache
+def _projection_model(domain_model: Type[BaseDomainModel], fields: frozenset[str]) -> Type[BaseDomainModel]:
+    """
+    Модель-проекция: только перечисленные поля domain_model с их типами и валидаторами.
+    Незагруженных полей в ней нет, поэтому они не получают defaults и не выдают себя за значения из БД
+    (отложенный vector не превращается в None, неотличимый от «эмбеддинга нет»).
+    """
+    definitions: dict[str, Any] = {
+        name: (info.annotation, info) for name, info in domain_model.model_fields.items() if name in fields
+    }
+    return create_model(
+        f"{domain_model.__name__}Projection",
+        __base__=BaseDomainModel,
+        __module__=domain_model.__module__,
+        **definitions,
+    )
+
+
+def _apply_index_changes(session: Session) -> None:
+    for change in session.info.pop(_PENDING_INDEX_CHANGES, []):
+        change()
+
+
+def _discard_index_changes(session: Session, transaction: SessionTransaction) -> None:
+    # после commit список уже пуст; здесь отбрасывается то, что не дожило до commit (rollback, close)
+    if transaction.parent is None:
+        session.info.pop(_PENDING_INDEX_CHANGES, None)
+
 
 class BaseSQLAlchemyRepo(Generic[TDomain, TOrm]):
+    # Колонки, которые не загружаются, пока их явно не запросили через fields (например, vector)
+    deferred_fields: tuple[str, ...] = ()
+
     def __init__(
         self,
         db: AsyncSession,
@@ -21,10 +86,54 @@ class BaseSQLAlchemyRepo(Generic[TDomain, TOrm]):
         self.domain_model = domain_model
         self.orm_class = orm_class
 
+    def _filter_conditions(self, filters: Optional[Mapping[str, Any]]) -> list[ColumnElement[bool]]:
+        """
+        Строит WHERE-условия из словаря фильтров.
+        Значение-список превращается в `column IN (...)`, остальные значения — в `column == value`.
+        """
+        conditions: list[ColumnElement[bool]] = []
+        if not filters:
+            return conditions
+        for key, value in filters.items():
+            column = getattr(self.orm_class, key)
+            if isinstance(value, list):
+                conditions.append(column.in_(value))
+            else:
+                conditions.append(column == value)
+        return conditions
+
+    def _columns(self, fields: Optional[Sequence[str]] = None) -> list[Any]:
+        """Колонки для SELECT/RETURNING: явно запрошенные fields или все, кроме deferred_fields."""
+        if fields:
+            return [getattr(self.orm_class, field) for field in fields]
+        return [
+            getattr(self.orm_class, attr.key)
+            for attr in sa_inspect(self.orm_class).column_attrs
+            if attr.key not in self.deferred_fields
+        ]
+
+    def _to_domain(self, row: Row[Any] | Mapping[str, Any]) -> TDomain:
+        """
+        Строит доменную модель из загруженных колонок.
+        Если загружены все поля модели — возвращается сама доменная модель. Иначе (проекция fields
+        или отложенные deferred_fields) — проекция только из загруженных полей: model_fields_set — ровно
+        загруженные колонки, обращение к незагруженному полю — AttributeError, model_dump() отдаёт только их.
+        """
+        data = row._asdict() if isinstance(row, Row) else dict(row)
+        if data.keys() == self.domain_model.model_fields.keys():
+            return self.domain_model.model_validate(data)
+        return cast(TDomain, _projection_model(self.domain_model, frozenset(data)).model_validate(data))
+
 
 class CreateMixin(BaseSQLAlchemyRepo[TDomain, TOrm], Generic[TDomain, TOrm, TTypedDict]):
+    # Колонки, которые create_many(on_conflict="update") никогда не перезаписывает (кроме первичного ключа)
+    immutable_columns: tuple[str, ...] = ("created_at",)
+    # Колонки владельца: DO UPDATE срабатывает, только если они совпадают у существующей и новой строки,
+    # иначе строка попадает в skipped (импорт одного пользователя не трогает записи другого)
+    owner_columns: tuple[str, ...] = ()
+
     async def create(self, data: TTypedDict) -> TDomain:
-        stmt = insert(self.orm_class).values(**data).returning(self.orm_class)
+        stmt = insert(self.orm_class).values(**data).returning(*self._columns())
         try:
             result = await self.db.execute(stmt)
         except IntegrityError as ex:
@@ -45,17 +154,150 @@ class CreateMixin(BaseSQLAlchemyRepo[TDomain, TOrm], Generic[TDomain, TOrm, TTyp
         except SQLAlchemyError as ex:
             raise RepositoryException(str(ex))
 
-        row = result.scalar_one()
-        return self.domain_model.model_validate(row)
+        return self._to_domain(result.one())
+
+    async def create_many(
+        self,
+        items: Sequence[TTypedDict],
+        on_conflict: OnConflict = "skip",
+        conflict_columns: Optional[Sequence[str]] = None,
+        chunk_size: int = 500,
+    ) -> BulkCreateResult[TDomain]:
+        """
+        Пакетная вставка многострочными INSERT ... ON CONFLICT ... RETURNING.
+
+        on_conflict="skip" — конфликтующие строки пропускаются (DO NOTHING) и попадают в `skipped`;
+        on_conflict="update" — конфликтующие строки обновляются значениями из items (DO UPDATE) и попадают
+        в `updated`; первичный ключ, immutable_columns и owner_columns не перезаписываются, а строки
+        с другим владельцем (owner_columns) не обновляются и попадают в `skipped`.
+        conflict_columns — цель ON CONFLICT; по умолчанию берутся уникальные колонки таблицы.
+        Большие входные данные режутся на чанки, дубликаты внутри самого пакета отбрасываются заранее.
+        """
+        report = BulkCreateResult[TDomain]()
+        if not items:
+            return report
+
+        unique_columns = [column.name for column in self.orm_class.__table__.columns if column.unique]
+        if on_conflict == "update" and conflict_columns is None:
+            if len(unique_columns) != 1:
+                raise RepositoryException(
+                    f"Не удалось определить цель ON CONFLICT для {self.orm_class.__tablename__}: "
+                    "передайте conflict_columns"
+                )
+            conflict_columns = unique_columns
+        # По этим колонкам вставленные строки сопоставляются с входными
+        key_columns = list(conflict_columns) if conflict_columns else unique_columns
+
+        # Дубликаты внутри пакета: при skip побеждает первая запись, при update — последняя
+        unique_items: dict[tuple, dict[str, Any]] = {}
+        for item in map(dict, items):
+            key = tuple(item.get(column) for column in key_columns) if key_columns else (len(unique_items),)
+            if key in unique_items:
+                if on_conflict == "update":
+                    report.skipped.append(unique_items[key])
+                    unique_items[key] = item
+                else:
+                    report.skipped.append(item)
+            else:
+                unique_items[key] = item
+
+        # Многострочный VALUES требует одинакового набора колонок — группируем по ключам
+        groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+        for item in unique_items.values():
+            groups.setdefault(tuple(sorted(item)), []).append(item)
+
+        for columns, group in groups.items():
+            step = max(1, min(chunk_size, _MAX_BIND_PARAMS // max(len(columns), 1)))
+            for offset in range(0, len(group), step):
+                chunk = group[offset:offset + step]
+                rows = await self._insert_chunk(chunk, columns, on_conflict, conflict_columns, key_columns)
+                returned_keys = {tuple(row.get(column) for column in key_columns) for row, _ in rows}
+                for row, inserted in rows:
+                    (report.created if inserted else report.updated).append(self._to_domain(row))
+                if key_columns:
+                    report.skipped.extend(
+                        item for item in chunk
+                        if tuple(item.get(column) for column in key_columns) not in returned_keys
+                    )
+
+        return report
+
+    async def _insert_chunk(
+        self,
+        chunk: list[dict[str, Any]],
+        columns: tuple[str, ...],
+        on_conflict: OnConflict,
+        conflict_columns: Optional[Sequence[str]],
+        key_columns: Sequence[str],
+    ) -> list[tuple[dict[str, Any], bool]]:
+        """Вставляет чанк; возвращает записанные строки с признаком «вставлена» (False — обновлена)."""
+        # on_conflict_do_* есть только у диалектных insert (PostgreSQL/SQLite)
+        stmt: Any
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            stmt = pg_insert(self.orm_class).values(chunk)
+        elif dialect == "sqlite":
+            stmt = sqlite_insert(self.orm_class).values(chunk)
+        else:
+            raise RepositoryException(f"create_many не поддерживается для диалекта {dialect}")
+
+        table = self.orm_class.__table__
+        protected = {
+            *(conflict_columns or ()),
+            *(column.name for column in table.primary_key.columns),
+            *self.immutable_columns,
+            *self.owner_columns,
+        }
+        update_columns = {column: stmt.excluded[column] for column in columns if column not in protected}
+        if on_conflict == "update" and update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict_columns,
+                set_=update_columns,
+                where=and_(*(table.c[column] == stmt.excluded[column] for column in self.owner_columns))
+                if self.owner_columns else None,
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=conflict_columns)
+
+        returning = self._columns()
+        upsert = on_conflict == "update" and bool(update_columns)
+        existing: set[tuple] = set()
+        if upsert and dialect == "postgresql":
+            # xmax = 0 только у строк, вставленных этой командой, а не обновлённых
+            returning = [*returning, literal_column("xmax = 0").label(_INSERTED)]
+        elif upsert and key_columns:
+            existing = await self._existing_keys(chunk, key_columns)
+
+        try:
+            rows = (await self.db.execute(stmt.returning(*returning))).all()
+        except SQLAlchemyError as ex:
+            raise RepositoryException(str(ex))
+        written = []
+        for row in rows:
+            data = row._asdict()
+            if _INSERTED in data:
+                inserted = bool(data.pop(_INSERTED))
+            else:
+                inserted = tuple(data.get(column) for column in key_columns) not in existing
+            written.append((data, inserted))
+        return written
+
+    async def _existing_keys(self, chunk: list[dict[str, Any]], key_columns: Sequence[str]) -> set[tuple]:
+        """Ключи строк чанка, уже существующих в таблице (на диалектах без xmax)."""
+        columns = [getattr(self.orm_class, column) for column in key_columns]
+        keys = [tuple(item.get(column) for column in key_columns) for item in chunk]
+        stmt = select(*columns).filter(tuple_(*columns).in_(keys))
+        try:
+            return {tuple(row) for row in (await self.db.execute(stmt)).all()}
+        except SQLAlchemyError as ex:
+            raise RepositoryException(str(ex))
 
 
 class ReadMixin(BaseSQLAlchemyRepo[TDomain, TOrm], Generic[TDomain, TOrm, TTypedDict]):
-    async def read(self, filters: Optional[TTypedDict] = None) -> TDomain:
-        stmt = select(self.orm_class)
-        if filters:
-            stmt = stmt.filter_by(**filters)
+    async def read(self, filters: Optional[TTypedDict] = None, fields: Optional[Sequence[str]] = None) -> TDomain:
+        stmt = select(*self._columns(fields)).filter(*self._filter_conditions(filters))
         try:
-            res = (await self.db.execute(stmt)).scalars().all()
+            res = (await self.db.execute(stmt)).all()
         except SQLAlchemyError as ex:
             raise RepositoryException(str(ex))
 
@@ -64,97 +306,135 @@ class ReadMixin(BaseSQLAlchemyRepo[TDomain, TOrm], Generic[TDomain, TOrm, TTyped
         elif len(res) > 1:
             raise DoubleFoundError
 
-        return self.domain_model.model_validate(res[0])
+        return self._to_domain(res[0])
 
 
 class ListMixin(BaseSQLAlchemyRepo[TDomain, TOrm], Generic[TDomain, TOrm, TTypedDict, TDictFields]):
+    # Колонки курсора для keyset-пагинации, если order_columns не переданы
+    keyset_columns: tuple[str, ...] = ("id",)
+
+    def _order_columns(self, order_columns: Optional[Sequence[Any]]) -> list[Any]:
+        columns = order_columns or self.keyset_columns
+        return [getattr(self.orm_class, column) if isinstance(column, str) else column for column in columns]
+
+    async def iter_list(
+        self,
+        filters: Optional[TTypedDict] = None,
+        order_columns: Optional[Sequence[TDictFields]] = None,
+        chunk_size: int = 500,
+        fields: Optional[Sequence[str]] = None,
+    ) -> AsyncIterator[TDomain]:
+        """
+        Потоковое чтение через AsyncSession.stream(): строки забираются с сервера чанками по chunk_size,
+        поэтому память не растёт с размером таблицы. Один запрос без OFFSET.
+        """
+        stmt = (
+            select(*self._columns(fields))
+            .filter(*self._filter_conditions(filters))
+            .order_by(*self._order_columns(order_columns))
+            .execution_options(yield_per=chunk_size)
+        )
+        try:
+            result = await self.db.stream(stmt)
+            async for partition in result.partitions():
+                for row in partition:
+                    yield self._to_domain(row)
+        except SQLAlchemyError as ex:
+            raise RepositoryException(str(ex))
+
     async def list(
         self,
         filters: Optional[TTypedDict] = None,
         order_columns: Optional[list[TDictFields]] = None,
+        after: Optional[tuple[Any, ...]] = None,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
     ) -> list[TDomain]:
-        stmt = select(self.orm_class)
-        if filters:
-            conditions = []
-            for key, value in filters.items():
-                column = getattr(self.orm_class, key)
-                if isinstance(value, list):
-                    # Создаем условие: column == value1 OR column == value2 OR ...
-                    conditions.append(or_(*[column == item for item in value]))
-                else:
-                    conditions.append(column == value)
-            stmt = stmt.filter(*conditions)
-        if order_columns:
-            stmt = stmt.order_by(*(cast(list[str], order_columns)))
+        """
+        Список записей. Для keyset-пагинации передайте limit и after — значения колонок сортировки
+        последней записи предыдущей страницы (по умолчанию keyset_columns, например (created_at, id)).
+        """
+        stmt = select(*self._columns(fields)).filter(*self._filter_conditions(filters))
+        if order_columns or after is not None or limit is not None:
+            columns = self._order_columns(order_columns)
+            if after is not None:
+                # (c1, c2) > (v1, v2) — использует индекс по колонкам сортировки вместо OFFSET
+                stmt = stmt.filter(tuple_(*columns) > tuple(after))
+            stmt = stmt.order_by(*columns)
+        if limit is not None:
+            stmt = stmt.limit(limit)
         try:
             result = await self.db.execute(stmt)
         except SQLAlchemyError as ex:
             raise RepositoryException(str(ex))
-        rows = result.scalars().all()
-        return [self.domain_model.model_validate(row) for row in rows]
+        return [self._to_domain(row) for row in result.all()]
 
 
 class UpdateMixin(BaseSQLAlchemyRepo[TDomain, TOrm], Generic[TDomain, TOrm, TTypedDict]):
-    async def update(self, data: TTypedDict, filters: Optional[TTypedDict] = None) -> list[TDomain]:
-        stmt = select(self.orm_class)
-        if filters:
-            stmt = stmt.filter_by(**filters)
+    async def update(
+        self,
+        data: TTypedDict,
+        filters: Optional[TTypedDict] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> list[TDomain]:
+        conditions = self._filter_conditions(filters)
+        columns = self._columns(fields)
+        # Один UPDATE ... WHERE ... RETURNING вместо загрузки и setattr по каждой строке.
+        # Если обновлять нечего — просто возвращаем подходящие записи.
+        stmt = (
+            update(self.orm_class).filter(*conditions).values(**data).returning(*columns)
+            if data
+            else select(*columns).filter(*conditions)
+        )
         try:
-            records = (await self.db.execute(stmt)).scalars().all()
+            result = await self.db.execute(stmt)
         except SQLAlchemyError as ex:
             raise RepositoryException(str(ex))
-        if not records:
-            return []
-
-        updated_records = []
-        for record in records:
-            for key, value in data.items():
-                setattr(record, key, value)
-            updated_records.append(self.domain_model.model_validate(record))
 
-        return updated_records
+        return [self._to_domain(row) for row in result.all()]
 
 
 class DeleteMixin(BaseSQLAlchemyRepo[TDomain, TOrm], Generic[TDomain, TOrm, TTypedDict]):
     async def delete(self, filters: TTypedDict) -> int:
-        stmt = select(self.orm_class)
-        if filters:
-            stmt = stmt.filter_by(**filters)
+        return len(await self._delete(filters))
+
+    async def _delete(self, filters: Optional[TTypedDict]) -> list[Any]:
+        """Один DELETE ... WHERE ... RETURNING id вместо session.delete() по каждой строке; возвращает id."""
+        primary_key = sa_inspect(self.orm_class).primary_key[0]
+        stmt = delete(self.orm_class).filter(*self._filter_conditions(filters)).returning(primary_key)
         try:
-            records = (await self.db.execute(stmt)).scalars().all()
+            result = await self.db.execute(stmt)
         except SQLAlchemyError as ex:
             raise RepositoryException(str(ex))
 
-        if not records:
-            return 0
-
-        for record in records:
-            await self.db.delete(record)
-
-        return len(records)
+        return list(result.scalars().all())
 
 
 class CountMixin(BaseSQLAlchemyRepo[TDomain, TOrm], Generic[TDomain, TOrm, TTypedDict]):
     async def count(self, filters: Optional[TTypedDict] = None) -> int:
-        stmt = select(self.orm_class)
-        if filters:
-            stmt = stmt.filter_by(**filters)
+        # SELECT count(*) FROM ... WHERE ... — строки не поднимаются в Python
+        stmt = (
+            select(func.count())
+            .select_from(self.orm_class)
+            .filter(*self._filter_conditions(filters))
+        )
         try:
-            res = (await self.db.execute(stmt)).scalars().all()
+            return (await self.db.execute(stmt)).scalar_one()
         except SQLAlchemyError as ex:
             raise RepositoryException(str(ex))
 
-        return len(res)
-
 
 class ExistsMixin(BaseSQLAlchemyRepo[TDomain, TOrm], Generic[TDomain, TOrm, TTypedDict]):
     async def exists(self, filters: Optional[TTypedDict] = None) -> bool:
-        stmt = select(self.orm_class)
-        if filters:
-            stmt = stmt.filter_by(**filters)
+        # SELECT EXISTS (SELECT 1 FROM ... WHERE ... LIMIT 1) — БД останавливается на первой найденной строке
+        subquery = (
+            select(literal_column("1", Integer))
+            .select_from(self.orm_class)
+            .filter(*self._filter_conditions(filters))
+            .limit(1)
+        )
         try:
-            res = (await self.db.execute(stmt)).scalars().all()
-            return len(res) > 0
+            return bool((await self.db.execute(select(subquery.exists()))).scalar_one())
         except SQLAlchemyError as ex:
             raise RepositoryException(str(ex))
 
@@ -163,35 +443,366 @@ class VectorSearchMixin(
     BaseSQLAlchemyRepo[TDomain, TOrm],
     Generic[TDomain, TOrm, TTypedDict],
 ):
+    # Параметры ANN-индексов pgvector по умолчанию (None — оставить значение сервера)
+    ef_search: Optional[int] = None  # hnsw.ef_search: размер списка кандидатов HNSW
+    probes: Optional[int] = None  # ivfflat.probes: сколько списков IVFFlat просматривать
+    iterative_scan: Optional[str] = None  # hnsw.iterative_scan: добор кандидатов после фильтрации
+    # ANN по выражению vector::halfvec(n): нужен одноимённый expression-индекс с halfvec_cosine_ops,
+    # сама колонка остаётся float32 и используется для точного rerank
+    ann_halfvec: bool = False
+
+    async def _apply_search_settings(self, ef_search: Optional[int], probes: Optional[int]) -> None:
+        """
+        Применяет параметры поиска через set_config(..., is_local => true), т.е. SET LOCAL:
+        они действуют только до конца текущей транзакции и не протекают в другие запросы пула.
+        """
+        if self.db.get_bind().dialect.name != "postgresql":
+            return
+        search_settings = {
+            "hnsw.ef_search": ef_search if ef_search is not None else self.ef_search,
+            "ivfflat.probes": probes if probes is not None else self.probes,
+            "hnsw.iterative_scan": self.iterative_scan,
+        }
+        calls = [
+            func.set_config(name, str(value), True) for name, value in search_settings.items() if value is not None
+        ]
+        if calls:
+            await self.db.execute(select(*calls))
+
+    def _ann_distance(self, embedding: VectorLike, dialect_name: str) -> ColumnElement[Any]:
+        """Косинусное расстояние в том виде, в каком оно записано в ANN-индексе."""
+        column = self.orm_class.vector
+        if not (self.ann_halfvec and dialect_name == "postgresql"):
+            return column.op("<=>")(embedding)
+        halfvec = HALFVEC(column.type.dim)
+        return sa_cast(column, halfvec).op("<=>")(literal(embedding, halfvec))
+
     async def list_by_embedding(
         self,
-        embedding: list[float],
+        embedding: VectorLike,
         limit: int,
         filters: Optional[TTypedDict] = None,
+        fields: Optional[Sequence[str]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
     ) -> list[TDomain]:
-        # 1. Базовый select
-        stmt = select(self.orm_class)
-
-        # 2. Применяем фильтры, если есть
-        if filters:
-            conditions = []
-            for key, value in filters.items():
-                column = getattr(self.orm_class, key)
-                if isinstance(value, list):
-                    # column == v1 OR column == v2 OR …
-                    conditions.append(or_(*[column == item for item in value]))
-                else:
-                    conditions.append(column == value)
-            stmt = stmt.filter(*conditions)
+        # 1. Базовый select (только нужные колонки, vector по умолчанию не загружается)
+        stmt = select(*self._columns(fields))
+
+        # 2. Применяем фильтры, если есть (значение-список -> IN)
+        stmt = stmt.filter(*self._filter_conditions(filters))
 
-        # 3. Сортируем по косинусному расстоянию и ограничиваем
-        stmt = stmt.order_by(self.orm_class.vector.op("<=>")(embedding)).limit(limit)
+        # 3. Сортируем по косинусному расстоянию и ограничиваем (использует HNSW-индекс)
+        distance = self._ann_distance(embedding, self.db.get_bind().dialect.name)
+        stmt = stmt.order_by(distance).limit(limit)
 
         # 4. Выполняем и мапим результат
+        try:
+            await self._apply_search_settings(ef_search, probes)
+            result = await self.db.execute(stmt)
+        except SQLAlchemyError as ex:
+            raise RepositoryException(f"Vector search error: {ex}")
+
+        return [self._to_domain(row) for row in result.all()]
+
+
+class LexicalSearchMixin(BaseSQLAlchemyRepo[TDomain, TOrm], Generic[TDomain, TOrm, TTypedDict]):
+    """
+    Лексический поиск: полнотекстовый (tsvector по fulltext_fields) и триграммный (pg_trgm по trigram_field).
+    Выражения совпадают с GIN-индексами миграции, поэтому на PostgreSQL запросы идут по индексу.
+    На остальных диалектах — упрощённый поиск через LIKE.
+    """
+    fulltext_fields: tuple[str, ...] = ()
+    fulltext_config: str = "simple"
+    trigram_field: Optional[str] = None
+
+    def _is_postgres(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def _fulltext_document(self) -> ColumnElement[Any]:
+        # to_tsvector('simple', coalesce(f1, '') || ' ' || coalesce(f2, '')) — ровно как в индексе
+        document: Any = None
+        for field in self.fulltext_fields:
+            part = func.coalesce(getattr(self.orm_class, field), literal_column("''"))
+            document = part if document is None else document + literal_column("' '") + part
+        return func.to_tsvector(literal_column(f"'{self.fulltext_config}'"), document)
+
+    async def _lexical_query(self, stmt: Any) -> list[TDomain]:
         try:
             result = await self.db.execute(stmt)
+        except SQLAlchemyError as ex:
+            raise RepositoryException(f"Lexical search error: {ex}")
+        return [self._to_domain(row) for row in result.all()]
+
+    async def list_by_fulltext(
+        self,
+        query: str,
+        limit: int,
+        filters: Optional[TTypedDict] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> list[TDomain]:
+        stmt = select(*self._columns(fields)).filter(*self._filter_conditions(filters)).limit(limit)
+        if self._is_postgres():
+            document = self._fulltext_document()
+            tsquery = func.websearch_to_tsquery(literal_column(f"'{self.fulltext_config}'"), query)
+            return await self._lexical_query(
+                stmt.filter(document.op("@@")(tsquery)).order_by(func.ts_rank_cd(document, tsquery).desc())
+            )
+
+        words = query.split()
+        if not words:
+            return []
+        for word in words:
+            stmt = stmt.filter(
+                or_(*(getattr(self.orm_class, field).ilike(f"%{word}%") for field in self.fulltext_fields))
+            )
+        return await self._lexical_query(stmt)
+
+    async def list_by_trigram(
+        self,
+        query: str,
+        limit: int,
+        filters: Optional[TTypedDict] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> list[TDomain]:
+        if self.trigram_field is None or not query.strip():
+            return []
+        column = getattr(self.orm_class, self.trigram_field)
+        stmt = select(*self._columns(fields)).filter(*self._filter_conditions(filters)).limit(limit)
+        if self._is_postgres():
+            # word_similarity: запрос (например, домен) похож на часть ссылки; <% использует gin_trgm_ops
+            return await self._lexical_query(
+                stmt.filter(literal(query).op("<%")(column)).order_by(literal(query).op("<<->")(column))
+            )
+        return await self._lexical_query(stmt.filter(column.ilike(f"%{query.strip()}%")).order_by(func.length(column)))
+
+
+class VectorBackfillMixin(BaseSQLAlchemyRepo[TDomain, TOrm], Generic[TDomain, TOrm, TTypedDict]):
+    """
+    Дозаполнение колонки vector фоновыми воркерами.
+    Строки захватываются FOR UPDATE SKIP LOCKED (PostgreSQL), поэтому несколько воркеров делят очередь
+    без двойной работы; блокировки держатся до конца транзакции, в которой вызывается update_vectors.
+    """
+
+    async def claim_missing_vectors(
+        self,
+        limit: int,
+        exclude_ids: Sequence[Any] = (),
+        fields: Optional[Sequence[str]] = None,
+    ) -> list[TDomain]:
+        primary_key = sa_inspect(self.orm_class).primary_key[0]
+        stmt = select(*self._columns(fields)).filter(self.orm_class.vector.is_(None))
+        if exclude_ids:
+            stmt = stmt.filter(primary_key.not_in(exclude_ids))
+        stmt = stmt.order_by(primary_key).limit(limit).with_for_update(skip_locked=True)
+        try:
+            result = await self.db.execute(stmt)
+        except SQLAlchemyError as ex:
+            raise RepositoryException(str(ex))
+        return [self._to_domain(row) for row in result.all()]
+
+    async def update_vectors(self, vectors: Mapping[Any, VectorLike]) -> int:
+        """Записать векторы по первичному ключу одним executemany (ORM bulk UPDATE by primary key)."""
+        if not vectors:
+            return 0
+        pk_name = sa_inspect(self.orm_class).primary_key[0].key
+        try:
+            await self.db.execute(
+                update(self.orm_class),
+                [{pk_name: id, "vector": vector} for id, vector in vectors.items()],
+            )
+        except SQLAlchemyError as ex:
+            raise RepositoryException(str(ex))
+        return len(vectors)
+
+
+class VectorIndexMixin(
+    CreateMixin[TDomain, TOrm, TTypedDict],
+    UpdateMixin[TDomain, TOrm, TTypedDict],
+    DeleteMixin[TDomain, TOrm, TTypedDict],
+    VectorSearchMixin[TDomain, TOrm, TTypedDict],
+    VectorBackfillMixin[TDomain, TOrm, TTypedDict],
+    Generic[TDomain, TOrm, TTypedDict],
+):
+    """
+    Поиск по эмбеддингам через in-process IVectorIndex (например, NumpyVectorIndex) —
+    для бэкендов без pgvector. Партиции индекса грузятся лениво и обновляются на create/update/delete
+    только после commit транзакции сессии; rollback отбрасывает накопленные изменения.
+    Если индекс не передан, работает обычный SQL-поиск VectorSearchMixin.
+    """
+    # Колонка, по значениям которой индекс разбит на партиции (None — одна общая партиция)
+    vector_partition_field: Optional[str] = None
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        domain_model: Type[TDomain],
+        orm_class: Type[TOrm],
+        vector_index: Optional[IVectorIndex] = None,
+    ) -> None:
+        super().__init__(db, domain_model, orm_class)
+        self.vector_index = vector_index
+
+    @property
+    def _pk_name(self) -> str:
+        return sa_inspect(self.orm_class).primary_key[0].key
+
+    def _on_commit(self, change: Callable[[], None]) -> None:
+        """Откладывает изменение индекса до успешного commit текущей транзакции сессии."""
+        session = self.db.sync_session
+        if not event.contains(session, "after_commit", _apply_index_changes):
+            event.listen(session, "after_commit", _apply_index_changes)
+            event.listen(session, "after_transaction_end", _discard_index_changes)
+        session.info.setdefault(_PENDING_INDEX_CHANGES, []).append(change)
+
+    def _partition_of(self, item: Any) -> Any:
+        return getattr(item, self.vector_partition_field) if self.vector_partition_field else None
+
+    def _vector_loader(self, partition: Any) -> VectorLoader:
+        async def loader() -> list[tuple[int, VectorLike]]:
+            primary_key = sa_inspect(self.orm_class).primary_key[0]
+            stmt = select(primary_key, self.orm_class.vector).filter(self.orm_class.vector.is_not(None))
+            if self.vector_partition_field:
+                stmt = stmt.filter(getattr(self.orm_class, self.vector_partition_field) == partition)
+            return [(id, as_float32(vector)) for id, vector in (await self.db.execute(stmt)).tuples()]
+
+        return loader
+
+    async def list_by_embedding(
+        self,
+        embedding: VectorLike,
+        limit: int,
+        filters: Optional[TTypedDict] = None,
+        fields: Optional[Sequence[str]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ) -> list[TDomain]:
+        if self.vector_index is None:
+            return await super().list_by_embedding(embedding, limit, filters, fields, ef_search, probes)
+
+        primary_key = sa_inspect(self.orm_class).primary_key[0]
+        conditions = self._filter_conditions(filters)
+        remaining = dict(cast(Mapping[str, Any], filters or {}))
+        try:
+            # 1. Партиции: из фильтра по partition-полю или все, где есть подходящие строки
+            if self.vector_partition_field is None:
+                partitions: list[Any] = [None]
+            elif self.vector_partition_field in remaining:
+                value = remaining.pop(self.vector_partition_field)
+                partitions = value if isinstance(value, list) else [value]
+            else:
+                column = getattr(self.orm_class, self.vector_partition_field)
+                partitions = list((await self.db.execute(select(column).filter(*conditions).distinct())).scalars())
+
+            # 2. Остальные фильтры — та же семантика, что и в SQL: список разрешённых id
+            allowed_ids = None
+            if remaining:
+                allowed_ids = (await self.db.execute(select(primary_key).filter(*conditions))).scalars().all()
+
+            hits: list[tuple[int, float]] = []
+            for partition in partitions:
+                await self.vector_index.ensure_loaded(partition, self._vector_loader(partition))
+                hits.extend(self.vector_index.search(partition, embedding, limit, allowed_ids, nprobe=probes))
+            hits.sort(key=lambda hit: hit[1])
+            ids = [id for id, _ in hits[:limit]]
+            if not ids:
+                return []
+
+            # 3. Догружаем строки одним запросом и возвращаем в порядке близости
+            if fields and self._pk_name not in fields:
+                fields = [*fields, self._pk_name]
+            result = await self.db.execute(select(*self._columns(fields)).filter(primary_key.in_(ids)))
         except SQLAlchemyError as ex:
             raise RepositoryException(f"Vector search error: {ex}")
 
-        rows = result.scalars().all()
-        return [self.domain_model.model_validate(row) for row in rows]
+        rank = {id: position for position, id in enumerate(ids)}
+        rows = sorted(result.all(), key=lambda row: rank[getattr(row, self._pk_name)])
+        return [self._to_domain(row) for row in rows]
+
+    async def create(self, data: TTypedDict) -> TDomain:
+        created = await super().create(data)
+        vector = cast(Mapping[str, Any], data).get("vector")
+        if self.vector_index is not None and vector is not None:
+            index, partition, id = self.vector_index, self._partition_of(created), getattr(created, self._pk_name)
+            self._on_commit(lambda: index.upsert(partition, id, vector))
+        return created
+
+    async def create_many(
+        self,
+        items: Sequence[TTypedDict],
+        on_conflict: OnConflict = "skip",
+        conflict_columns: Optional[Sequence[str]] = None,
+        chunk_size: int = 500,
+    ) -> BulkCreateResult[TDomain]:
+        report = await super().create_many(items, on_conflict, conflict_columns, chunk_size)
+        if self.vector_index is not None:
+            # пакет может затронуть много строк — проще перечитать затронутые партиции
+            index = self.vector_index
+            partitions = {self._partition_of(item) for item in [*report.created, *report.updated]}
+
+            def apply() -> None:
+                for partition in partitions:
+                    index.invalidate(partition)
+
+            self._on_commit(apply)
+        return report
+
+    async def update(
+        self,
+        data: TTypedDict,
+        filters: Optional[TTypedDict] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> list[TDomain]:
+        values = cast(Mapping[str, Any], data)
+        affects_index = self.vector_index is not None and (
+            "vector" in values or (self.vector_partition_field is not None and self.vector_partition_field in values)
+        )
+        if affects_index and fields:
+            fields = [*fields, self._pk_name, *([self.vector_partition_field] if self.vector_partition_field else [])]
+        updated = await super().update(data, filters, fields)
+        if not affects_index or self.vector_index is None:
+            return updated
+
+        index = self.vector_index
+        vector = values.get("vector")
+        rows = [(self._partition_of(item), getattr(item, self._pk_name)) for item in updated]
+
+        def apply() -> None:
+            index.remove(id for _, id in rows)
+            for partition, id in rows:
+                if vector is not None:
+                    index.upsert(partition, id, vector)
+                elif "vector" not in values:
+                    # сменилась только партиция — вектор в памяти новой партиции неизвестен
+                    index.invalidate(partition)
+
+        self._on_commit(apply)
+        return updated
+
+    async def update_vectors(self, vectors: Mapping[Any, VectorLike]) -> int:
+        updated = await super().update_vectors(vectors)
+        if self.vector_index is None or not vectors:
+            return updated
+
+        primary_key = sa_inspect(self.orm_class).primary_key[0]
+        if self.vector_partition_field is None:
+            partitions = {id: None for id in vectors}
+        else:
+            column = getattr(self.orm_class, self.vector_partition_field)
+            stmt = select(primary_key, column).filter(primary_key.in_(list(vectors)))
+            partitions = dict((await self.db.execute(stmt)).tuples().all())
+        index, vectors = self.vector_index, dict(vectors)
+
+        def apply() -> None:
+            for id, partition in partitions.items():
+                index.upsert(partition, id, vectors[id])
+
+        self._on_commit(apply)
+        return updated
+
+    async def _delete(self, filters: Optional[TTypedDict]) -> list[Any]:
+        ids = await super()._delete(filters)
+        if self.vector_index is not None:
+            index = self.vector_index
+            self._on_commit(lambda: index.remove(ids))
+        return ids
@@ -0,0 +1 @@
+from .numpy_index import NumpyVectorIndex  # noqa: F401
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+from typing import Any, Hashable, Iterable, Optional
+
+import numpy as np
+
+from domain.interfaces.vector_index_ifaces import IVectorIndex, VectorLoader
+from domain.models.vector import VectorLike
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-нормировка по последней оси: после неё косинусная близость — это скалярное произведение."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+class _Partition:
+    """Векторы одной партиции в непрерывной float32-матрице (строки нормированы)."""
+
+    def __init__(self, dim: int, capacity: int = 64) -> None:
+        self.dim = dim
+        self.size = 0
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.matrix = np.empty((capacity, dim), dtype=np.float32)
+        self.positions: dict[int, int] = {}
+        # IVF: центроиды кластеров и номер кластера для каждой строки
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.empty(capacity, dtype=np.int32)
+        self.trained_size = 0
+
+    def _reserve(self, capacity: int) -> None:
+        if capacity <= len(self.ids):
+            return
+        capacity = max(capacity, len(self.ids) * 2)
+        ids = np.empty(capacity, dtype=np.int64)
+        matrix = np.empty((capacity, self.dim), dtype=np.float32)
+        assignments = np.empty(capacity, dtype=np.int32)
+        ids[:self.size] = self.ids[:self.size]
+        matrix[:self.size] = self.matrix[:self.size]
+        assignments[:self.size] = self.assignments[:self.size]
+        self.ids, self.matrix, self.assignments = ids, matrix, assignments
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        assert self.centroids is not None
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def extend(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        """Пакетная загрузка новых id (без проверки на дубликаты)."""
+        self._reserve(self.size + len(ids))
+        rows = slice(self.size, self.size + len(ids))
+        self.ids[rows] = ids
+        self.matrix[rows] = _normalize(vectors)
+        if self.centroids is not None:
+            self.assignments[rows] = self._assign(self.matrix[rows])
+        self.positions.update((int(id), self.size + i) for i, id in enumerate(ids))
+        self.size += len(ids)
+
+    def upsert(self, id: int, vector: np.ndarray) -> None:
+        row = self.positions.get(id)
+        if row is None:
+            self.extend(np.array([id], dtype=np.int64), vector[None, :])
+            return
+        self.matrix[row] = _normalize(vector)
+        if self.centroids is not None:
+            self.assignments[row] = self._assign(self.matrix[row:row + 1])[0]
+
+    def remove(self, id: int) -> None:
+        row = self.positions.pop(id, None)
+        if row is None:
+            return
+        # Переносим последнюю строку на место удалённой — матрица остаётся непрерывной
+        last = self.size - 1
+        if row != last:
+            self.ids[row] = self.ids[last]
+            self.matrix[row] = self.matrix[last]
+            self.assignments[row] = self.assignments[last]
+            self.positions[int(self.ids[row])] = row
+        self.size -= 1
+
+    def train(self, nlist: int, iterations: int = 10, sample_size: int = 256) -> None:
+        """Сферический k-means по выборке строк; затем все строки раскладываются по кластерам."""
+        rng = np.random.default_rng(0)
+        matrix = self.matrix[:self.size]
+        sample = matrix[rng.choice(self.size, size=min(self.size, nlist * sample_size), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = sample[labels == cluster]
+                if len(members):
+                    centroids[cluster] = members.sum(axis=0)
+            centroids = _normalize(centroids)
+        self.centroids = centroids
+        self.assignments[:self.size] = self._assign(matrix)
+        self.trained_size = self.size
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        allowed_ids: Optional[np.ndarray],
+        nprobe: int,
+    ) -> list[tuple[int, float]]:
+        mask: Optional[np.ndarray] = None
+        if self.centroids is not None:
+            nprobe = min(nprobe, len(self.centroids))
+            probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            mask = np.isin(self.assignments[:self.size], probe)
+        if allowed_ids is not None:
+            allowed = np.isin(self.ids[:self.size], allowed_ids)
+            mask = allowed if mask is None else mask & allowed
+
+        if mask is None:
+            rows = None
+            similarities = self.matrix[:self.size] @ query
+        else:
+            rows = np.flatnonzero(mask)
+            similarities = self.matrix[rows] @ query
+
+        k = min(k, len(similarities))
+        if k <= 0:
+            return []
+        # argpartition: O(n) отбор top-k, сортируются только k победителей
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        positions = top if rows is None else rows[top]
+        return [(int(self.ids[pos]), float(1 - sim)) for pos, sim in zip(positions, similarities[top])]
+
+
+class NumpyVectorIndex(IVectorIndex):
+    """
+    In-process индекс на NumPy: brute-force по нормированной float32-матрице партиции,
+    а для больших партиций (>= ivf_min_size при nlist > 0) — IVF с nprobe просматриваемыми кластерами.
+    Индекс живёт в памяти одного процесса и не видит изменения, сделанные другими процессами.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        nlist: int = 0,
+        nprobe: int = 8,
+        ivf_min_size: int = 10_000,
+    ) -> None:
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.ivf_min_size = ivf_min_size
+        self._partitions: dict[Hashable, _Partition] = {}
+        self._owners: dict[int, Hashable] = {}  # id -> партиция
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+        # изменения, пришедшие пока партиция грузится из БД
+        self._pending: dict[Hashable, list[tuple[str, int, Optional[np.ndarray]]]] = {}
+
+    def is_loaded(self, partition: Hashable) -> bool:
+        return partition in self._partitions
+
+    async def ensure_loaded(self, partition: Hashable, loader: VectorLoader) -> None:
+        if partition in self._partitions:
+            return
+        lock = self._locks.setdefault(partition, asyncio.Lock())
+        async with lock:
+            if partition in self._partitions:
+                return
+            self._pending[partition] = []
+            try:
+                items = list(await loader())
+            except BaseException:
+                self._pending.pop(partition, None)
+                raise
+
+            part = _Partition(self.dim, capacity=max(64, len(items)))
+            if items:
+                ids = np.fromiter((id for id, _ in items), dtype=np.int64, count=len(items))
+                vectors = np.asarray([vector for _, vector in items], dtype=np.float32)
+                part.extend(ids, vectors)
+            for id in part.positions:
+                self._owners[id] = partition
+            self._partitions[partition] = part
+
+            for op, id, vector in self._pending.pop(partition):
+                if op == "upsert" and vector is not None:
+                    self.upsert(partition, id, vector)
+                else:
+                    self.remove([id])
+            logger.debug(f"Vector index partition {partition!r} loaded: {part.size} vectors.")
+
+    def upsert(self, partition: Hashable, id: int, vector: VectorLike) -> None:
+        array = np.asarray(vector, dtype=np.float32)
+        if partition in self._pending:
+            self._pending[partition].append(("upsert", id, array))
+        owner = self._owners.get(id)
+        if owner is not None and owner != partition:
+            self.remove([id])
+        part = self._partitions.get(partition)
+        if part is None:
+            return
+        part.upsert(id, array)
+        self._owners[id] = partition
+
+    def remove(self, ids: Iterable[Any]) -> None:
+        for id in ids:
+            id = int(id)
+            for pending in self._pending.values():
+                pending.append(("remove", id, None))
+            owner = self._owners.pop(id, None)
+            if owner is not None and owner in self._partitions:
+                self._partitions[owner].remove(id)
+
+    def invalidate(self, partition: Optional[Hashable] = None) -> None:
+        partitions = list(self._partitions) if partition is None else [partition]
+        for key in partitions:
+            part = self._partitions.pop(key, None)
+            if part is not None:
+                for id in part.positions:
+                    self._owners.pop(id, None)
+
+    def search(
+        self,
+        partition: Hashable,
+        embedding: VectorLike,
+        k: int,
+        allowed_ids: Optional[Iterable[int]] = None,
+        nprobe: Optional[int] = None,
+    ) -> list[tuple[int, float]]:
+        part = self._partitions.get(partition)
+        if part is None or part.size == 0:
+            return []
+        if self.nlist and part.size >= self.ivf_min_size and part.size >= 2 * part.trained_size:
+            # (пере)обучаем IVF, когда партиция выросла вдвое с прошлого обучения
+            part.train(self.nlist)
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        allowed = None if allowed_ids is None else np.fromiter(allowed_ids, dtype=np.int64)
+        return part.search(query, k, allowed, nprobe or self.nprobe)
@@ -8,9 +8,14 @@ from uvicorn.config import Config
 from uvicorn.server import Server
 
 from api.router import router
+from config import settings
 from config.logger import configure_logger
+from domain.services.messages.dependencies import agent_registry_factory
+from domain.services.messages.injector import app_scope, resolve_app_dependency
 from domain.util import stop_event
 from infrastructure.db.db import sessionmanager
+from tasks import task_embedding_backfill
+from telegram.adapter import dispatch_scheduler
 from telegram.runner import run_bots
 
 # from tasks import task_create_admin
@@ -29,6 +34,11 @@ async def lifespan(app: FastAPI):
 
     # shutdown events
     stop_event.set()
+    # сообщения в обработке пользуются клиентами, БД и историей диалогов — дорабатываем их первыми
+    await dispatch_scheduler.aclose(drain_timeout=settings.DISPATCH_DRAIN_TIMEOUT)
+    # app-зависимости закрываются в порядке, обратном созданию: сводки диалогов отменяются, реплики
+    # дописываются в БД, и только потом закрываются клиенты OpenAI и пул соединений
+    await app_scope.aclose()
     await sessionmanager.close()
 
 
@@ -64,9 +74,14 @@ async def run_fastapi():
 
 
 async def main() -> None:
+    # графы агентов компилируются до приёма первых сообщений
+    agent_registry = await resolve_app_dependency(agent_registry_factory)
+    for name, ms in agent_registry.warm_up().items():
+        logger.info(f"Agent {name} is ready ({ms:.1f} ms to build)")
     await asyncio.gather(
         run_fastapi(),
         run_bots(),
+        *([task_embedding_backfill(sessionmanager)] if settings.EMBEDDING_BACKFILL_WORKERS > 0 else []),
         # task_create_admin(sessionmanager),
     )
 
@@ -0,0 +1 @@
+from .embedding_backfill import task_embedding_backfill  # noqa: F401
@@ -0,0 +1,39 @@
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from config import settings
+from domain.interfaces import ILinkRepoProtocol
+from domain.models import EmbeddingBackfillStats, Link
+from domain.services import EmbeddingBackfill
+from domain.services.messages.dependencies import embedding_client_factory, link_vector_index
+from domain.services.messages.injector import resolve_app_dependency
+from domain.util import stop_event
+from infrastructure.db.db import DatabaseSessionManager
+from infrastructure.db.models import LinkORM
+from infrastructure.repositories import LinkRepo
+
+logger = logging.getLogger(__name__)
+
+# Метрики общие на процесс: backlog, число посчитанных векторов, пропускная способность
+embedding_backfill_stats = EmbeddingBackfillStats()
+
+
+async def task_embedding_backfill(sessionmanager: DatabaseSessionManager) -> None:
+    """Фоновое заполнение links.vector; Telegram-хендлеры его никогда не ждут."""
+
+    @asynccontextmanager
+    async def link_repo_scope() -> AsyncIterator[ILinkRepoProtocol[Link]]:
+        async with sessionmanager.session() as session:
+            yield LinkRepo(session, domain_model=Link, orm_class=LinkORM, vector_index=link_vector_index)
+
+    backfill = EmbeddingBackfill(
+        link_repo_scope,
+        await resolve_app_dependency(embedding_client_factory),
+        batch_size=settings.EMBEDDING_BACKFILL_BATCH_SIZE,
+        workers=settings.EMBEDDING_BACKFILL_WORKERS,
+        idle_interval=settings.EMBEDDING_BACKFILL_IDLE_INTERVAL,
+        stats=embedding_backfill_stats,
+    )
+    logger.info(f"Embedding backfill started with {backfill.workers} workers")
+    await backfill.run(stop_event)
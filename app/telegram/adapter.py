@@ -1,8 +1,23 @@
 from aiogram import Dispatcher
 from aiogram.types import Message
 
+from config import settings
+from domain.models import DispatchQueueStats
 from domain.models.message import Message as DomainMessage
 from domain.services.messages.main_router import main_router
+from domain.services.messages.scheduler import ChatDispatchScheduler
+
+from .streaming import ProgressiveMessage
+
+# Один планировщик на все боты процесса: общий лимит одновременной обработки
+dispatch_queue_stats = DispatchQueueStats()
+dispatch_scheduler = ChatDispatchScheduler(
+    main_router.dispatch,
+    max_concurrency=settings.DISPATCH_MAX_CONCURRENCY,
+    max_queue_size=settings.DISPATCH_CHAT_QUEUE_SIZE,
+    overflow=settings.DISPATCH_OVERFLOW_POLICY,
+    stats=dispatch_queue_stats,
+)
 
 
 def apply_dispatcher_adapter(dp: Dispatcher) -> None:
@@ -11,11 +26,20 @@ def apply_dispatcher_adapter(dp: Dispatcher) -> None:
         async def answer_method(answer: DomainMessage) -> None:
             await msg.answer(answer.text)
 
+        async def send(text: str) -> Message:
+            return await msg.answer(text)
+
+        async def edit(sent: Message, text: str) -> None:
+            await sent.edit_text(text)
+
         dm = DomainMessage(
             text=msg.text or "",
             user_id=msg.from_user.id if msg.from_user else None,
             chat_id=msg.chat.id,
             username=msg.from_user.username if msg.from_user else None,
             answer=answer_method,
+            stream_answer=ProgressiveMessage(send, edit, interval=settings.TELEGRAM_STREAM_EDIT_INTERVAL),
         )
-        await main_router.dispatch(dm)
+        # Порядок внутри чата и параллельность между чатами обеспечивает планировщик, а не aiogram
+        if not await dispatch_scheduler.submit(dm):
+            await msg.answer('Слишком много сообщений, подожди, пока я отвечу на предыдущие.')
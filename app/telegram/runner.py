@@ -28,5 +28,6 @@ async def run_bots():
     await stop_task
 
     # корректный останов
+    # принятые сообщения дорабатывает main.lifespan, до закрытия клиентов и БД
     for t in tasks:
         t.cancel()
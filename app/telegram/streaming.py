@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Лимит длины текста одного сообщения Telegram
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+SendFn = Callable[[str], Awaitable[Any]]
+EditFn = Callable[[Any, str], Awaitable[Any]]
+
+
+class ProgressiveMessage:
+    """
+    Потоковый ответ в Telegram: первое сообщение отправляется с первым куском текста,
+    дальше оно правится не чаще раза в interval секунд; финальная правка — по окончании потока.
+
+    Текст длиннее лимита Telegram продолжается новым сообщением. TelegramRetryAfter на промежуточной
+    правке откладывает следующую правку, на финальной — ждём и повторяем.
+    """
+
+    def __init__(
+        self,
+        send: SendFn,
+        edit: EditFn,
+        interval: float = 0.7,
+        max_length: int = TELEGRAM_MAX_MESSAGE_LENGTH,
+    ) -> None:
+        self.send = send
+        self.edit = edit
+        self.interval = interval
+        self.max_length = max_length
+
+    async def _edit(self, handle: Any, text: str, final: bool) -> float:
+        """Правит сообщение; возвращает, сколько секунд Telegram просит не трогать чат."""
+        while True:
+            try:
+                await self.edit(handle, text)
+                return 0.0
+            except TelegramRetryAfter as ex:
+                if not final:
+                    return float(ex.retry_after)
+                await asyncio.sleep(ex.retry_after)
+            except TelegramBadRequest as ex:
+                if 'message is not modified' in ex.message:
+                    return 0.0
+                raise
+
+    async def __call__(self, chunks: AsyncIterator[str]) -> str:
+        parts: list[str] = []
+        current = ''      # текст текущего (последнего) сообщения
+        shown = ''        # что из него уже видит пользователь
+        handle: Any = None
+        next_edit_at = 0.0
+
+        async for chunk in chunks:
+            parts.append(chunk)
+            current += chunk
+            while len(current) > self.max_length:
+                # текущее сообщение заполнено: дописываем его и начинаем следующее
+                head, current = current[:self.max_length], current[self.max_length:]
+                if handle is None:
+                    await self.send(head)
+                elif head != shown:
+                    await self._edit(handle, head, final=True)
+                handle, shown = None, ''
+            if not current.strip():
+                continue
+
+            now = time.monotonic()
+            if handle is None:
+                handle = await self.send(current)
+                shown, next_edit_at = current, now + self.interval
+            elif now >= next_edit_at and current != shown:
+                retry_after = await self._edit(handle, current, final=False)
+                if not retry_after:
+                    shown = current
+                next_edit_at = time.monotonic() + max(self.interval, retry_after)
+
+        if current.strip():
+            if handle is None:
+                await self.send(current)
+            elif current != shown:
+                await self._edit(handle, current, final=True)
+        text = ''.join(parts)
+        if not text.strip():
+            logger.warning('Stream finished without text, nothing was sent')
+        return text
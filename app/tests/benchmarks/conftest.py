@@ -0,0 +1,53 @@
+import statistics
+import time
+from typing import Any, Awaitable, Callable
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from infrastructure.db.db import Base
+from infrastructure.db.models import *  # noqa: F403
+
+TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
+
+
+async def measure(fn: Callable[[], Awaitable[Any]], repeat: int = 20) -> float:
+    """Медианное время выполнения корутины в миллисекундах."""
+    await fn()  # прогрев
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def print_table(title: str, header: list[str], rows: list[list[Any]]) -> None:
+    print(f"\n{title}")
+    print(" | ".join(f"{h:>14}" for h in header))
+    for row in rows:
+        print(" | ".join(f"{v:>14.3f}" if isinstance(v, float) else f"{v:>14}" for v in row))
+
+
+# Каждый бенчмарк получает чистую in-memory БД со схемой приложения
+@pytest.fixture
+async def bench_engine():
+    engine = create_async_engine(
+        TEST_DB_URL,
+        echo=False,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def bench_session(bench_engine):
+    async_session_factory = async_sessionmaker(bench_engine, expire_on_commit=False)
+    async with async_session_factory() as session:  # type: ignore
+        yield session
+
@@ -0,0 +1,36 @@
+import time
+
+import pytest
+
+from domain.models import Message
+from infrastructure.agents import Agent, CachedAgent
+from tests.unit.conftest import EchoChatModel
+
+from .conftest import print_table
+
+# 20 разных запросов, каждый пользователь повторяет их 5 раз (повторная вставка ссылки, «статус» и т.п.)
+QUERIES = [f'https://example.com/{i}' for i in range(20)]
+REPEATS = 5
+
+
+@pytest.mark.benchmark
+async def test_agent_response_cache_on_repeated_queries():
+    agent = Agent(llm=EchoChatModel(token_delay=0.005))
+    cached = CachedAgent(agent)
+
+    async def run(target) -> float:
+        started = time.perf_counter()
+        for _ in range(REPEATS):
+            for query in QUERIES:
+                await target.invoke(Message(text=query, user_id=1))
+        return (time.perf_counter() - started) * 1000 / (REPEATS * len(QUERIES))
+
+    plain_ms = await run(agent)
+    cached_ms = await run(cached)
+    print_table(
+        f"agent.invoke, ms per message ({len(QUERIES)} queries x {REPEATS})",
+        ["strategy", "ms/message", "hit ratio"],
+        [["no cache", plain_ms, 0.0], ["CachedAgent", cached_ms, cached.stats.hit_ratio]],
+    )
+    assert cached.stats.hit_ratio == pytest.approx((REPEATS - 1) / REPEATS)
+    assert cached_ms < plain_ms / 2
@@ -0,0 +1,36 @@
+import time
+
+import pytest
+from langchain_openai import ChatOpenAI
+
+from infrastructure.agents import AgentRegistry, add_link_agent_factory
+
+from .conftest import print_table
+
+MESSAGES = 50
+
+
+@pytest.mark.benchmark
+def test_agent_construction_off_the_message_path():
+    # ChatOpenAI создаётся один раз, как в OpenAIClientRegistry; измеряем компиляцию графа
+    llm = ChatOpenAI(model='gpt-4o-mini', api_key='test')
+
+    started = time.perf_counter()
+    for _ in range(MESSAGES):
+        add_link_agent_factory(llm=llm)
+    per_message_ms = (time.perf_counter() - started) * 1000 / MESSAGES
+
+    registry = AgentRegistry()
+    registry.register('add_link', lambda: add_link_agent_factory(llm=llm))
+    build_ms = registry.warm_up()['add_link']
+    started = time.perf_counter()
+    for _ in range(MESSAGES):
+        registry.get('add_link')
+    registry_ms = (time.perf_counter() - started) * 1000 / MESSAGES
+
+    print_table(
+        f"add_link agent, ms per message ({MESSAGES} messages)",
+        ["strategy", "ms/message", "startup ms"],
+        [["factory per message", per_message_ms, 0.0], ["registry", registry_ms, build_ms]],
+    )
+    assert registry_ms < per_message_ms / 100
@@ -0,0 +1,118 @@
+import asyncio
+import inspect
+from typing import Annotated, get_args, get_origin
+
+import pytest
+
+from domain.services.messages.injector import Depends, service_injector
+
+from .conftest import measure, print_table
+
+CALLS = 1000
+
+
+def legacy_injector(func):
+    """Прежняя реализация: сигнатуры хендлера и зависимостей разбираются на каждый вызов."""
+    def marker(param):
+        if isinstance(param.default, Depends):
+            return param.default
+        if get_origin(param.annotation) is Annotated:
+            for meta in get_args(param.annotation)[1:]:
+                if isinstance(meta, Depends):
+                    return meta
+        return None
+
+    async def wrapper(*args, **kwargs):
+        async_gens = []
+
+        async def resolve_dep(dep_func):
+            if inspect.isgeneratorfunction(dep_func):
+                raise NotImplementedError
+            if inspect.isasyncgenfunction(dep_func):
+                agen = dep_func()
+                val = await agen.__anext__()
+                async_gens.append(agen)
+                return val
+            sig_dep = inspect.signature(dep_func)
+            sig_dep.bind_partial()
+            kwargs_dep = {}
+            for pname, pparam in sig_dep.parameters.items():
+                dep_marker = marker(pparam)
+                if dep_marker is not None:
+                    kwargs_dep[pname] = await resolve_dep(dep_marker.dependency)
+            result = dep_func(**kwargs_dep)
+            if asyncio.iscoroutine(result):
+                result = await result
+            return result
+
+        sig = inspect.signature(func)
+        injections = dict(sig.bind_partial(*args, **kwargs).arguments)
+        for name, param in sig.parameters.items():
+            dep_marker = marker(param)
+            if name in injections or dep_marker is None:
+                continue
+            injections[name] = await resolve_dep(dep_marker.dependency)
+        result = await func(**injections)
+        for agen in reversed(async_gens):
+            try:
+                await agen.__anext__()
+            except StopAsyncIteration:
+                pass
+        return result
+
+    return wrapper
+
+
+SESSIONS = {'opened': 0}
+
+
+# Граф как у хендлеров ссылок: сессия -> репозитории -> сервисы
+async def get_db():
+    SESSIONS['opened'] += 1
+    yield object()
+
+
+def repo_factory(db: Annotated[object, Depends(get_db)]) -> object:
+    return db
+
+
+def cache_repo_factory(db: Annotated[object, Depends(get_db)]) -> object:
+    return db
+
+
+def embedding_service(cache_repo: Annotated[object, Depends(cache_repo_factory)]) -> object:
+    return cache_repo
+
+
+def link_service(
+    repo: Annotated[object, Depends(repo_factory)],
+    embed: Annotated[object, Depends(embedding_service)],
+) -> object:
+    return repo
+
+
+def user_service(repo: Annotated[object, Depends(repo_factory)]) -> object:
+    return repo
+
+
+async def handler(msg: str, links: Annotated[object, Depends(link_service)],
+                  users: Annotated[object, Depends(user_service)]) -> None:
+    pass
+
+
+@pytest.mark.benchmark
+async def test_injector_overhead_per_dispatch():
+    rows = []
+    variants = (('per-call inspect', legacy_injector(handler)), ('precompiled plan', service_injector(handler)))
+    for name, wrapped in variants:
+        async def run(wrapped=wrapped):
+            for _ in range(CALLS):
+                await wrapped('text')
+        ms = await measure(run, repeat=10)
+        SESSIONS['opened'] = 0
+        await wrapped('text')
+        rows.append([name, ms * 1000 / CALLS, SESSIONS['opened']])
+
+    print_table("injector overhead per dispatch, µs", ["injector", "µs/call", "sessions/call"], rows)
+    assert rows[1][1] < rows[0][1] / 2
+    assert rows[1][2] == 1
@@ -0,0 +1,54 @@
+import asyncio
+import time
+from typing import Sequence
+
+import pytest
+
+from infrastructure.clients import MicroBatchingEmbeddingClient
+
+from .conftest import print_table
+
+CALLS = 256
+# типичный round trip до API эмбеддингов; от размера пачки почти не зависит
+LATENCY = 0.05
+
+
+class FakeEmbeddingClient:
+    model = 'fake'
+
+    def __init__(self, max_concurrency: int) -> None:
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.requests = 0
+
+    async def embed(self, text: str) -> list[float]:
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: Sequence[str]) -> list[list[float]]:
+        # лимит одновременных соединений клиента/провайдера
+        async with self._semaphore:
+            self.requests += 1
+            await asyncio.sleep(LATENCY)
+            return [[0.0] for _ in texts]
+
+
+async def throughput(client, calls: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(client.embed(f'text {i}') for i in range(calls)))
+    return calls / (time.perf_counter() - started)
+
+
+@pytest.mark.benchmark
+async def test_micro_batching_throughput():
+    direct_fake = FakeEmbeddingClient(max_concurrency=4)
+    direct = await throughput(direct_fake, CALLS)
+
+    batched_fake = FakeEmbeddingClient(max_concurrency=4)
+    batched = await throughput(MicroBatchingEmbeddingClient(batched_fake, max_concurrency=4), CALLS)
+
+    print_table(
+        f"{CALLS} concurrent embed() calls, {LATENCY * 1000:.0f} ms per request",
+        ["client", "requests", "calls/s"],
+        [["direct", direct_fake.requests, direct], ["micro-batched", batched_fake.requests, batched]],
+    )
+    assert batched_fake.requests < direct_fake.requests / 10
+    assert batched > direct * 5
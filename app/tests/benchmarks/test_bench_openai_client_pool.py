@@ -0,0 +1,102 @@
+import asyncio
+import base64
+import json
+
+import numpy as np
+import pytest
+from openai import AsyncOpenAI
+
+from infrastructure.clients import OpenAIClientRegistry, OpenAIEmbeddingClient
+
+from .conftest import measure, print_table
+
+EMBEDDING = json.dumps({
+    "object": "list",
+    "data": [{
+        "object": "embedding",
+        "index": 0,
+        "embedding": base64.b64encode(np.full(1536, 0.1, dtype=np.float32).tobytes()).decode(),
+    }],
+    "model": "text-embedding-3-small",
+    "usage": {"prompt_tokens": 1, "total_tokens": 1},
+}).encode()
+
+
+class LocalEmbeddingsServer:
+    """Минимальный keep-alive HTTP/1.1 сервер, отвечающий как POST /v1/embeddings."""
+
+    def __init__(self, connect_delay: float) -> None:
+        # имитация TCP+TLS рукопожатия с удалённым API: платится на каждое новое соединение
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self.server: asyncio.Server | None = None
+        self.handlers: set[asyncio.Task] = set()
+
+    async def __aenter__(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def __aexit__(self, *exc) -> None:
+        assert self.server is not None
+        self.server.close()
+        # клиенты «на сообщение» никогда не закрывают свои пулы — соединения закрывает сервер
+        for handler in self.handlers:
+            handler.cancel()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        handler = asyncio.current_task()
+        assert handler is not None
+        self.handlers.add(handler)
+        try:
+            await asyncio.sleep(self.connect_delay)
+            while True:
+                headers = await reader.readuntil(b"\r\n\r\n")
+                length = next(
+                    int(line.split(b":")[1])
+                    for line in headers.split(b"\r\n")
+                    if line.lower().startswith(b"content-length")
+                )
+                await reader.readexactly(length)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(EMBEDDING)}\r\n\r\n".encode()
+                    + EMBEDDING
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.mark.benchmark
+async def test_pooled_client_vs_per_message_client():
+    server = LocalEmbeddingsServer(connect_delay=0.02)
+    async with server as base_url:
+
+        async def per_message():
+            # старое поведение embedding_client_factory: новый AsyncOpenAI (и пул) на каждое сообщение
+            client = OpenAIEmbeddingClient(AsyncOpenAI(api_key="x", base_url=base_url))
+            await client.embed("docker")
+
+        registry = OpenAIClientRegistry(api_key="x", base_url=base_url, http2=False)
+
+        async def pooled():
+            await registry.embedding_client("text-embedding-3-small").embed("docker")
+
+        per_message_ms = await measure(per_message)
+        per_message_connections = server.connections
+        pooled_ms = await measure(pooled)
+        pooled_connections = server.connections - per_message_connections
+        await registry.aclose()
+
+    print_table(
+        "embed() latency against a local server, ms",
+        ["client", "median ms", "connections"],
+        [["per-message", per_message_ms, per_message_connections], ["pooled", pooled_ms, pooled_connections]],
+    )
+    assert pooled_connections == 1
+    assert pooled_ms < per_message_ms
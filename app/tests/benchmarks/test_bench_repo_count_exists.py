@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.models import Link
+from infrastructure.db.models import LinkORM, UserORM
+from infrastructure.repositories import LinkRepo
+
+from .conftest import measure, print_table
+
+SIZES = [500, 2_000, 8_000]
+VECTOR = [0.5] * 1536
+
+
+async def fill_links(session: AsyncSession, total: int) -> None:
+    """Догоняет количество ссылок пользователя 1 до total."""
+    current = len((await session.execute(select(LinkORM.id))).all())
+    rows = [
+        {"user_id": 1, "link": f"https://example.com/{i}", "description": f"link {i}", "vector": VECTOR}
+        for i in range(current, total)
+    ]
+    if rows:
+        await session.execute(insert(LinkORM), rows)
+        await session.commit()
+
+
+@pytest.mark.benchmark
+async def test_count_exists_latency_is_flat(bench_session: AsyncSession):
+    bench_session.add(UserORM(id=1, username="bench", hashed_password="x"))
+    await bench_session.commit()
+    repo = LinkRepo(bench_session, domain_model=Link, orm_class=LinkORM)
+
+    async def legacy_exists():
+        # Старое поведение: поднять все строки вместе с vector и посчитать len()
+        rows = (await bench_session.execute(select(LinkORM).filter_by(user_id=1))).scalars().all()
+        bench_session.expunge_all()
+        return len(rows) > 0
+
+    results = []
+    for size in SIZES:
+        await fill_links(bench_session, size)
+        exists_ms = await measure(lambda: repo.exists(filters={"user_id": 1}))
+        count_ms = await measure(lambda: repo.count(filters={"user_id": 1}))
+        legacy_ms = await measure(legacy_exists, repeat=3)
+        results.append([size, exists_ms, count_ms, legacy_ms])
+
+    print_table("exists()/count() latency, ms", ["rows", "exists", "count", "legacy select+len"], results)
+
+    # EXISTS ... LIMIT 1 не зависит от размера таблицы, материализация растёт линейно
+    smallest, largest = results[0], results[-1]
+    assert largest[1] < max(smallest[1] * 3, 1.0)
+    assert largest[1] < largest[3] and largest[2] < largest[3]
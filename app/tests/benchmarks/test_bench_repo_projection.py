@@ -0,0 +1,58 @@
+import random
+import tracemalloc
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.models import Link
+from infrastructure.db.models import LinkORM, UserORM
+from infrastructure.repositories import LinkRepo
+
+from .conftest import measure, print_table
+
+ROWS = 2_000
+ALL_FIELDS = ["id", "user_id", "link", "description", "title", "created_at", "pull_count", "vector"]
+
+
+async def peak_memory_kb(fn) -> float:
+    tracemalloc.start()
+    await fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+@pytest.mark.benchmark
+async def test_deferred_vector_projection(bench_session: AsyncSession):
+    bench_session.add(UserORM(id=1, username="bench", hashed_password="x"))
+    rnd = random.Random(0)
+    await bench_session.execute(
+        insert(LinkORM),
+        [
+            {
+                "user_id": 1,
+                "link": f"https://example.com/{i}",
+                "description": f"link {i}",
+                "vector": [rnd.random() for _ in range(1536)],
+            }
+            for i in range(ROWS)
+        ],
+    )
+    await bench_session.commit()
+    repo = LinkRepo(bench_session, domain_model=Link, orm_class=LinkORM)
+
+    variants = {
+        "with vector": lambda: repo.list(filters={"user_id": 1}, fields=ALL_FIELDS),
+        "default (deferred)": lambda: repo.list(filters={"user_id": 1}),
+        "fields=[description]": lambda: repo.list(filters={"user_id": 1}, fields=["description"]),
+    }
+    results = []
+    for name, fn in variants.items():
+        results.append([name, await measure(fn, repeat=5), await peak_memory_kb(fn)])
+    print_table(f"list() over {ROWS} rows", ["variant", "ms", "peak KiB"], results)
+
+    with_vector, deferred, projected = results
+    assert deferred[1] * 10 < with_vector[1]
+    assert deferred[2] * 10 < with_vector[2]
+    assert projected[2] < deferred[2]
@@ -0,0 +1,83 @@
+import re
+
+import pytest
+
+from domain.models import Message
+from domain.services.messages.domain_router import DomainMessageRouter
+from domain.services.messages.filters import Command, Regex
+from domain.services.messages.injector import service_injector
+
+from .conftest import measure, print_table
+
+SIZES = (10, 100, 500)
+MESSAGES = 200
+
+
+async def noop(msg: Message):
+    pass
+
+
+def legacy_routes(size: int) -> list:
+    """Маршруты «как раньше»: лямбды с re.compile на каждый вызов и сравнением текста."""
+    handler = service_injector(noop)
+    routes = []
+    for i in range(size):
+        routes.append((lambda m, i=i: m.text.lower() in [f'cmd{i}', f'команда{i}'], handler))
+    routes.append((lambda m: bool(re.compile(r'https?://\S+').search(m.text)), handler))
+    routes.append((lambda m: True, handler))
+    return routes
+
+
+async def legacy_dispatch(routes: list, dm: Message) -> None:
+    for filter_fn, handler in routes:
+        if filter_fn(dm):
+            await handler(dm)
+            return
+
+
+def compiled_router(size: int) -> DomainMessageRouter:
+    router = DomainMessageRouter()
+    child = DomainMessageRouter()
+    router.include_router(child)
+    for i in range(size):
+        child.message(Command(f'cmd{i}', f'команда{i}'))(noop)
+    child.message(Regex(r'https?://\S+'))(noop)
+    child.message()(noop)
+    router.compile()
+    return router
+
+
+@pytest.mark.benchmark
+async def test_router_dispatch_scales_with_handlers():
+    messages = [
+        Message(text=text)
+        for i in range(MESSAGES // 4)
+        for text in (f'cmd{i % 10}', 'see https://example.com', 'просто текст', f'КОМАНДА{i % 10}')
+    ]
+    rows = []
+    compiled_timings = []
+    for size in SIZES:
+        routes = legacy_routes(size)
+        router = compiled_router(size)
+
+        async def run_legacy():
+            for dm in messages:
+                await legacy_dispatch(routes, dm)
+
+        async def run_compiled():
+            for dm in messages:
+                await router.dispatch(dm)
+
+        legacy_ms = await measure(run_legacy)
+        compiled_ms = await measure(run_compiled)
+        compiled_timings.append(compiled_ms)
+        rows.append([size, legacy_ms, compiled_ms, legacy_ms / compiled_ms])
+
+    print_table(
+        f"{len(messages)} messages dispatched, ms",
+        ["handlers", "linear", "compiled", "speedup"],
+        rows,
+    )
+    # время диспетчеризации не должно расти линейно с числом обработчиков
+    assert compiled_timings[-1] < compiled_timings[0] * 3
+    assert rows[-1][2] < rows[-1][1]
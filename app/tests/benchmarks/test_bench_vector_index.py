@@ -0,0 +1,115 @@
+"""
+Recall и латентность HNSW по float16-копии векторов против точного поиска по float32.
+
+Индекс повторяет ix_links_vector_halfvec_hnsw, ANN идёт по тому же выражению vector::halfvec(n),
+что и VectorSearchMixin с ann_halfvec, точный поиск — по самой колонке.
+
+Нужен PostgreSQL с pgvector:
+    export BENCH_POSTGRES_URL=postgresql+asyncpg://dev:dev@db/dev
+    pytest -m benchmark -s tests/benchmarks/test_bench_vector_index.py
+Размеры таблицы задаются BENCH_VECTOR_SIZES (по умолчанию 10000,100000,1000000).
+"""
+import os
+import random
+import statistics
+import time
+
+import pytest
+from pgvector.sqlalchemy import HALFVEC, Vector
+from sqlalchemy import TextClause, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from .conftest import print_table
+
+BENCH_POSTGRES_URL = os.getenv("BENCH_POSTGRES_URL")
+SIZES = [int(size) for size in os.getenv("BENCH_VECTOR_SIZES", "10000,100000,1000000").split(",")]
+DIM = 1536
+QUERIES = 50
+TOP_K = 10
+EF_SEARCH = [40, 100, 200]
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(not BENCH_POSTGRES_URL, reason="BENCH_POSTGRES_URL is not set"),
+]
+
+EXACT_SQL = text(
+    f"SELECT id FROM bench_vectors ORDER BY vector <=> :q LIMIT {TOP_K}"
+).bindparams(bindparam("q", type_=Vector(DIM)))
+ANN_SQL = text(
+    f"SELECT id FROM bench_vectors ORDER BY vector::halfvec({DIM}) <=> :q LIMIT {TOP_K}"
+).bindparams(bindparam("q", type_=HALFVEC(DIM)))
+
+
+async def fill(conn: AsyncConnection, start: int, stop: int, batch: int = 10_000) -> None:
+    for offset in range(start, stop, batch):
+        await conn.execute(
+            text(
+                "INSERT INTO bench_vectors (vector) "
+                f"SELECT (SELECT array_agg(random()) FROM generate_series(1, {DIM}) WHERE g > 0)::vector "
+                "FROM generate_series(:start, :stop) AS g"
+            ),
+            {"start": offset, "stop": min(offset + batch, stop) - 1},
+        )
+        await conn.commit()
+
+
+async def search(
+    conn: AsyncConnection, sql: TextClause, query: list[float], setting: str
+) -> tuple[list[int], float]:
+    async with conn.begin():
+        await conn.execute(text(setting))
+        started = time.perf_counter()
+        ids = list((await conn.execute(sql, {"q": query})).scalars())
+        elapsed = (time.perf_counter() - started) * 1000
+    return ids, elapsed
+
+
+async def test_hnsw_recall_and_latency():
+    engine = create_async_engine(BENCH_POSTGRES_URL, echo=False)  # type: ignore[arg-type]
+    rnd = random.Random(0)
+    queries = [[rnd.random() for _ in range(DIM)] for _ in range(QUERIES)]
+    rows = []
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            await conn.execute(text("DROP TABLE IF EXISTS bench_vectors"))
+            await conn.execute(text(f"CREATE TABLE bench_vectors (id bigserial PRIMARY KEY, vector vector({DIM}))"))
+            await conn.commit()
+
+            filled = 0
+            for size in SIZES:
+                await conn.execute(text("DROP INDEX IF EXISTS ix_bench_vectors_halfvec_hnsw"))
+                await fill(conn, filled, size)
+                filled = size
+
+                started = time.perf_counter()
+                await conn.execute(
+                    text(
+                        "CREATE INDEX ix_bench_vectors_halfvec_hnsw ON bench_vectors "
+                        f"USING hnsw ((vector::halfvec({DIM})) halfvec_cosine_ops) WITH (m = 16, ef_construction = 64)"
+                    )
+                )
+                await conn.execute(text("ANALYZE bench_vectors"))
+                await conn.commit()
+                build_s = time.perf_counter() - started
+
+                exact = [await search(conn, EXACT_SQL, q, "SET LOCAL enable_indexscan = off") for q in queries]
+                rows.append([size, "exact", build_s, statistics.median(t for _, t in exact), 1.0])
+                for ef in EF_SEARCH:
+                    approx = [await search(conn, ANN_SQL, q, f"SET LOCAL hnsw.ef_search = {ef}") for q in queries]
+                    recall = statistics.mean(
+                        len(set(ids) & set(truth)) / TOP_K for (ids, _), (truth, _) in zip(approx, exact)
+                    )
+                    rows.append([size, f"hnsw ef={ef}", build_s, statistics.median(t for _, t in approx), recall])
+
+            await conn.execute(text("DROP TABLE bench_vectors"))
+            await conn.commit()
+    finally:
+        await engine.dispose()
+
+    print_table(
+        f"top-{TOP_K} cosine search, halfvec HNSW, dim={DIM}",
+        ["rows", "mode", "index build s", "median ms", f"recall@{TOP_K}"],
+        rows,
+    )
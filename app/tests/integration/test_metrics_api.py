@@ -0,0 +1,37 @@
+import pytest
+from httpx import AsyncClient
+
+from domain.services.messages.dependencies import agent_cache_stats, embedding_cache_stats, link_search_stats
+from tasks.embedding_backfill import embedding_backfill_stats
+
+from .test_utils import UserToken
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_read_metrics(client: AsyncClient, user_token: UserToken, monkeypatch: pytest.MonkeyPatch):
+    # without token
+    response = await client.get("/api/v1/metrics")
+    assert response.status_code == 403
+
+    monkeypatch.setattr(agent_cache_stats, "exact_hits", 3)
+    monkeypatch.setattr(agent_cache_stats, "misses", 1)
+    monkeypatch.setattr(link_search_stats, "stages", {})
+    link_search_stats.observe("ann", 10.0)
+    link_search_stats.observe("ann", 20.0)
+    monkeypatch.setattr(embedding_cache_stats, "memory_hits", 1)
+    monkeypatch.setattr(embedding_cache_stats, "misses", 1)
+    monkeypatch.setattr(embedding_backfill_stats, "embedded", 50)
+    monkeypatch.setattr(embedding_backfill_stats, "busy_seconds", 2.0)
+
+    response = await client.get("/api/v1/metrics", headers={"TOKEN": user_token["token"]})
+    assert response.status_code == 200
+    metrics = response.json()
+
+    # производные метрики отдаются вместе с сырыми счётчиками
+    assert metrics["agent_cache"]["hits"] == 3
+    assert metrics["agent_cache"]["hit_ratio"] == pytest.approx(0.75)
+    assert "avg_ms" in metrics["agent_cache"]["lookup"]
+    assert metrics["link_search"]["stages"]["ann"]["avg_ms"] == pytest.approx(15.0)
+    assert metrics["embedding_cache"]["hit_rate"] == pytest.approx(0.5)
+    assert metrics["embedding_backfill"]["throughput"] == pytest.approx(25.0)
@@ -1,6 +1,11 @@
+import asyncio
+from typing import Any
 from unittest.mock import AsyncMock, Mock
 
 import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.pool import StaticPool
@@ -12,6 +17,37 @@ Base = declarative_base()
 TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
 
 
+class EchoChatModel(GenericFakeChatModel):
+    """
+    Чат-модель для тестов агентов: отвечает «echo: <текст пользователя>», в потоке — по слову
+    с задержкой token_delay. bind_tools ничего не меняет, инструменты не вызываются.
+    """
+
+    messages: Any = iter(())
+    token_delay: float = 0.01
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    @staticmethod
+    def _reply(messages) -> str:
+        return f'echo: {messages[-1].content}'
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.token_delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        words = self._reply(messages).split(' ')
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.token_delay)
+            token = word if i == 0 else f' {word}'
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
 # Фикстура для асинхронного движка с использованием StaticPool для in-memory SQLite
 @pytest.fixture(scope="module")
 async def async_engine():
@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+from conftest import EchoChatModel
+
+from domain.models import Message
+from infrastructure.agents import Agent, AgentRegistry
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_agent_is_built_once_and_shared_between_concurrent_messages():
+    builds = 0
+
+    def factory() -> Agent:
+        nonlocal builds
+        builds += 1
+        return Agent(system_message='test', tools=[], llm=EchoChatModel())
+
+    registry = AgentRegistry()
+    registry.register('echo', factory)
+    assert set(registry.warm_up()) == {'echo'}
+    assert registry.build_ms['echo'] > 0
+
+    agents = [registry.get('echo') for _ in range(10)]
+    assert all(agent is agents[0] for agent in agents)
+    assert builds == 1
+
+    # у каждого вызова своё состояние графа
+    answers = await asyncio.gather(*(agent.invoke(Message(text=f'q{i}')) for i, agent in enumerate(agents)))
+    assert [answer.text for answer in answers] == [f'echo: q{i}' for i in range(10)]
+
+
+@pytest.mark.unit
+def test_registry_rejects_unknown_and_duplicate_agents():
+    registry = AgentRegistry()
+    registry.register('echo', lambda: Agent(llm=EchoChatModel()))
+    with pytest.raises(ValueError):
+        registry.register('echo', lambda: Agent(llm=EchoChatModel()))
+    with pytest.raises(KeyError):
+        registry.get('missing')
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from typing import AsyncIterator
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import EditMessageText
+from conftest import EchoChatModel
+
+from domain.models import Message
+from infrastructure.agents import Agent
+from telegram.streaming import ProgressiveMessage
+
+
+class FakeChat:
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+        self.edits = 0
+        self.first_visible_at: float | None = None
+        self.retry_after_once = False
+
+    async def send(self, text: str) -> int:
+        if self.first_visible_at is None:
+            self.first_visible_at = time.monotonic()
+        self.messages.append(text)
+        return len(self.messages) - 1
+
+    async def edit(self, handle: int, text: str) -> None:
+        if self.retry_after_once:
+            self.retry_after_once = False
+            raise TelegramRetryAfter(EditMessageText(text=text), 'Flood control', retry_after=0)
+        self.edits += 1
+        self.messages[handle] = text
+
+
+async def tokens(words: list[str], delay: float) -> AsyncIterator[str]:
+    for word in words:
+        await asyncio.sleep(delay)
+        yield word
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_agent_streams_model_tokens():
+    agent = Agent(system_message='test', tools=[], llm=EchoChatModel(token_delay=0))
+
+    chunks = [chunk async for chunk in agent.stream(Message(text='add https://example.com please'))]
+
+    assert len(chunks) > 1
+    assert ''.join(chunks) == 'echo: add https://example.com please'
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_progressive_message_shows_first_chunk_and_throttles_edits():
+    chat = FakeChat()
+    words = [f'w{i} ' for i in range(20)]
+    progressive = ProgressiveMessage(chat.send, chat.edit, interval=0.05)
+
+    started = time.monotonic()
+    text = await progressive(tokens(words, delay=0.01))
+    finished = time.monotonic()
+
+    assert text == ''.join(words)
+    assert chat.messages == [text]
+    # первое сообщение появилось с первым куском, а не после всего ответа
+    assert chat.first_visible_at is not None
+    assert chat.first_visible_at - started < (finished - started) / 4
+    # ~0.2 с потока при интервале 0.05 с: правок заметно меньше, чем кусков
+    assert 1 <= chat.edits <= 8
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_progressive_message_splits_long_text_and_survives_flood_control():
+    chat = FakeChat()
+    chat.retry_after_once = True
+    progressive = ProgressiveMessage(chat.send, chat.edit, interval=0, max_length=10)
+
+    text = await progressive(tokens(['0123', '4567', '89ab', 'cdef', 'gh'], delay=0))
+
+    assert text == '0123456789abcdefgh'
+    assert chat.messages == ['0123456789', 'abcdefgh']
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_answer_stream_falls_back_to_single_answer():
+    answers: list[str] = []
+
+    async def answer(msg: Message) -> None:
+        answers.append(msg.text)
+
+    dm = Message(text='hi', answer=answer)
+    assert await dm.answer_stream(tokens(['a', 'b', 'c'], delay=0)) == 'abc'
+    assert answers == ['abc']
@@ -0,0 +1,181 @@
+import asyncio
+from typing import AsyncIterator
+
+import numpy as np
+import pytest
+
+from domain.interfaces import IAgent
+from domain.models import Context, Message
+from infrastructure.agents import CachedAgent, dialogue_state, normalize_query
+
+
+class FakeAgent(IAgent):
+    def __init__(self, tool_calls: list[str] = []) -> None:
+        self.calls = 0
+        self.tool_calls = tool_calls
+
+    async def invoke(self, msg: Message) -> Message:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        for name in self.tool_calls:
+            msg.data.setdefault('tool_calls', []).append(name)
+        return Message(text=f'answer #{self.calls} to {msg.text}')
+
+    async def stream(self, msg: Message) -> AsyncIterator[str]:
+        response = await self.invoke(msg)
+        for word in response.text.split(' '):
+            yield word + ' '
+
+
+class BagOfWordsEmbedding:
+    """Эмбеддинг по словам запроса: перестановка слов даёт тот же вектор, другие слова — далёкий."""
+    model = 'bag-of-words'
+    dimensions = 64
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def embed(self, text: str) -> np.ndarray:
+        self.calls += 1
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in text.split():
+            vector[sum(map(ord, word)) % self.dimensions] += 1
+        return vector
+
+
+def message(text: str, user_id: int = 1, context: list[Context] = [], summary: str | None = None) -> Message:
+    return Message(text=text, user_id=user_id, chat_id=user_id, context=context, summary=summary)
+
+
+def turn(user_text: str, jarvis_text: str) -> Context:
+    return Context(username='user', user_text=user_text, jarvis_text=jarvis_text)
+
+
+@pytest.mark.unit
+def test_normalize_query():
+    assert normalize_query('  Статус!  ') == 'статус'
+    assert normalize_query('Add   https://example.com ?') == 'add https://example.com'
+    # регистр в ссылке значим
+    assert normalize_query('ADD https://Example.com/Path') == 'add https://Example.com/Path'
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_exact_hit_is_per_user():
+    inner = FakeAgent()
+    agent = CachedAgent(inner)
+
+    first = await agent.invoke(message('What is new?'))
+    assert (await agent.invoke(message('what is   new'))).text == first.text
+    assert inner.calls == 1
+    # другой пользователь чужой ответ не получает
+    assert (await agent.invoke(message('What is new?', user_id=2))).text != first.text
+    assert inner.calls == 2
+
+    assert agent.stats.exact_hits == 1
+    assert agent.stats.misses == 2
+    assert agent.stats.hit_ratio == pytest.approx(1 / 3)
+    assert agent.stats.saved_ms > 5
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_entries_expire_after_ttl():
+    inner = FakeAgent()
+    agent = CachedAgent(inner, ttl=0.05)
+    await agent.invoke(message('hello'))
+    await asyncio.sleep(0.06)
+    await agent.invoke(message('hello'))
+    assert inner.calls == 2
+    assert agent.stats.expired == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_semantic_hit_above_threshold():
+    inner = FakeAgent()
+    embedding = BagOfWordsEmbedding()
+    agent = CachedAgent(inner, embedding_client=embedding, similarity_threshold=0.95)
+
+    # у пользователя нет записей — запрос не эмбеддится до ответа агента
+    first = await agent.invoke(message('show my saved links'))
+    assert embedding.calls == 1
+    assert (await agent.invoke(message('my saved links show'))).text == first.text
+    assert agent.stats.semantic_hits == 1
+    await agent.invoke(message('delete everything now'))
+    assert inner.calls == 2
+    assert agent.stats.misses == 2
+    # эмбеддинг промаха переиспользуется для записи
+    assert embedding.calls == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_mutating_tool_calls_are_not_cached_and_reset_user_cache():
+    inner = FakeAgent()
+    agent = CachedAgent(inner, mutating_tools=frozenset({'add_link_tool'}))
+    await agent.invoke(message('list links'))
+
+    inner.tool_calls = ['add_link_tool']
+    await agent.invoke(message('https://example.com'))
+    await agent.invoke(message('https://example.com'))
+    assert inner.calls == 3
+    assert agent.stats.skipped == 2
+
+    # после изменения данных прежний ответ устарел
+    inner.tool_calls = []
+    await agent.invoke(message('list links'))
+    assert inner.calls == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_stream_hit_and_interrupted_stream_is_not_cached():
+    inner = FakeAgent()
+    agent = CachedAgent(inner)
+
+    chunks = [chunk async for chunk in agent.stream(message('tell me a joke'))]
+    assert [chunk async for chunk in agent.stream(message('Tell me a joke!'))] == [''.join(chunks)]
+    assert inner.calls == 1
+
+    stream = agent.stream(message('another one'))
+    await stream.__anext__()
+    await stream.aclose()
+    await agent.invoke(message('another one'))
+    assert inner.calls == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_follow_up_is_keyed_by_dialogue_context():
+    inner = FakeAgent()
+    agent = CachedAgent(inner, embedding_client=BagOfWordsEmbedding())
+    delete_all = [turn('clean up', 'Delete all links?')]
+    add_link = [turn('https://example.com', 'Add this link?')]
+
+    first = await agent.invoke(message('yes', context=delete_all))
+    # тот же ответ «да» в другом разговоре — другой запрос
+    assert (await agent.invoke(message('yes', context=add_link))).text != first.text
+    assert (await agent.invoke(message('yes', summary='talked about deletion'))).text != first.text
+    assert inner.calls == 3
+    # в том же контексте — попадание
+    assert (await agent.invoke(message('Yes!', context=delete_all))).text == first.text
+    assert dialogue_state(message('yes')) == ''
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_urls_match_exactly_only():
+    inner = FakeAgent()
+    embedding = BagOfWordsEmbedding()
+    # порог 0 — любой запрос без ссылки был бы семантическим попаданием
+    agent = CachedAgent(inner, embedding_client=embedding, similarity_threshold=0.0)
+
+    await agent.invoke(message('https://example.com/a'))
+    await agent.invoke(message('https://example.com/b'))
+    await agent.invoke(message('https://example.com/A'))
+    assert inner.calls == 3
+    assert (await agent.invoke(message('https://example.com/a'))).text == 'answer #1 to https://example.com/a'
+    assert agent.stats.semantic_hits == 0
+    # запросы со ссылками не эмбеддятся вовсе
+    assert embedding.calls == 0
@@ -0,0 +1,111 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from domain.models import Context, ConversationEntry, Message
+from domain.services import ConversationStore, select_history
+from infrastructure.agents import Agent
+from infrastructure.db.db import Base
+from infrastructure.db.models import ConversationMessageORM
+from infrastructure.repositories import ConversationRepo
+
+
+@pytest.fixture
+async def conversation_db():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[ConversationMessageORM.__table__])
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    queries: list[str] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_queries(conn, cursor, statement, *args):
+        queries.append(statement)
+
+    @asynccontextmanager
+    async def repo_scope():
+        async with sessionmaker() as session:
+            yield ConversationRepo(session, domain_model=ConversationEntry, orm_class=ConversationMessageORM)
+            await session.commit()
+
+    async def stored() -> int:
+        async with sessionmaker() as session:
+            return (await session.execute(select(func.count()).select_from(ConversationMessageORM))).scalar_one()
+
+    yield repo_scope, queries, stored
+    await engine.dispose()
+
+
+def entry(i: int) -> Context:
+    return Context(username='user', user_text=f'question {i}', jarvis_text=f'answer {i}')
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_ring_buffer_lru_and_reload_with_one_query(conversation_db):
+    repo_scope, queries, stored = conversation_db
+    store = ConversationStore(repo_scope, ring_size=3, max_chats=2, flush_batch=100)
+
+    for i in range(5):
+        await store.append(1, entry(i))
+    await store.append(2, entry(100))
+    # память на чат ограничена кольцевым буфером
+    assert [e.user_text for e in await store.history(1)] == ['question 2', 'question 3', 'question 4']
+    assert await stored() == 0
+
+    await store.append(3, entry(200))  # вытесняет самый давний чат (2)
+    assert store.stats.evictions == 1
+    assert await stored() == 0
+
+    # несохранённые реплики чата пишутся в БД перед его загрузкой, иначе история потеряется
+    queries.clear()
+    history = await store.history(2)
+    selects = [q for q in queries if q.lstrip().upper().startswith('SELECT')]
+    assert [e.user_text for e in history] == ['question 100']
+    assert await stored() == 7
+    assert len(selects) == 1
+    assert 'ORDER BY conversation_messages.id DESC' in selects[0]
+    assert 'LIMIT' in selects[0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_entries_are_written_in_batches(conversation_db):
+    repo_scope, _, stored = conversation_db
+    store = ConversationStore(repo_scope, flush_batch=3, flush_interval=3600)
+
+    await store.append(7, entry(0))
+    await store.append(7, entry(1))
+    assert await stored() == 0
+    await store.append(7, entry(2))
+    assert await stored() == 3
+    await store.append(7, entry(3))
+    await store.flush()
+    assert await stored() == 4
+    assert store.stats.flushed == 4
+
+    # новый процесс: история поднимается из БД
+    fresh = ConversationStore(repo_scope)
+    assert [e.user_text for e in await fresh.history(7)] == [f'question {i}' for i in range(4)]
+
+
+@pytest.mark.unit
+def test_history_is_trimmed_to_token_budget_newest_first():
+    entries = [Context(username='u', user_text='x' * 40, jarvis_text='y' * 40) for _ in range(10)]
+    # ~11 + 11 токенов на реплику
+    assert len(select_history(entries, max_tokens=50)) == 2
+    assert select_history(entries, max_tokens=50) == entries[-2:]
+    assert select_history(entries, max_tokens=5) == []
+
+
+@pytest.mark.unit
+def test_agent_input_contains_history_before_query():
+    msg = Message(text='and now?', context=[entry(1)])
+    assert Agent._input(msg) == {
+        "messages": [("human", 'question 1'), ("ai", 'answer 1'), ("human", 'and now?')]
+    }
@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+
+from domain.models import Message
+from domain.services.messages.scheduler import ChatDispatchScheduler
+
+
+class RecordingDispatch:
+    def __init__(self, delay: float = 0.01) -> None:
+        self.delay = delay
+        self.handled: list[tuple[int | None, str]] = []
+        self.active = 0
+        self.peak = 0
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, dm: Message) -> None:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await self.gate.wait()
+            await asyncio.sleep(self.delay)
+            if dm.text == 'boom':
+                raise ValueError('handler failed')
+            self.handled.append((dm.chat_id, dm.text))
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_chats_are_ordered_parallel_and_capped():
+    dispatch = RecordingDispatch()
+    scheduler = ChatDispatchScheduler(dispatch, max_concurrency=3, max_queue_size=100)
+
+    for i in range(5):
+        for chat_id in range(6):
+            assert await scheduler.submit(Message(text=str(i), chat_id=chat_id))
+    await scheduler.join()
+
+    for chat_id in range(6):
+        assert [text for chat, text in dispatch.handled if chat == chat_id] == ['0', '1', '2', '3', '4']
+    # разные чаты шли параллельно, но не больше лимита
+    assert dispatch.peak == 3
+    stats = scheduler.stats
+    assert stats.submitted == stats.dispatched == 30
+    assert stats.depth == 0 and stats.in_flight == 0 and stats.active_chats == 0
+    assert stats.max_depth > 0
+    assert stats.wait.count == 30 and stats.wait.max_ms > 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_slow_chat_does_not_block_others_and_errors_do_not_stop_the_queue():
+    dispatch = RecordingDispatch(delay=0)
+    scheduler = ChatDispatchScheduler(dispatch, max_concurrency=2)
+
+    async def slow(dm: Message) -> None:
+        if dm.chat_id == 1:
+            await asyncio.sleep(10)
+        await dispatch(dm)
+
+    scheduler.dispatch = slow
+    await scheduler.submit(Message(text='agent call', chat_id=1))
+    await scheduler.submit(Message(text='boom', chat_id=2))
+    await scheduler.submit(Message(text='after error', chat_id=2))
+    await asyncio.sleep(0.05)
+
+    assert dispatch.handled == [(2, 'after error')]
+    assert scheduler.stats.failed == 1
+    await scheduler.aclose()
+    assert scheduler.stats.in_flight == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_overflow_policies():
+    dispatch = RecordingDispatch(delay=0)
+    dispatch.gate.clear()
+
+    reject = ChatDispatchScheduler(dispatch, max_queue_size=2, overflow='reject')
+    results = [await reject.submit(Message(text=str(i), chat_id=1)) for i in range(4)]
+    assert results == [True, True, False, False]
+    await asyncio.sleep(0)
+    # первое сообщение забрал воркер — в очереди освободилось место
+    assert await reject.submit(Message(text='4', chat_id=1)) is True
+    assert await reject.submit(Message(text='5', chat_id=1)) is False
+    assert reject.stats.rejected == 3
+
+    drop = ChatDispatchScheduler(dispatch, max_queue_size=2, overflow='drop_oldest')
+    for i in range(5):
+        assert await drop.submit(Message(text=f'd{i}', chat_id=2))
+
+    block = ChatDispatchScheduler(dispatch, max_queue_size=1, overflow='block')
+    await block.submit(Message(text='b0', chat_id=3))
+    await asyncio.sleep(0)
+    await block.submit(Message(text='b1', chat_id=3))
+    blocked = asyncio.create_task(block.submit(Message(text='b2', chat_id=3)))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    dispatch.gate.set()
+    assert await blocked
+    await asyncio.gather(reject.join(), drop.join(), block.join())
+
+    assert [text for chat, text in dispatch.handled if chat == 1] == ['0', '1', '4']
+    assert [text for chat, text in dispatch.handled if chat == 2] == ['d3', 'd4']
+    assert drop.stats.dropped == 3
+    assert [text for chat, text in dispatch.handled if chat == 3] == ['b0', 'b1', 'b2']
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_aclose_drains_accepted_messages_then_cancels_the_rest():
+    dispatch = RecordingDispatch(delay=0.01)
+    scheduler = ChatDispatchScheduler(dispatch, max_concurrency=2)
+    for text in ('first', 'second'):
+        await scheduler.submit(Message(text=text, chat_id=1))
+
+    # принятые сообщения дорабатываются, новые уже не принимаются
+    await scheduler.aclose(drain_timeout=1.0)
+    assert dispatch.handled == [(1, 'first'), (1, 'second')]
+    assert not await scheduler.submit(Message(text='late', chat_id=1))
+    assert scheduler.stats.rejected == 1
+
+    # что не успело за drain_timeout, отменяется
+    dispatch = RecordingDispatch()
+    dispatch.gate.clear()
+    scheduler = ChatDispatchScheduler(dispatch)
+    await scheduler.submit(Message(text='stuck', chat_id=1))
+    await scheduler.submit(Message(text='queued', chat_id=1))
+    await asyncio.sleep(0)
+    await scheduler.aclose(drain_timeout=0.02)
+    assert dispatch.handled == []
+    assert scheduler.stats.in_flight == 0
+    assert scheduler.stats.depth == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_aclose_releases_blocked_submitters():
+    dispatch = RecordingDispatch()
+    dispatch.gate.clear()
+    scheduler = ChatDispatchScheduler(dispatch, max_queue_size=1, overflow='block')
+    await scheduler.submit(Message(text='stuck', chat_id=1))
+    await asyncio.sleep(0)
+    await scheduler.submit(Message(text='queued', chat_id=1))
+    blocked = asyncio.create_task(scheduler.submit(Message(text='blocked', chat_id=1)))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    # ждущий места submit не зависает после остановки, а получает отказ
+    await asyncio.wait_for(scheduler.aclose(drain_timeout=0.02), timeout=1.0)
+    assert await asyncio.wait_for(blocked, timeout=1.0) is False
+    assert dispatch.handled == []
+    assert scheduler.stats.rejected == 1
+    assert scheduler.stats.active_chats == 0
+    assert scheduler.stats.depth == 0
@@ -0,0 +1,213 @@
+import pytest
+
+from domain.exceptions import MessageRouterException
+from domain.models import Message
+from domain.services.messages.domain_router import DomainMessageRouter
+from domain.services.messages.filters import Command, MessageFilter, Regex
+
+
+def build_tree(calls: list[str], filter_calls: list[str]):
+    def counting_url_filter(msg: Message) -> bool:
+        filter_calls.append(msg.text)
+        return 'http' in msg.text
+
+    middleware = DomainMessageRouter()
+    child = DomainMessageRouter()
+    main = DomainMessageRouter()
+    main.include_middleware(middleware)
+    main.include_router(child)
+
+    @middleware.message()
+    async def auth(msg: Message):
+        calls.append('auth')
+
+    @child.message(Command('status', 'статус'))
+    async def status(msg: Message):
+        calls.append('status')
+
+    @child.message(counting_url_filter)
+    async def by_agent(msg: Message):
+        calls.append('agent')
+        raise MessageRouterException('agent is unavailable')
+
+    @child.message(counting_url_filter)
+    async def by_algorithm(msg: Message):
+        calls.append('algorithm')
+
+    @child.message(Regex(r'^\d+$'))
+    async def number(msg: Message):
+        calls.append('number')
+
+    @child.message()
+    async def fallback(msg: Message):
+        calls.append('fallback')
+
+    return main, child
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_compiled_dispatch_keeps_routing_semantics():
+    calls: list[str] = []
+    filter_calls: list[str] = []
+    main, _ = build_tree(calls, filter_calls)
+    main.compile()
+
+    await main.dispatch(Message(text=' Статус '))
+    assert calls == ['auth', 'status']
+    # текст-команда не проверяет остальные фильтры до найденного маршрута
+    assert filter_calls == []
+
+    calls.clear()
+    await main.dispatch(Message(text='see https://example.com'))
+    assert calls == ['auth', 'agent', 'algorithm']
+    # общий фильтр двух маршрутов посчитан один раз на сообщение
+    assert filter_calls == ['see https://example.com']
+
+    calls.clear()
+    await main.dispatch(Message(text='42'))
+    await main.dispatch(Message(text='hello'))
+    assert calls == ['auth', 'number', 'auth', 'fallback']
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_routes_added_after_compile_are_picked_up():
+    calls: list[str] = []
+    main, _ = build_tree(calls, [])
+    main.compile()
+
+    # собственные маршруты роутера проверяются раньше маршрутов вложенных роутеров
+    @main.message(Command('ping'))
+    async def ping(msg: Message):
+        calls.append('ping')
+
+    await main.dispatch(Message(text='ping'))
+    assert calls == ['auth', 'ping']
+
+
+@pytest.mark.unit
+def test_regex_filters_share_compiled_pattern():
+    assert Regex(r'https?://\S+').regex is Regex(r'https?://\S+').regex
+    assert Regex(r'https?://\S+').key == Regex(r'https?://\S+').key
+
+
+@pytest.mark.unit
+def test_message_filter_requires_check():
+    class KeyOnly(MessageFilter):
+        key = 'key-only'
+
+    with pytest.raises(TypeError):
+        KeyOnly()  # type: ignore[abstract]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_one_session_per_message_under_concurrent_dispatch():
+    import asyncio
+    from typing import Annotated
+
+    from domain.services.messages.injector import Depends
+
+    opened = 0
+    active = 0
+    peak = 0
+
+    async def get_session():
+        nonlocal opened, active, peak
+        opened += 1
+        active += 1
+        peak = max(peak, active)
+        try:
+            yield object()
+        finally:
+            active -= 1
+
+    def user_service(db: Annotated[object, Depends(get_session)]) -> object:
+        return db
+
+    def link_service(db: Annotated[object, Depends(get_session)]) -> object:
+        return db
+
+    middleware = DomainMessageRouter()
+    main = DomainMessageRouter()
+    main.include_middleware(middleware)
+
+    @middleware.message()
+    async def auth(msg: Message, users: Annotated[object, Depends(user_service)]):
+        msg.data['session'] = users
+        await asyncio.sleep(0.001)
+
+    @main.message()
+    async def handle(msg: Message, links: Annotated[object, Depends(link_service)]):
+        assert links is msg.data['session']
+        await asyncio.sleep(0.001)
+
+    messages = 50
+    await asyncio.gather(*(main.dispatch(Message(text=f'm{i}')) for i in range(messages)))
+    assert opened == messages
+    assert peak <= messages
+    assert active == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_pool_checkouts_return_to_zero_after_errors_and_cancellation(tmp_path):
+    import asyncio
+    from typing import Annotated
+
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from domain.exceptions import NotFoundError
+    from domain.services.messages.injector import Depends
+    from infrastructure.db.db import DatabaseSessionManager
+
+    manager = DatabaseSessionManager(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", {"pool_size": 5, "max_overflow": 100, "pool_timeout": 2},
+    )
+    pool = manager.engine.pool
+
+    async def get_db():
+        async with manager.session() as session:
+            yield session
+
+    middleware = DomainMessageRouter()
+    main = DomainMessageRouter()
+    main.include_middleware(middleware)
+
+    @middleware.message()
+    async def auth(msg: Message, db: Annotated[AsyncSession, Depends(get_db)]):
+        await db.execute(text('select 1'))
+        if msg.text.startswith('unknown'):
+            # как auth_middleware для незнакомого пользователя
+            raise NotFoundError('Я тебя не знаю')
+
+    @main.message()
+    async def handle(msg: Message, db: Annotated[AsyncSession, Depends(get_db)]):
+        await db.execute(text('select 1'))
+        if msg.text.startswith('broken'):
+            raise ValueError('handler failed')
+        if msg.text.startswith('slow'):
+            entered.release()
+            await asyncio.sleep(10)
+
+    messages = 200
+    kinds = ('ok', 'unknown', 'broken', 'slow')
+    entered = asyncio.Semaphore(0)
+    tasks = [
+        asyncio.create_task(main.dispatch(Message(text=f'{kinds[i % 4]} {i}')))
+        for i in range(messages)
+    ]
+    # отменяем, когда все медленные хендлеры уже держат сессию
+    for _ in range(messages // 4):
+        await entered.acquire()
+    for task in tasks:
+        task.cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert any(isinstance(result, NotFoundError) for result in results)
+    assert any(isinstance(result, ValueError) for result in results)
+    assert any(isinstance(result, asyncio.CancelledError) for result in results)
+    assert pool.checkedout() == 0
+    await manager.close()
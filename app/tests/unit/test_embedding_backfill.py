@@ -0,0 +1,84 @@
+from contextlib import asynccontextmanager
+from typing import TypedDict
+
+import pytest
+from conftest import Base
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Integer, String, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, mapped_column
+
+from domain.models import Link
+from domain.services import EmbeddingBackfill
+from infrastructure.repositories.sqlalchemy_mixins import CountMixin, VectorIndexMixin
+from infrastructure.vector_index import NumpyVectorIndex
+
+
+class BackfillDummyORM(Base):
+    __tablename__ = "backfill_dummy"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer)
+    link: Mapped[str] = mapped_column(String)
+    description: Mapped[str] = mapped_column(String)
+    title: Mapped[str] = mapped_column(String, nullable=True)
+    vector: Mapped[list[float]] = mapped_column(Vector(2), nullable=True)
+
+
+class BackfillDummyTyped(TypedDict, total=False):
+    id: int
+    user_id: int
+    vector: list[float] | None
+
+
+class BackfillDummyRepo(
+    VectorIndexMixin[Link, BackfillDummyORM, BackfillDummyTyped],
+    CountMixin[Link, BackfillDummyORM, BackfillDummyTyped],
+):
+    deferred_fields = ("vector",)
+    vector_partition_field = "user_id"
+
+
+class FakeEmbeddingClient:
+    model = 'fake'
+
+    async def embed(self, text: str) -> list[float]:
+        if 'broken' in text:
+            raise ValueError('input rejected')
+        return [1.0, float(len(text))]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_backfill_embeds_missing_vectors_and_defers_failures(async_session: AsyncSession):
+    await async_session.execute(delete(BackfillDummyORM))
+    await async_session.execute(insert(BackfillDummyORM), [
+        {'user_id': 1, 'link': f'https://example.com/{i}', 'description': 'broken' if i == 2 else f'link {i}'}
+        for i in range(5)
+    ] + [{'user_id': 1, 'link': 'https://example.com/done', 'description': 'done', 'vector': [0.0, 1.0]}])
+    await async_session.commit()
+    index = NumpyVectorIndex(dim=2)
+
+    @asynccontextmanager
+    async def repo_scope():
+        yield BackfillDummyRepo(async_session, Link, BackfillDummyORM, vector_index=index)
+        await async_session.commit()
+
+    backfill = EmbeddingBackfill(repo_scope, FakeEmbeddingClient(), batch_size=3)
+    async with repo_scope() as repo:
+        assert len(await repo.list_by_embedding([1.0, 10.0], limit=10, filters={'user_id': 1})) == 1
+
+    assert await backfill.refresh_backlog() == 5
+    assert await backfill.run_batch() == 3
+    assert await backfill.run_batch() == 2
+    # строка с ошибкой отложена (backoff) и не захватывается повторно
+    assert await backfill.run_batch() == 0
+
+    missing = (await async_session.execute(
+        select(BackfillDummyORM.description).filter(BackfillDummyORM.vector.is_(None))
+    )).scalars().all()
+    assert missing == ['broken']
+    assert backfill.stats.embedded == 4 and backfill.stats.failed == 1
+    assert await backfill.refresh_backlog() == 1
+
+    # уже загруженная партиция in-process индекса получает новые векторы без перечитывания
+    assert len(index.search(1, [1.0, 10.0], k=10)) == 5
@@ -0,0 +1,103 @@
+import base64
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+
+from domain.exceptions import NotFoundError
+from domain.models import EmbeddingCacheEntry, EmbeddingCacheStats, Link
+from domain.services.embedding_service import EmbeddingService, embedding_cache_key
+from infrastructure.clients import OpenAIEmbeddingClient
+from infrastructure.embedding_cache import LRUEmbeddingCache
+
+
+def make_client() -> AsyncMock:
+    client = AsyncMock()
+    client.model = 'test-model'
+    client.dimensions = None
+    client.embed.side_effect = lambda text: np.array([len(text), 1.0], dtype=np.float32)
+    return client
+
+
+def repo_scope(repository: AsyncMock):
+    @asynccontextmanager
+    async def scope():
+        yield repository
+
+    return scope
+
+
+@pytest.mark.unit
+def test_lru_cache_bounds_entries_bytes_and_ttl(monkeypatch):
+    cache = LRUEmbeddingCache(max_entries=3, max_bytes=4 * 4 * 2, ttl=10)
+    cache.set('a', [1.0] * 4)
+    cache.set('b', [2.0] * 4)
+    assert cache.get('a').tolist() == [1.0] * 4
+    assert not cache.get('a').flags.writeable
+    # третий вектор превышает лимит по байтам — вытесняется самый давно использованный ('b')
+    cache.set('c', [3.0] * 4)
+    assert len(cache) == 2 and cache.nbytes == 32
+    assert cache.get('b') is None
+    assert cache.evictions == 1
+
+    now = time.monotonic()
+    monkeypatch.setattr('infrastructure.embedding_cache.lru_cache.time.monotonic', lambda: now + 11)
+    assert cache.get('a') is None
+    assert len(cache) == 1
+
+
+@pytest.mark.unit
+def test_cache_key_normalizes_whitespace_and_depends_on_model():
+    assert embedding_cache_key('m', '  docker\tcompose ') == embedding_cache_key('m', 'docker compose')
+    assert embedding_cache_key('m', 'docker') != embedding_cache_key('other', 'docker')
+    assert embedding_cache_key('m', 'docker') != embedding_cache_key('m', 'docker', dimensions=512)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_embed_uses_memory_then_persistent_tier():
+    client = make_client()
+    repository = AsyncMock()
+    repository.read.side_effect = NotFoundError
+    stats = EmbeddingCacheStats()
+    service = EmbeddingService(client, memory_cache=LRUEmbeddingCache(), repo_scope=repo_scope(repository), stats=stats)
+
+    assert (await service.embed('docker')).tolist() == [6.0, 1.0]
+    assert (await service.embed(' docker ')).tolist() == [6.0, 1.0]
+    client.embed.assert_awaited_once()
+    repository.create_many.assert_awaited_once()
+    assert (stats.memory_hits, stats.misses) == (1, 1)
+
+    # новый процесс: LRU пуст, эмбеддинг берётся из таблицы
+    key = embedding_cache_key('test-model', 'docker')
+    repository.read.side_effect = None
+    repository.read.return_value = EmbeddingCacheEntry(key=key, model='test-model', vector=[6.0, 1.0])
+    service = EmbeddingService(client, memory_cache=LRUEmbeddingCache(), repo_scope=repo_scope(repository), stats=stats)
+    assert (await service.embed('docker')).tolist() == [6.0, 1.0]
+    client.embed.assert_awaited_once()
+    assert stats.persistent_hits == 1
+    assert stats.hit_rate == 2 / 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_openai_client_decodes_base64_into_float32():
+    vectors = [np.array([0.25, -1.5, 3.0], dtype=np.float32), np.array([1.0, 0.0, 0.5], dtype=np.float32)]
+    openai = AsyncMock()
+    openai.embeddings.create.return_value = SimpleNamespace(data=[
+        SimpleNamespace(index=1, embedding=base64.b64encode(vectors[1].tobytes()).decode()),
+        SimpleNamespace(index=0, embedding=base64.b64encode(vectors[0].tobytes()).decode()),
+    ])
+    client = OpenAIEmbeddingClient(openai, dimensions=3)
+
+    embeddings = await client.embed_many(['a', 'b'])
+
+    assert [embedding.dtype for embedding in embeddings] == [np.float32, np.float32]
+    assert [embedding.tolist() for embedding in embeddings] == [vector.tolist() for vector in vectors]
+    assert openai.embeddings.create.call_args.kwargs['dimensions'] == 3
+    link = Link(id=1, user_id=1, link='https://example.com', vector=embeddings[0])
+    assert link.vector is not None and link.vector.dtype == np.float32
+    assert link.model_dump()['vector'] == [0.25, -1.5, 3.0]
@@ -0,0 +1,146 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from domain.interfaces import IConversationSummarizer
+from domain.models import Context, Message
+from domain.services import HistoryCompactor
+from domain.services.conversation_store import approx_tokens, context_tokens
+from infrastructure.agents import Agent, LLMConversationSummarizer
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def turn(i: int) -> Context:
+    return Context(
+        date=START + timedelta(seconds=i), username='user', user_text=f'question {i} ' + 'x' * 80,
+        jarvis_text=f'answer {i} ' + 'y' * 80,
+    )
+
+
+class FakeSummarizer(IConversationSummarizer):
+    """Сводка фиксированной длины; release позволяет держать пересчёт «в процессе»."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, list[Context]]] = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def summarize(self, summary: str, entries: list[Context], max_tokens: int) -> str:
+        self.calls.append((summary, entries))
+        await self.release.wait()
+        return f'summary up to {entries[-1].user_text.split()[1]} ' + 'z' * 200
+
+
+def prompt_tokens(history) -> int:
+    return (approx_tokens(history.summary) if history.summary else 0) + sum(
+        context_tokens(entry) for entry in history.recent
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_prompt_size_stays_bounded_for_long_conversation():
+    summarizer = FakeSummarizer()
+    compactor = HistoryCompactor(summarizer, max_tokens=1_000, summary_tokens=200, keep_recent_tokens=400)
+    entries: list[Context] = []
+    sizes = []
+    for i in range(300):
+        entries = (entries + [turn(i)])[-50:]  # кольцевой буфер ConversationStore
+        history = compactor.compact(1, entries)
+        sizes.append(prompt_tokens(history))
+        await compactor.join()
+
+    assert max(sizes) <= 1_000
+    # после первой сводки размер промпта колеблется между keep_recent_tokens + сводка и порогом пересчёта
+    # и не растёт с длиной разговора
+    assert min(sizes[100:]) >= 400
+    assert abs(max(sizes[100:200]) - max(sizes[200:])) < 50
+    assert compactor.stats.completed > 1
+    # инкрементально: каждый пересчёт получает прошлую сводку и только новые реплики
+    folded = [int(entry.user_text.split()[1]) for _, chunk in summarizer.calls for entry in chunk]
+    assert folded == sorted(set(folded))
+    assert summarizer.calls[1][0].startswith('summary up to')
+
+    history = compactor.compact(1, entries)
+    assert history.summary is not None
+    assert history.recent[-1] is entries[-1]
+    covered = int(history.summary.split()[3])
+    assert history.recent[0].user_text.startswith(f'question {covered + 1} ')
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_summary_is_computed_in_background_one_task_per_chat():
+    summarizer = FakeSummarizer()
+    summarizer.release.clear()
+    compactor = HistoryCompactor(summarizer, max_tokens=1_000, summary_tokens=200, keep_recent_tokens=400)
+    entries = [turn(i) for i in range(30)]
+
+    # ответ не ждёт LLM: пока сводки нет, в промпт идут только свежие реплики в пределах бюджета
+    history = compactor.compact(1, entries)
+    assert history.summary is None
+    assert prompt_tokens(history) <= 1_000
+    assert history.recent[-1] is entries[-1]
+    compactor.compact(1, entries + [turn(30)])
+    await asyncio.sleep(0)
+    assert len(summarizer.calls) == 1
+    assert compactor.stats.scheduled == 1
+
+    summarizer.release.set()
+    await compactor.join()
+    history = compactor.compact(1, entries)
+    assert history.summary is not None and history.summary.startswith('summary up to')
+    assert compactor.stats.folded == len(summarizer.calls[0][1])
+    # другой чат своей сводки не видит
+    assert compactor.compact(2, entries[:2]).summary is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_failed_summary_keeps_history_and_retries():
+    class BrokenSummarizer(IConversationSummarizer):
+        calls = 0
+
+        async def summarize(self, summary, entries, max_tokens):
+            self.calls += 1
+            raise RuntimeError('llm is down')
+
+    summarizer = BrokenSummarizer()
+    compactor = HistoryCompactor(summarizer, max_tokens=1_000, summary_tokens=200, keep_recent_tokens=400)
+    entries = [turn(i) for i in range(30)]
+    for _ in range(2):
+        history = compactor.compact(1, entries)
+        await compactor.join()
+        assert history.summary is None and history.recent
+    assert summarizer.calls == 2
+    assert compactor.stats.failed == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_llm_summarizer_sends_previous_summary_and_new_turns():
+    llm = FakeListChatModel(responses=['  user likes python  '])
+    summarizer = LLMConversationSummarizer(llm)
+    sent = []
+    original = llm.ainvoke
+
+    async def ainvoke(messages, *args, **kwargs):
+        sent.append(messages)
+        return await original(messages, *args, **kwargs)
+
+    object.__setattr__(llm, 'ainvoke', ainvoke)
+    assert await summarizer.summarize('old summary', [turn(1)], max_tokens=100) == 'user likes python'
+    system, human = sent[0]
+    assert '75' in system[1]
+    assert 'old summary' in human[1] and 'question 1' in human[1]
+
+
+@pytest.mark.unit
+def test_agent_input_starts_with_summary():
+    msg = Message(text='and now?', context=[turn(5)], summary='we talked about links')
+    messages = Agent._input(msg)["messages"]
+    assert messages[0] == ("system", "Краткое содержание предыдущего разговора: we talked about links")
+    assert messages[-1] == ("human", 'and now?')
@@ -0,0 +1,225 @@
+from typing import Annotated
+
+import pytest
+
+from domain.services.messages import injector
+from domain.services.messages.injector import Depends, ProviderKind, resolve_app_dependency, service_injector
+
+
+def build_handler(events: list[str]):
+    def sync_resource():
+        events.append('sync enter')
+        yield 'sync'
+        events.append('sync exit')
+
+    async def async_resource():
+        events.append('async enter')
+        yield 'async'
+        events.append('async exit')
+
+    async def service(
+        first: Annotated[str, Depends(sync_resource)],
+        second: str = Depends(async_resource),
+    ) -> str:
+        return f'{first}+{second}'
+
+    def repo(db: Annotated[str, Depends(async_resource)]) -> str:
+        return f'repo({db})'
+
+    async def handler(
+        text: str,
+        svc: Annotated[str, Depends(service)],
+        rep: Annotated[str, Depends(repo)],
+    ) -> str:
+        events.append('handler')
+        return f'{text}:{svc}:{rep}'
+
+    return handler
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_plan_is_built_once_and_executed_per_call(monkeypatch):
+    events: list[str] = []
+    wrapped = service_injector(build_handler(events))
+
+    plan = wrapped.injection_plan
+    assert [step.kind for step in plan.steps] == [
+        ProviderKind.SYNC_GEN, ProviderKind.ASYNC_GEN, ProviderKind.COROUTINE, ProviderKind.PLAIN,
+    ]
+    # async_resource нужен и service, и repo, но в плане у него один шаг
+    assert plan.steps[3].args == (('db', 1),)
+    assert [target.name for target in plan.targets] == ['svc', 'rep']
+
+    # на вызов сигнатуры больше не разбираются
+    def forbidden(*args, **kwargs):
+        raise AssertionError('inspect.signature called per message')
+    monkeypatch.setattr(injector.inspect, 'signature', forbidden)
+
+    assert await wrapped('hi') == 'hi:sync+async:repo(async)'
+    assert events == [
+        'sync enter', 'async enter', 'handler', 'async exit', 'sync exit',
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_explicit_arguments_skip_resolution():
+    events: list[str] = []
+    wrapped = service_injector(build_handler(events))
+
+    assert await wrapped('hi', svc='given', rep='given') == 'hi:given:given'
+    assert events == ['handler']
+
+
+@pytest.mark.unit
+def test_cyclic_dependency_is_rejected_at_decoration():
+    def a(b=None):
+        return b
+
+    def b(value: Annotated[str, Depends(a)]):
+        return value
+
+    a.__defaults__ = (Depends(b),)
+
+    async def handler(value: Annotated[str, Depends(a)]):
+        return value
+
+    with pytest.raises(RuntimeError):
+        service_injector(handler)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_dispatch_scope_shares_dependencies_between_handlers():
+    opened: list[object] = []
+    closed: list[object] = []
+
+    async def get_session():
+        session = object()
+        opened.append(session)
+        yield session
+        closed.append(session)
+
+    def repo(db: Annotated[object, Depends(get_session)]) -> object:
+        return db
+
+    def fresh_repo(db: Annotated[object, Depends(get_session, use_cache=False)]) -> object:
+        return db
+
+    @service_injector
+    async def middleware(msg: str, db: Annotated[object, Depends(get_session)]) -> object:
+        return db
+
+    @service_injector
+    async def handler(msg: str, via_repo: Annotated[object, Depends(repo)],
+                      fresh: Annotated[object, Depends(fresh_repo)]) -> tuple[object, object]:
+        assert closed == []
+        return via_repo, fresh
+
+    async with injector.dispatch_scope():
+        shared = await middleware('hi')
+        via_repo, fresh = await handler('hi')
+
+    assert via_repo is shared
+    assert fresh is not shared
+    assert len(opened) == 2
+    assert closed == [fresh, shared]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_dispatch_scope_passes_error_into_generators():
+    events: list[str] = []
+
+    async def get_session():
+        try:
+            yield 'session'
+            events.append('commit')
+        except ValueError:
+            events.append('rollback')
+            raise
+
+    @service_injector
+    async def handler(db: Annotated[str, Depends(get_session)]):
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        await handler()
+    assert events == ['rollback']
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_app_scope_creates_provider_once_and_finalizes_on_shutdown():
+    import asyncio
+
+    events: list[str] = []
+
+    async def heavy_client():
+        events.append('create')
+        await asyncio.sleep(0.001)
+        yield object()
+        events.append('close')
+
+    def transient() -> object:
+        return object()
+
+    @service_injector
+    async def handler(
+        client: Annotated[object, Depends(heavy_client, scope='app')],
+        first: Annotated[object, Depends(transient, scope='transient')],
+        second: Annotated[object, Depends(transient, use_cache=False)],
+    ) -> object:
+        assert first is not second
+        return client
+
+    try:
+        clients = await asyncio.gather(*(handler() for _ in range(10)))
+        assert all(client is clients[0] for client in clients)
+        assert events == ['create']
+    finally:
+        await injector.app_scope.aclose()
+    assert events == ['create', 'close']
+
+
+@pytest.mark.unit
+def test_app_dependency_cannot_capture_dispatch_dependency():
+    async def get_session():
+        yield object()
+
+    def repo(db: Annotated[object, Depends(get_session)]) -> object:
+        return db
+
+    async def handler(value: Annotated[object, Depends(repo, scope='app')]):
+        return value
+
+    with pytest.raises(RuntimeError):
+        service_injector(handler)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_resolve_app_dependency_shares_instance_with_handlers():
+    events: list[str] = []
+
+    async def client():
+        yield object()
+        events.append('client closed')
+
+    async def store(value: Annotated[object, Depends(client, scope='app')]):
+        yield value
+        # зависимые app-провайдеры закрываются раньше тех, от кого зависят
+        events.append('store flushed')
+
+    @service_injector
+    async def handler(value: Annotated[object, Depends(store, scope='app')]) -> object:
+        return value
+
+    try:
+        resolved = await resolve_app_dependency(store)
+        assert await handler() is resolved
+        assert events == []
+    finally:
+        await injector.app_scope.aclose()
+    assert events == ['store flushed', 'client closed']
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+
+from domain.exceptions import NotFoundError
+from domain.models import Link, RerankWeights, User
+from domain.services.link_service import LinkService
+from domain.services.ranking import reciprocal_rank_fusion
+
+USER = User(id=1, username='user')
+
+
+def make_link(id: int, vector: list[float] | None = None, pull_count: int = 0, age_days: float = 0) -> Link:
+    return Link(
+        id=id,
+        user_id=USER.id,
+        link=f'https://example.com/{id}',
+        description=f'link {id}',
+        vector=vector,
+        pull_count=pull_count,
+        created_at=datetime.now(timezone.utc) - timedelta(days=age_days),
+    )
+
+
+def make_service(
+    fulltext: list[Link], trigram: list[Link], semantic: list[Link], embed_delay: float = 0
+) -> LinkService:
+    async def embed(text: str) -> list[float]:
+        await asyncio.sleep(embed_delay)
+        return [0.0, 1.0]
+
+    repository = AsyncMock()
+    repository.list_by_fulltext.return_value = fulltext
+    repository.list_by_trigram.return_value = trigram
+    repository.list_by_embedding.return_value = semantic
+    embed_service = AsyncMock()
+    embed_service.embed.side_effect = embed
+    return LinkService(repository=repository, embed_service=embed_service, embed_timeout=0.05)
+
+
+@pytest.mark.unit
+def test_rrf_prefers_items_found_by_several_rankers():
+    a, b, c = make_link(1), make_link(2), make_link(3)
+    merged = reciprocal_rank_fusion([[a, b], [c, b], [b]], key=lambda link: link.id)
+    assert [link.id for link in merged] == [2, 1, 3]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_hybrid_find_merges_lexical_and_semantic():
+    a, c = make_link(1, vector=[1.0, 1.0]), make_link(3, vector=[0.0, 1.0])
+    service = make_service(fulltext=[a], trigram=[], semantic=[a, c])
+
+    links = await service.find(USER, 'python asyncio docs', limit=2)
+
+    assert [link.id for link in links] == [1, 3]
+    service.repository.list_by_embedding.assert_awaited_once()
+    assert set(service.search_stats.stages) == {'lexical', 'embed', 'ann', 'rerank'}
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_semantic_find_reranks_ann_candidates_with_boosts():
+    # ANN вернул кандидатов в «приблизительном» порядке; rerank считает точный косинус и бусты
+    far = make_link(1, vector=[1.0, 0.2])
+    exact = make_link(2, vector=[0.0, 1.0], age_days=3650)
+    popular = make_link(3, vector=[0.1, 1.0], pull_count=50)
+    without_vector = make_link(4)
+    service = make_service(fulltext=[], trigram=[], semantic=[far, without_vector, exact, popular])
+
+    links = await service.find(USER, 'query', mode='semantic', limit=3, depth=50)
+    assert [link.id for link in links] == [3, 2, 1]
+    assert service.repository.list_by_embedding.call_args.kwargs['limit'] == 50
+    assert 'vector' in service.repository.list_by_embedding.call_args.kwargs['fields']
+
+    links = await service.find(USER, 'query', mode='semantic', limit=3, weights=RerankWeights(
+        pull_count_weight=0, recency_weight=0,
+    ))
+    assert [link.id for link in links] == [2, 3, 1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_hybrid_find_falls_back_to_lexical_on_slow_embedding():
+    a = make_link(1)
+    service = make_service(fulltext=[a], trigram=[a], semantic=[make_link(2)], embed_delay=1)
+
+    links = await service.find(USER, 'python asyncio docs')
+
+    assert [link.id for link in links] == [1]
+    service.repository.list_by_embedding.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_short_query_with_lexical_hits_skips_embedding():
+    a = make_link(1)
+    service = make_service(fulltext=[], trigram=[a], semantic=[make_link(2)])
+
+    links = await service.find(USER, 'github.com')
+
+    assert [link.id for link in links] == [1]
+    service.repository.list_by_embedding.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_find_without_results_raises():
+    service = make_service(fulltext=[], trigram=[], semantic=[])
+
+    with pytest.raises(NotFoundError):
+        await service.find(USER, 'nothing', mode='lexical')
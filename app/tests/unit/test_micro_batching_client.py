@@ -0,0 +1,75 @@
+import asyncio
+from typing import Sequence
+
+import pytest
+
+from infrastructure.clients import MicroBatchingEmbeddingClient
+
+
+class FakeEmbeddingClient:
+    model = 'fake'
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: list[list[str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def embed(self, text: str) -> list[float]:
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: Sequence[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if 'bad' in texts:
+                raise ValueError('bad input')
+            return [[float(len(text))] for text in texts]
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_concurrent_calls_are_coalesced():
+    fake = FakeEmbeddingClient(latency=0.01)
+    client = MicroBatchingEmbeddingClient(fake, max_batch=64, max_delay=0.005, max_concurrency=2)
+    texts = [f'text {i}' for i in range(150)]
+
+    results = await asyncio.gather(*(client.embed(text) for text in texts))
+
+    assert results == [[float(len(text))] for text in texts]
+    assert len(fake.calls) == 3
+    assert max(len(call) for call in fake.calls) == 64
+    assert fake.max_in_flight <= 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_failed_item_does_not_fail_the_batch():
+    fake = FakeEmbeddingClient()
+    client = MicroBatchingEmbeddingClient(fake, max_delay=0.005)
+
+    results = await asyncio.gather(client.embed('ok'), client.embed('bad'), client.embed('ok'), return_exceptions=True)
+
+    assert results[0] == results[2] == [2.0]
+    assert isinstance(results[1], ValueError)
+    # первая попытка одной пачкой (дубликаты схлопнуты), затем по одному
+    assert fake.calls[0] == ['ok', 'bad']
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_aclose_sends_pending_texts_and_waits_for_requests_in_flight():
+    fake = FakeEmbeddingClient(latency=0.01)
+    client = MicroBatchingEmbeddingClient(fake, max_delay=10.0)
+    waiting = asyncio.gather(client.embed('a'), client.embed('bb'))
+    await asyncio.sleep(0)
+
+    await client.aclose()
+
+    assert fake.calls == [['a', 'bb']]
+    assert fake.in_flight == 0
+    assert await waiting == [[1.0], [2.0]]
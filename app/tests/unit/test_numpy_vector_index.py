@@ -0,0 +1,183 @@
+from typing import TypedDict
+
+import numpy as np
+import pytest
+from conftest import Base
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Integer, String, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, mapped_column
+
+from domain.models.base_domain_model import BaseDomainModel
+from infrastructure.repositories.sqlalchemy_mixins import (
+    CreateMixin,
+    DeleteMixin,
+    ListMixin,
+    ReadMixin,
+    UpdateMixin,
+    VectorIndexMixin,
+)
+from infrastructure.vector_index import NumpyVectorIndex
+
+DIM = 8
+
+
+def exact_top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> list[int]:
+    matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    query = query / np.linalg.norm(query)
+    return list(np.argsort(-(matrix @ query))[:k])
+
+
+def load_from(items):
+    async def loader():
+        return items
+    return loader
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_brute_force_matches_exact_search():
+    rng = np.random.default_rng(1)
+    matrix = rng.normal(size=(300, DIM)).astype(np.float32)
+    index = NumpyVectorIndex(dim=DIM)
+    await index.ensure_loaded(1, load_from(list(enumerate(matrix))))
+
+    query = rng.normal(size=DIM)
+    hits = index.search(1, query, k=10)
+    assert [id for id, _ in hits] == exact_top_k(matrix, query, 10)
+    assert [d for _, d in hits] == sorted(d for _, d in hits)
+
+    # allowed_ids ограничивает выдачу так же, как SQL-фильтр
+    allowed = set(range(0, 300, 3))
+    hits = index.search(1, query, k=5, allowed_ids=allowed)
+    assert len(hits) == 5 and all(id in allowed for id, _ in hits)
+
+    # Незагруженная партиция ничего не находит
+    assert index.search(2, query, k=5) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_incremental_upsert_and_remove():
+    index = NumpyVectorIndex(dim=2)
+    await index.ensure_loaded("u1", load_from([(1, [1.0, 0.0]), (2, [0.0, 1.0])]))
+
+    index.upsert("u1", 3, [1.0, 0.1])
+    assert [id for id, _ in index.search("u1", [1.0, 0.0], k=2)] == [1, 3]
+
+    index.remove([1])
+    assert [id for id, _ in index.search("u1", [1.0, 0.0], k=3)] == [3, 2]
+
+    # Перенос id в другую партицию удаляет его из старой
+    await index.ensure_loaded("u2", load_from([]))
+    index.upsert("u2", 3, [1.0, 0.0])
+    assert [id for id, _ in index.search("u1", [1.0, 0.0], k=3)] == [2]
+    assert [id for id, _ in index.search("u2", [1.0, 0.0], k=3)] == [3]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_ivf_recall():
+    rng = np.random.default_rng(2)
+    centers = rng.normal(size=(16, DIM))
+    matrix = (centers[rng.integers(0, 16, size=4000)] + rng.normal(scale=0.1, size=(4000, DIM))).astype(np.float32)
+    index = NumpyVectorIndex(dim=DIM, nlist=16, nprobe=4, ivf_min_size=1000)
+    await index.ensure_loaded(0, load_from(list(enumerate(matrix))))
+
+    recalls = []
+    for query in rng.normal(size=(20, DIM)):
+        hits = {id for id, _ in index.search(0, query, k=10)}
+        recalls.append(len(hits & set(exact_top_k(matrix, query, 10))) / 10)
+    assert np.mean(recalls) >= 0.8
+
+
+class VectorDummyORM(Base):
+    __tablename__ = "vector_dummy"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer)
+    name: Mapped[str] = mapped_column(String)
+    vector: Mapped[list[float]] = mapped_column(Vector(2), nullable=True)
+
+
+class VectorDummyDomain(BaseDomainModel):
+    id: int
+    user_id: int
+    name: str
+
+
+class VectorDummyTyped(TypedDict, total=False):
+    id: int
+    user_id: int
+    name: str | list[str]
+    vector: list[float] | None
+
+
+class VectorDummyRepo(
+    VectorIndexMixin[VectorDummyDomain, VectorDummyORM, VectorDummyTyped],
+    CreateMixin[VectorDummyDomain, VectorDummyORM, VectorDummyTyped],
+    ReadMixin[VectorDummyDomain, VectorDummyORM, VectorDummyTyped],
+    ListMixin[VectorDummyDomain, VectorDummyORM, VectorDummyTyped, str],
+    UpdateMixin[VectorDummyDomain, VectorDummyORM, VectorDummyTyped],
+    DeleteMixin[VectorDummyDomain, VectorDummyORM, VectorDummyTyped],
+):
+    deferred_fields = ("vector",)
+    vector_partition_field = "user_id"
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_repo_search_through_vector_index(async_session: AsyncSession):
+    await async_session.execute(delete(VectorDummyORM))
+    await async_session.commit()
+    index = NumpyVectorIndex(dim=2)
+    repo = VectorDummyRepo(async_session, VectorDummyDomain, VectorDummyORM, vector_index=index)
+
+    await repo.create({"user_id": 1, "name": "east", "vector": [1.0, 0.0]})
+    await repo.create({"user_id": 1, "name": "north", "vector": [0.0, 1.0]})
+    await repo.create({"user_id": 2, "name": "other user", "vector": [1.0, 0.0]})
+    await async_session.commit()
+
+    # Партиция грузится лениво и изолирована по user_id
+    found = await repo.list_by_embedding([1.0, 0.1], limit=5, filters={"user_id": 1})
+    assert [d.name for d in found] == ["east", "north"]
+
+    # Создание, обновление и удаление после commit инкрементально попадают в загруженный индекс
+    await repo.create({"user_id": 1, "name": "north-east", "vector": [1.0, 1.0]})
+    await repo.update({"vector": [0.0, -1.0]}, filters={"name": "north"})
+    await repo.delete(filters={"name": "east"})
+    await async_session.commit()
+    found = await repo.list_by_embedding([1.0, 0.1], limit=5, filters={"user_id": 1})
+    assert [d.name for d in found] == ["north-east", "north"]
+
+    # Дополнительные фильтры работают как в SQL
+    found = await repo.list_by_embedding(
+        [1.0, 0.1], limit=5, filters={"user_id": [1, 2], "name": ["other user", "north"]}, fields=["name"]
+    )
+    assert [d.name for d in found] == ["other user", "north"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_repo_rollback_leaves_vector_index_untouched(async_session: AsyncSession):
+    await async_session.execute(delete(VectorDummyORM))
+    await async_session.commit()
+    index = NumpyVectorIndex(dim=2)
+    repo = VectorDummyRepo(async_session, VectorDummyDomain, VectorDummyORM, vector_index=index)
+    east = await repo.create({"user_id": 1, "name": "east", "vector": [1.0, 0.0]})
+    await async_session.commit()
+    assert [d.name for d in await repo.list_by_embedding([1.0, 0.0], limit=5, filters={"user_id": 1})] == ["east"]
+
+    # Изменения откатанной транзакции не доходят до индекса
+    await repo.create({"user_id": 1, "name": "rolled back", "vector": [1.0, 0.1]})
+    await repo.update({"vector": [0.0, 1.0]}, filters={"name": "east"})
+    await repo.delete(filters={"name": "east"})
+    await async_session.rollback()
+    assert [(id, round(distance, 6)) for id, distance in index.search(1, [1.0, 0.0], 5)] == [(east.id, 0.0)]
+
+    # Следующая транзакция применяет только свои изменения
+    await repo.create({"user_id": 1, "name": "committed", "vector": [0.0, 1.0]})
+    await async_session.commit()
+    assert [d.name for d in await repo.list_by_embedding([0.0, 1.0], limit=5, filters={"user_id": 1})] == [
+        "committed",
+        "east",
+    ]
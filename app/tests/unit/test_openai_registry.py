@@ -0,0 +1,24 @@
+import pytest
+
+from infrastructure.clients import OpenAIClientRegistry
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_clients_share_one_pool_and_close_with_registry():
+    registry = OpenAIClientRegistry(api_key='x', http2=False)
+
+    embedding_client = registry.embedding_client('text-embedding-3-small')
+    chat_model = registry.chat_model('gpt-4o-mini')
+    http_client = registry.http_client
+
+    assert registry.embedding_client('text-embedding-3-small') is embedding_client
+    assert registry.chat_model('gpt-4o-mini') is chat_model
+    assert embedding_client.client is registry.openai
+    assert chat_model.http_async_client is http_client
+
+    await registry.aclose()
+
+    assert http_client.is_closed
+    assert registry.http_client is not http_client
+    await registry.aclose()
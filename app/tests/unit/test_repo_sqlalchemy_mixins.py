@@ -2,12 +2,19 @@ from typing import Literal, TypedDict, cast
 
 import pytest
 from conftest import Base
+from pgvector.sqlalchemy import Vector
 from sqlalchemy import Integer, String, delete, select
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.schema import CreateIndex
 
 from domain.exceptions import DoubleFoundError, NotFoundError
+from domain.models import Link
 from domain.models.base_domain_model import BaseDomainModel
+from infrastructure.db.models import LinkORM
+from infrastructure.db.models.link_orm import VECTOR_DIMENSIONS
+from infrastructure.repositories import LinkRepo
 from infrastructure.repositories.sqlalchemy_mixins import (
     CountMixin,
     CreateMixin,
@@ -194,3 +201,247 @@ async def test_exists(async_session: AsyncSession):
     assert exists is False
     exists = await repo.exists(filters={"name": "test"})
     assert exists is True
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_count_and_exists_with_list_filters(async_session: AsyncSession):
+    await clear_table(async_session)
+    repo = DummyRepo(async_session)
+    for name in ["Alice", "Bob", "Charlie"]:
+        await repo.create({"name": name})
+
+    # Значение-список работает так же, как в ListMixin: column IN (...)
+    assert await repo.count(filters={"name": ["Alice", "Charlie", "nonexistent"]}) == 2
+    assert await repo.exists(filters={"name": ["nonexistent", "Bob"]}) is True
+    assert await repo.exists(filters={"name": ["nonexistent"]}) is False
+    assert await repo.count(filters={"name": []}) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_bulk_update_and_delete_with_list_filters(async_session: AsyncSession):
+    await clear_table(async_session)
+    repo = DummyRepo(async_session)
+    created = [await repo.create({"name": name}) for name in ["a", "b", "c", "d"]]
+
+    # Один UPDATE по списку id возвращает все обновлённые записи
+    updated = await repo.update({"name": "retagged"}, filters={"id": [created[0].id, created[1].id]})
+    assert sorted(d.id for d in updated) == [created[0].id, created[1].id]
+    assert all(d.name == "retagged" for d in updated)
+    assert await repo.count(filters={"name": "retagged"}) == 2
+
+    # Пустой результат фильтра — пустой список без ошибок
+    assert await repo.update({"name": "x"}, filters={"id": [-1]}) == []
+
+    # Один DELETE по списку значений возвращает количество удалённых строк
+    deleted_count = await repo.delete(filters={"name": ["retagged", "c"]})
+    assert deleted_count == 3
+    remaining = await repo.list()
+    assert [d.name for d in remaining] == ["d"]
+    assert await repo.delete(filters={"name": ["nonexistent"]}) == 0
+
+
+class UniqueDummyORM(Base):
+    __tablename__ = "unique_dummy"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String, unique=True)
+    note: Mapped[str] = mapped_column(String, default="")
+    owner_id: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class UniqueDummyDomain(BaseDomainModel):
+    id: int
+    name: str
+    note: str
+    owner_id: int
+
+
+class UniqueDummyTyped(TypedDict, total=False):
+    id: int
+    name: str
+    note: str
+    owner_id: int
+
+
+class UniqueDummyRepo(
+    CreateMixin[UniqueDummyDomain, UniqueDummyORM, UniqueDummyTyped],
+    CountMixin[UniqueDummyDomain, UniqueDummyORM, UniqueDummyTyped],
+    ReadMixin[UniqueDummyDomain, UniqueDummyORM, UniqueDummyTyped],
+):
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, UniqueDummyDomain, UniqueDummyORM)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_create_many_skip_and_update(async_session: AsyncSession):
+    await async_session.execute(delete(UniqueDummyORM))
+    await async_session.commit()
+    repo = UniqueDummyRepo(async_session)
+    await repo.create({"name": "existing", "note": "old"})
+
+    # skip: конфликт с существующей строкой и дубликат внутри пакета не прерывают вставку
+    items: list[UniqueDummyTyped] = [{"name": f"n{i}", "note": "new"} for i in range(7)]
+    items += [{"name": "existing", "note": "new"}, {"name": "n0", "note": "dup"}]
+    report = await repo.create_many(items, on_conflict="skip", chunk_size=3)
+    assert sorted(d.name for d in report.created) == [f"n{i}" for i in range(7)]
+    assert sorted(item["name"] for item in report.skipped) == ["existing", "n0"]
+    assert await repo.count() == 8
+
+    # update: существующая строка обновляется, новая вставляется — и они различаются в отчёте
+    report = await repo.create_many(
+        [{"name": "existing", "note": "updated"}, {"name": "fresh", "note": "new"}], on_conflict="update"
+    )
+    assert [d.name for d in report.created] == ["fresh"]
+    assert [d.name for d in report.updated] == ["existing"]
+    assert report.skipped == []
+    assert (await repo.read(filters={"name": "existing"})).note == "updated"
+    assert await repo.count() == 9
+
+
+class OwnedDummyRepo(UniqueDummyRepo):
+    owner_columns = ("owner_id",)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_create_many_update_does_not_take_over_other_owners_rows(async_session: AsyncSession):
+    await async_session.execute(delete(UniqueDummyORM))
+    await async_session.commit()
+    repo = OwnedDummyRepo(async_session)
+    mine = await repo.create({"name": "https://a", "note": "alice", "owner_id": 1})
+    await repo.create({"name": "https://b", "note": "alice", "owner_id": 1})
+
+    report = await repo.create_many(
+        [
+            {"name": "https://a", "note": "bob import", "owner_id": 2},
+            {"name": "https://c", "note": "bob import", "owner_id": 2},
+        ],
+        on_conflict="update",
+    )
+    assert [d.name for d in report.created] == ["https://c"]
+    assert report.updated == []
+    assert [item["name"] for item in report.skipped] == ["https://a"]
+    row = await repo.read(filters={"name": "https://a"})
+    assert (row.id, row.owner_id, row.note) == (mine.id, 1, "alice")
+
+    # свою строку владелец обновляет; первичный ключ и владелец не перезаписываются
+    report = await repo.create_many(
+        [{"name": "https://b", "note": "re-import", "owner_id": 1, "id": 999}], on_conflict="update"
+    )
+    assert [(d.name, d.note, d.owner_id) for d in report.updated] == [("https://b", "re-import", 1)]
+    assert report.updated[0].id != 999
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_list_keyset_pagination_and_iter_list(async_session: AsyncSession):
+    await clear_table(async_session)
+    repo = DummyRepo(async_session)
+    names = [f"item{i:02d}" for i in range(10)]
+    for name in names:
+        await repo.create({"name": name})
+
+    # Постранично по курсору (id последней записи), без OFFSET
+    pages: list[list[str]] = []
+    after = None
+    while True:
+        page = await repo.list(after=after, limit=4)
+        if not page:
+            break
+        pages.append([d.name for d in page])
+        after = (page[-1].id,)
+    assert [len(p) for p in pages] == [4, 4, 2]
+    assert sum(pages, []) == names
+
+    # Курсор по пользовательской сортировке
+    page = await repo.list(order_columns=["name"], after=("item07",), limit=5)
+    assert [d.name for d in page] == ["item08", "item09"]
+
+    # Потоковое чтение мелкими чанками отдаёт все строки по порядку
+    streamed = [d.name async for d in repo.iter_list(filters={"name": names[:5]}, chunk_size=2)]
+    assert streamed == names[:5]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_fields_projection_and_deferred_fields(async_session: AsyncSession):
+    await clear_table(async_session)
+    repo = DummyRepo(async_session)
+    created = await repo.create({"name": "projected"})
+
+    # Частичная модель содержит только загруженные колонки
+    partial = await repo.read(filters={"id": created.id}, fields=["name"])
+    assert partial.name == "projected"
+    assert partial.model_fields_set == {"name"}
+    assert partial.model_dump() == {"name": "projected"}
+    with pytest.raises(AttributeError):
+        partial.id
+    assert [d.model_fields_set for d in await repo.list(fields=["id"])] == [{"id"}]
+
+    # deferred_fields не попадают в SELECT, пока их не запросили явно
+    repo.deferred_fields = ("name",)
+    assert repo._columns() == [DummyORM.id]
+    assert repo._columns(["id", "name"]) == [DummyORM.id, DummyORM.name]
+
+
+class DefaultsDummyDomain(BaseDomainModel):
+    id: int
+    name: str
+    note: str = "placeholder"
+    owner_id: int = 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_partial_projection_does_not_fill_defaults(async_session: AsyncSession):
+    await async_session.execute(delete(UniqueDummyORM))
+    await async_session.commit()
+    repo = UniqueDummyRepo(async_session)
+    repo.domain_model = DefaultsDummyDomain  # type: ignore[assignment]
+    await repo.create({"name": "with-defaults", "note": "real", "owner_id": 5})
+
+    partial = await repo.read(filters={"name": "with-defaults"}, fields=["note"])
+    assert partial.note == "real"
+    # незагруженные поля не подменяются значениями по умолчанию
+    assert partial.model_dump() == {"note": "real"}
+    with pytest.raises(AttributeError):
+        partial.owner_id
+
+    # Проекция, покрывающая все обязательные поля, тоже не получает defaults
+    required = await repo.read(filters={"name": "with-defaults"}, fields=["id", "name"])
+    assert required.model_fields_set == {"id", "name"}
+    assert required.model_dump().keys() == {"id", "name"}
+    with pytest.raises(AttributeError):
+        required.note
+
+    # Отложенная колонка отсутствует в модели, а не равна значению по умолчанию
+    repo.deferred_fields = ("owner_id",)
+    deferred = await repo.read(filters={"name": "with-defaults"})
+    assert deferred.note == "real"
+    assert "owner_id" not in deferred.model_fields_set
+    with pytest.raises(AttributeError):
+        deferred.owner_id
+    # Все поля загружены — это сама доменная модель
+    full = await repo.read(filters={"name": "with-defaults"}, fields=["id", "name", "note", "owner_id"])
+    assert isinstance(full, DefaultsDummyDomain)
+    assert full.owner_id == 5
+
+
+@pytest.mark.unit
+def test_link_ann_runs_over_halfvec_expression_index(async_session: AsyncSession):
+    repo = LinkRepo(async_session, domain_model=Link, orm_class=LinkORM)
+    embedding = [0.5] * VECTOR_DIMENSIONS
+
+    # На PostgreSQL ANN сортирует по тому же выражению, что и индекс ix_links_vector_halfvec_hnsw
+    distance = str(repo._ann_distance(embedding, "postgresql").compile(dialect=postgresql.dialect()))
+    assert distance == f"CAST(links.vector AS HALFVEC({VECTOR_DIMENSIONS})) <=> %(param_1)s"
+    index = next(ix for ix in LinkORM.__table__.indexes if ix.name == "ix_links_vector_halfvec_hnsw")
+    assert f"(vector::halfvec({VECTOR_DIMENSIONS})) halfvec_cosine_ops" in str(
+        CreateIndex(index).compile(dialect=postgresql.dialect())
+    )
+
+    # Сама колонка хранится с полной точностью, без индекса — полное расстояние по float32
+    assert isinstance(LinkORM.__table__.c.vector.type, Vector)
+    assert "HALFVEC" not in str(repo._ann_distance(embedding, "sqlite"))